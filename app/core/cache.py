@@ -0,0 +1,106 @@
+from __future__ import annotations
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+from app.core.config import settings
+from app.core.metrics import record_cache_lookup
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU en memoria con expiración por tiempo, segura entre hilos.
+    Con maxsize <= 0 queda deshabilitada (todas las consultas son miss y no se guarda nada).
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float, copy_values: bool = True, name: str | None = None):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        # devolver copias evita que quien consume el resultado altere la entrada cacheada
+        self.copy_values = copy_values
+        # con nombre, cada consulta se cuenta en fte_cache_lookups_total{cache=name}
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Hashable | None = None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                hit = False
+            else:
+                expires_at, value = entry
+                if self.ttl_seconds > 0 and expires_at < time.monotonic():
+                    del self._data[key]
+                    self.misses += 1
+                    hit = False
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    hit = True
+        if self.name is not None:
+            record_cache_lookup(self.name, hit)
+        if not hit:
+            return default
+        return copy.deepcopy(value) if self.copy_values else value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        if self.copy_values:
+            value = copy.deepcopy(value)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def bind_version(self, version: Hashable) -> None:
+        """Vacía la cache si cambió la versión de lo que la alimenta (p. ej. el modelo)."""
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                self._data.clear()
+                self._version = version
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+            self._version = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def content_key(*parts: Any) -> str:
+    """Clave por contenido: hash estable de las partes (texto normalizado, versión, parámetros)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(repr(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+# Resultados de inferencia (perfiles y puestos), compartida por ambos servicios
+result_cache = TTLCache(settings.RESULT_CACHE_SIZE, settings.RESULT_CACHE_TTL_SECONDS, name="result")
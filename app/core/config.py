@@ -1,3 +1,5 @@
+from typing import Any, Dict, Literal, Optional
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 
 
@@ -5,7 +7,160 @@ class Settings(BaseSettings):
     FTE_API_URL: str = "http://localhost:4000"
     SERVICE_JWT_SECRET: str = "super_secret_key"
 
+    # Cache de resultados de inferencia (0 = deshabilitada)
+    RESULT_CACHE_SIZE: int = 2048
+    RESULT_CACHE_TTL_SECONDS: float = 3600.0
+
+    # Pool de inferencia: hilos o procesos (con el modelo precargado en cada uno)
+    INFERENCE_EXECUTOR: Literal["thread", "process"] = "thread"
+    INFERENCE_WORKERS: int = 4
+    INFERENCE_QUEUE_SIZE: int = 64
+    INFERENCE_RETRY_AFTER_SECONDS: int = 1
+
+    # Motor de inferencia para artefactos joblib: "numpy" (TF-IDF + un producto disperso con los
+    # coeficientes apilados) o "sklearn" (pipeline.predict_proba). El formato compacto usa siempre numpy
+    INFERENCE_ENGINE: Literal["numpy", "sklearn"] = "numpy"
+
+    # Recarga del modelo al cambiar el archivo en disco (segundos entre revisiones; 0 = deshabilitada)
+    MODEL_WATCH_INTERVAL_SECONDS: float = 0.0
+
+    # Directorio compartido del nodo (p. ej. /dev/shm/fte-ai) donde se exporta el modelo en formato
+    # compacto una sola vez; todos los workers lo mapean en memoria. Vacío = cada worker carga su copia
+    MODEL_SHARED_DIR: str = ""
+
+    # Re-perfilado incremental (/analyze/profile, motor numpy): CVs limpios y vectorizados retenidos
+    # por participanteId; si el CV no cambió, solo se recalculan los términos de los talleres.
+    # En modo procesos cada worker tiene su propia cache. 0 = deshabilitado
+    PROFILE_FEATURE_CACHE_SIZE: int = 1024
+    PROFILE_FEATURE_CACHE_TTL_SECONDS: float = 86400.0
+
+    # Política de decisión del modelo (ver InferencePolicy). Sin ML_THRESHOLD se usa el umbral
+    # con el que se entrenó el modelo (best_threshold)
+    ML_THRESHOLD: Optional[float] = Field(None, ge=0.0, le=1.0)
+    ML_MIN_RESULTS: int = Field(5, ge=0)
+    ML_MIN_PROB_FLOOR: float = Field(0.15, ge=0.0, le=1.0)
+
+    # Perfilado por request (ver app/core/profiling.py): fracción de requests perfilados al azar,
+    # perfiles retenidos en memoria y funciones listadas en cada resumen
+    PROFILE_SAMPLE_RATE: float = Field(0.0, ge=0.0, le=1.0)
+    PROFILE_KEEP: int = Field(50, ge=0)
+    PROFILE_TOP_N: int = Field(25, ge=1)
+
+    # Tamaño máximo de las entradas (0 = sin límite): cuerpo del request y cada cvTexto / puestoTexto.
+    # Por encima se responde 413. POST /analyze/jobs admite hasta JOB_MAX_ITEMS ítems y tiene su
+    # propio límite de cuerpo, MAX_BULK_REQUEST_BYTES
+    MAX_REQUEST_BYTES: int = Field(4 * 1024 * 1024, ge=0)
+    MAX_BULK_REQUEST_BYTES: int = Field(64 * 1024 * 1024, ge=0)
+    MAX_TEXT_CHARS: int = Field(256 * 1024, ge=0)
+
+    # Textos largos en ventanas: con TEXT_WINDOW_CHARS > 0 el texto se evalúa en ventanas de ese
+    # tamaño (a lo sumo TEXT_MAX_WINDOWS; el resto se descarta antes de limpiarlo) y las
+    # probabilidades por clase se agregan con max o mean. 0 = el texto completo en una pasada
+    TEXT_WINDOW_CHARS: int = Field(0, ge=0)
+    TEXT_MAX_WINDOWS: int = Field(8, ge=1)
+    TEXT_WINDOW_AGGREGATE: Literal["max", "mean"] = "max"
+
+    # CVs en PDF/DOCX (/analyze/profile/upload): tamaño máximo del cuerpo multipart, páginas y
+    # tiempo máximo de extracción (vencido, se responde 422 y se descarta el worker del pool de
+    # documentos), y textos extraídos retenidos por hash del archivo. El texto no depende del modelo,
+    # así que su TTL es independiente del de los resultados
+    MAX_UPLOAD_BYTES: int = Field(10 * 1024 * 1024, ge=0)
+    UPLOAD_MAX_PAGES: int = Field(20, ge=1)
+    UPLOAD_EXTRACT_TIMEOUT_SECONDS: float = Field(10.0, gt=0)
+    DOCUMENT_CACHE_SIZE: int = 256
+    DOCUMENT_CACHE_TTL_SECONDS: float = 86400.0
+
+    # Pool propio para la extracción de PDF/DOCX, separado del de inferencia y sin el modelo
+    # cargado. "process" mata el worker de una extracción vencida; con "thread" el hilo sigue
+    # ocupado hasta terminar (solo para desarrollo y pruebas)
+    DOCUMENT_EXECUTOR: Literal["thread", "process"] = "process"
+    DOCUMENT_WORKERS: int = 2
+    DOCUMENT_QUEUE_SIZE: int = 8
+
+    # Cola de análisis masivos (/analyze/jobs): base SQLite (vacío = en memoria, sin reanudación
+    # tras un reinicio), trabajos procesados a la vez, ítems por pasada del modelo y ítems por trabajo
+    JOB_DB_PATH: str = "data/jobs.sqlite3"
+    JOB_CONCURRENCY: int = Field(1, ge=1)
+    JOB_CHUNK_SIZE: int = Field(32, ge=1)
+    JOB_MAX_ITEMS: int = Field(10_000, ge=1)
+    # Con varias instancias sobre la misma base, cada una renueva cada JOB_LEASE_SECONDS / 3 el lease
+    # de sus trabajos en curso; otra instancia solo retoma un trabajo cuyo lease venció
+    JOB_LEASE_SECONDS: float = Field(30.0, gt=0)
+
+    # Requests idénticos concurrentes (/analyze/profile, /analyze/job) comparten un solo cálculo
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # Micro-lotes de requests individuales (/analyze/profile, /analyze/job): con todos los workers
+    # del pool ocupados, los requests se agrupan hasta MICRO_BATCH_WAIT_MS o MICRO_BATCH_MAX_ITEMS
+    # y se evalúan en una sola pasada del modelo; con workers libres se ejecutan de inmediato.
+    # 0 ms = deshabilitado
+    MICRO_BATCH_WAIT_MS: float = Field(2.0, ge=0)
+    MICRO_BATCH_MAX_ITEMS: int = Field(32, ge=1)
+
+    # Almacén de perfiles (GET /profile/{participanteId}): base SQLite con el último perfil de cada
+    # participante; /analyze/profile no vuelve al modelo mientras no cambien las entradas, la
+    # política ni el modelo. Versiones anteriores retenidas por participante. Vacío (por defecto) =
+    # deshabilitado; se habilita con una ruta explícita, p. ej. /var/lib/fte-ai/profiles.sqlite3
+    PROFILE_DB_PATH: str = ""
+    PROFILE_HISTORY_SIZE: int = Field(10, ge=1)
+
+    # Lotes con `Accept: application/x-ndjson`: ítems por micro-lote (cada uno se envía al terminar)
+    STREAM_BATCH_SIZE: int = Field(16, ge=1)
+
     model_config = {"env_file": ".env"}
 
 
 settings = Settings()
+
+
+class InferencePolicy(BaseModel):
+    """
+    Umbral, mínimo de resultados y piso de probabilidad con que los servicios convierten las
+    probabilidades del modelo en competencias. Es inmutable: se reemplaza completa al recargarla.
+    """
+    threshold: Optional[float] = Field(None, ge=0.0, le=1.0, description="None = umbral del modelo")
+    min_results: int = Field(5, ge=0, description="Mínimo de competencias del perfil (completadas con el piso)")
+    min_prob_floor: float = Field(0.15, ge=0.0, le=1.0, description="Probabilidad mínima para completar resultados")
+
+    model_config = {"frozen": True}
+
+    @classmethod
+    def from_settings(cls, source: Settings) -> "InferencePolicy":
+        return cls(
+            threshold=source.ML_THRESHOLD,
+            min_results=source.ML_MIN_RESULTS,
+            min_prob_floor=source.ML_MIN_PROB_FLOOR,
+        )
+
+    def resolve_threshold(self, metadata: Dict[str, Any]) -> float:
+        if self.threshold is not None:
+            return self.threshold
+        return float(metadata.get("best_threshold", metadata.get("threshold", 0.20)))
+
+    def describe(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Política efectiva para un modelo, tal como se informa en el meta de las respuestas."""
+        return {
+            "threshold": self.resolve_threshold(metadata),
+            "threshold_source": "settings" if self.threshold is not None else "model",
+            "min_results": self.min_results,
+            "min_prob_floor": self.min_prob_floor,
+        }
+
+
+# Se resuelve una vez al arrancar; las rutas de administración la reemplazan en caliente
+_policy = InferencePolicy.from_settings(settings)
+
+
+def get_inference_policy() -> InferencePolicy:
+    return _policy
+
+
+def set_inference_policy(policy: InferencePolicy) -> InferencePolicy:
+    global _policy
+    _policy = policy
+    return policy
+
+
+def reload_inference_policy() -> InferencePolicy:
+    """Vuelve a leer ML_THRESHOLD, ML_MIN_RESULTS y ML_MIN_PROB_FLOOR del entorno / .env."""
+    return set_inference_policy(InferencePolicy.from_settings(Settings()))
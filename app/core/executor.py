@@ -0,0 +1,311 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import functools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.profiling import current_profile, run_profiled
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima para que los workers de un pool de reemplazo arranquen y se calienten
+WARM_UP_TIMEOUT_SECONDS = 300.0
+
+
+class ExecutorSaturated(Exception):
+    """El pool de inferencia no admite más trabajos; el cliente debe reintentar más tarde."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Inference executor saturated")
+        self.retry_after = retry_after
+
+
+def _init_worker(preload_model: bool, model_path: str | None = None, ready=None) -> None:
+    # inicializador de cada proceso: con preload_model carga el modelo antes del primer trabajo
+    # y, si está habilitado, vigila el archivo para recargarlo en ese proceso.
+    # En un pool de reemplazo (ready) además lo calienta y espera a los demás workers
+    metrics.forward_samples()
+    if preload_model:
+        from app.ml.model_loader import load_model, start_model_watcher, warm_up_model
+        load_model(model_path)
+        start_model_watcher(settings.MODEL_WATCH_INTERVAL_SECONDS)
+        if ready is not None:
+            warm_up_model()
+    if ready is not None:
+        ready.wait(WARM_UP_TIMEOUT_SECONDS)
+
+
+def _noop() -> None:
+    return None
+
+
+def _run_forwarding_metrics(fn: Callable[..., Any], *args: Any) -> Tuple[Any, List[metrics.Sample]]:
+    # en el worker: devuelve el resultado junto con las métricas acumuladas hasta ahora
+    # (si fn falla quedan pendientes y viajan con el próximo resultado)
+    result = fn(*args)
+    return result, metrics.drain_samples()
+
+
+def _apply_worker_metrics(future) -> None:
+    if not future.cancelled() and future.exception() is None:
+        metrics.REGISTRY.apply(future.result()[1])
+
+
+class InferenceExecutor:
+    """
+    Pool acotado para el trabajo de CPU (limpieza, TF-IDF, clasificador) fuera del event loop.
+    Admite `workers` trabajos en ejecución más `queue_size` en espera; por encima de eso
+    rechaza de inmediato con ExecutorSaturated en lugar de encolar sin límite.
+    Con preload_model=False los procesos no cargan el modelo (pool de extracción de documentos).
+    """
+
+    def __init__(self, kind: str, workers: int, queue_size: int, retry_after: int,
+                 preload_model: bool = True, name: str = "inference"):
+        self.kind = kind
+        self.name = name
+        self.preload_model = preload_model
+        self.workers = max(1, workers)
+        self.capacity = self.workers + max(0, queue_size)
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._model_path: str | None = None
+        # modo procesos: pool al que se envió cada trabajo pendiente y pools en reemplazo (ver _abandon)
+        self._pending: Dict[Future, Executor] = {}
+        self._replacing: set = set()
+        if kind == "process":
+            self._pool: Executor = self._process_pool(None)
+        elif kind == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=name)
+        else:
+            raise ValueError(f"Tipo de executor inválido: {kind!r} (usar 'thread' o 'process')")
+
+    def _process_pool(self, model_path: str | None, ready=None) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.preload_model, model_path, ready),
+        )
+
+    def _warm_process_pool(self, model_path: str | None) -> ProcessPoolExecutor:
+        """
+        Pool de procesos nuevo con sus `workers` procesos ya arrancados y, si corresponde, el
+        modelo cargado y caliente en cada uno (bloquea hasta entonces). Los inicializadores esperan en una barrera
+        a que terminen todos: mientras ninguno queda libre, cada trabajo de arranque lanza un
+        proceso más. Si alguno falla, el pool se descarta y se propaga el error.
+        """
+        ready = multiprocessing.get_context("spawn").Barrier(self.workers)
+        pool = self._process_pool(model_path, ready)
+        try:
+            for future in [pool.submit(_noop) for _ in range(self.workers)]:
+                future.result(timeout=WARM_UP_TIMEOUT_SECONDS)
+        except BaseException:
+            ready.abort()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        return pool
+
+    def recycle(self, model_path: str | None = None) -> None:
+        """
+        Modo procesos: reemplaza todos los workers por procesos nuevos que cargan model_path.
+        El pool nuevo se arranca y se calienta aparte (bloquea hasta entonces: llamar con
+        asyncio.to_thread) y recién después recibe trabajos; los ya enviados terminan en los
+        workers anteriores, que se cierran al quedar libres.
+        """
+        if self.kind != "process":
+            return
+        pool = self._warm_process_pool(model_path)
+        with self._lock:
+            self._model_path = model_path
+            previous, self._pool = self._pool, pool
+        previous.shutdown(wait=False)
+
+    def _abandon(self, pool: Executor, stuck: Future) -> None:
+        """
+        Modo procesos: un trabajo superó su tiempo máximo y sigue ocupando un worker. En segundo
+        plano se arranca y calienta un pool de reemplazo (mientras tanto los demás workers siguen
+        atendiendo); al ponerlo en uso, los trabajos pendientes del pool anterior terminan
+        normalmente y recién entonces se matan sus procesos, incluido el que quedó trabado.
+        """
+        with self._lock:
+            if pool in self._replacing:
+                return
+            self._replacing.add(pool)
+
+        def replace() -> None:
+            if self._pool is pool:
+                try:
+                    fresh = self._warm_process_pool(self._model_path)
+                except Exception:
+                    logger.exception("No se pudo calentar el pool de reemplazo; se usa uno sin calentar")
+                    fresh = self._process_pool(self._model_path)
+                with self._lock:
+                    swapped = self._pool is pool
+                    if swapped:
+                        self._pool = fresh
+                if not swapped:
+                    # recycle lo reemplazó mientras tanto
+                    fresh.shutdown(wait=False)
+            with self._lock:
+                others = [future for future, owner in self._pending.items() if owner is pool and future is not stuck]
+            processes = list((getattr(pool, "_processes", None) or {}).values())
+            pool.shutdown(wait=False)
+            wait(others)
+            for process in processes:
+                process.terminate()
+            with self._lock:
+                self._replacing.discard(pool)
+
+        threading.Thread(target=replace, name=f"{self.name}-abandoned-pool", daemon=True).start()
+
+    def _forget(self, future: Future) -> None:
+        with self._lock:
+            self._pending.pop(future, None)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                metrics.EXECUTOR_REJECTED.inc(pool=self.name)
+                raise ExecutorSaturated(self.retry_after)
+            self.in_flight += 1
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: float | None = None) -> Any:
+        """
+        Ejecuta fn(*args) en el pool y espera el resultado sin bloquear el event loop.
+        Con timeout, pasado ese tiempo lanza asyncio.TimeoutError; en modo procesos además se
+        descarta el worker que quedó ocupado (ver _abandon). Un hilo no se puede interrumpir:
+        en modo hilos el trabajo sigue hasta terminar y conserva su cupo mientras tanto.
+        """
+        profile = current_profile()
+        if profile is not None:
+            # request perfilado: el profiler corre donde se ejecuta fn (hilo o proceso del pool)
+            fn, args = run_profiled, (fn, *args)
+        self._acquire()
+        try:
+            if self.kind == "thread":
+                # propaga el contexto (contextvars) del request al hilo de trabajo
+                ctx = contextvars.copy_context()
+                future = self._pool.submit(functools.partial(ctx.run, fn, *args))
+            else:
+                with self._lock:
+                    pool = self._pool
+                    future = pool.submit(_run_forwarding_metrics, fn, *args)
+                    self._pending[future] = pool
+                future.add_done_callback(self._forget)
+        except BaseException:
+            self._release()
+            raise
+        # el cupo se libera cuando termina el trabajo, aunque el cliente se haya desconectado
+        future.add_done_callback(self._release)
+        if self.kind != "thread":
+            future.add_done_callback(_apply_worker_metrics)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # wait_for cancela el future: si todavía esperaba en la cola no llegó a ocupar un worker
+            if self.kind == "process" and not future.cancelled():
+                self._abandon(pool, future)
+            raise
+        if self.kind != "thread":
+            result, _ = result
+        if profile is not None:
+            result, stats = result
+            profile.add(stats)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": self.in_flight,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+
+_executor: InferenceExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> InferenceExecutor:
+    """Executor global, creado a demanda con la configuración de Settings."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = InferenceExecutor(
+                    settings.INFERENCE_EXECUTOR,
+                    settings.INFERENCE_WORKERS,
+                    settings.INFERENCE_QUEUE_SIZE,
+                    settings.INFERENCE_RETRY_AFTER_SECONDS,
+                )
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+_document_executor: InferenceExecutor | None = None
+
+
+def get_document_executor() -> InferenceExecutor:
+    """
+    Pool propio para extraer texto de PDF/DOCX, sin el modelo cargado. Separado del de
+    inferencia: documentos patológicos no ocupan sus workers y una extracción vencida se
+    corta descartando el proceso (ver InferenceExecutor._abandon).
+    """
+    global _document_executor
+    if _document_executor is None:
+        with _executor_lock:
+            if _document_executor is None:
+                _document_executor = InferenceExecutor(
+                    settings.DOCUMENT_EXECUTOR,
+                    settings.DOCUMENT_WORKERS,
+                    settings.DOCUMENT_QUEUE_SIZE,
+                    settings.INFERENCE_RETRY_AFTER_SECONDS,
+                    preload_model=False,
+                    name="documents",
+                )
+    return _document_executor
+
+
+def shutdown_document_executor() -> None:
+    global _document_executor
+    with _executor_lock:
+        if _document_executor is not None:
+            _document_executor.shutdown()
+            _document_executor = None
+
+
+def _collect_executor_metrics() -> None:
+    executor = _executor
+    if executor is None:
+        return
+    stats = executor.stats()
+    metrics.EXECUTOR_IN_FLIGHT.set(stats["in_flight"])
+    metrics.EXECUTOR_CAPACITY.set(stats["capacity"])
+
+
+metrics.REGISTRY.add_collector(_collect_executor_metrics)
@@ -0,0 +1,328 @@
+"""
+Cola de análisis masivos sobre SQLite, sin broker externo.
+
+Cada trabajo guarda sus ítems (payloads JSON) y, a medida que se procesan, sus resultados.
+JOB_CONCURRENCY tareas del event loop toman trabajos en orden de llegada y los procesan de a
+JOB_CHUNK_SIZE ítems con la función del tipo de trabajo (registrada con `register_handler`)
+en el pool de inferencia, así comparten el límite de concurrencia con los requests.
+Como los resultados se guardan por tramo, un trabajo interrumpido continúa desde los ítems
+pendientes. Varias instancias pueden compartir la base: cada trabajo en curso tiene un dueño
+(la instancia que lo tomó) que renueva su lease periódicamente, y solo se retoma un trabajo
+cuyo lease venció (su dueño se detuvo sin liberarlo). Un resultado ya guardado no se pisa
+ni se vuelve a contar.
+"""
+from __future__ import annotations
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.core.config import InferencePolicy, get_inference_policy, settings
+from app.core.executor import ExecutorSaturated, get_executor
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+# tipo de trabajo -> función(ítems, política) -> un resultado por ítem (se ejecuta en el pool)
+Handler = Callable[[List[Dict[str, Any]], InferencePolicy], List[Dict[str, Any]]]
+_handlers: Dict[str, Handler] = {}
+
+
+def register_handler(kind: str, handler: Handler) -> None:
+    _handlers[kind] = handler
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    policy TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    processed INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    PRIMARY KEY (job_id, idx)
+);
+"""
+
+# columnas agregadas después de la primera versión del esquema (bases ya creadas)
+_MIGRATIONS = {"owner": "ALTER TABLE jobs ADD COLUMN owner TEXT",
+               "heartbeat_at": "ALTER TABLE jobs ADD COLUMN heartbeat_at REAL"}
+
+
+class JobQueue:
+    """Trabajos y resultados en SQLite (path vacío = en memoria) y las tareas que los procesan."""
+
+    def __init__(self, path: str, concurrency: int = 1, chunk_size: int = 32, lease_seconds: float = 30.0):
+        self.path = path or ":memory:"
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = max(1, chunk_size)
+        self.lease_seconds = lease_seconds
+        # identifica a esta instancia como dueña de los trabajos que toma
+        self.owner = uuid.uuid4().hex
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            # otra instancia puede tener la base tomada por un instante
+            self._db.execute("PRAGMA busy_timeout=5000")
+        self._db.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        for column, statement in _MIGRATIONS.items():
+            if column not in columns:
+                self._db.execute(statement)
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+
+    # ---- almacenamiento ----
+
+    def submit(self, kind: str, items: List[Dict[str, Any]], policy: Optional[InferencePolicy] = None) -> Dict[str, Any]:
+        """Encola un trabajo con la política vigente (la usa hasta terminar, aunque se recargue)."""
+        if kind not in _handlers:
+            raise ValueError(f"tipo de trabajo desconocido: {kind!r}")
+        job_id = uuid.uuid4().hex
+        policy = policy or get_inference_policy()
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            self._db.execute(
+                "INSERT INTO jobs (id, kind, status, policy, total, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, policy.model_dump_json(), len(items), time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO job_items (job_id, idx, payload) VALUES (?, ?, ?)",
+                ((job_id, i, json.dumps(item, ensure_ascii=False)) for i, item in enumerate(items)),
+            )
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["policy"] = json.loads(job["policy"])
+        return job
+
+    def results(self, job_id: str, offset: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Resultados ya calculados desde el ítem `offset`, en el orden de entrada."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT idx, result FROM job_items WHERE job_id = ? AND idx >= ? AND result IS NOT NULL "
+                "ORDER BY idx LIMIT ?",
+                (job_id, offset, -1 if limit is None else limit),
+            ).fetchall()
+        return [{"index": row["idx"], **json.loads(row["result"])} for row in rows]
+
+    def iter_results(self, job_id: str, follow: bool = False, page: int = 200, poll_seconds: float = 0.5) -> Iterator[Dict[str, Any]]:
+        """
+        Recorre los resultados por páginas (sin cargarlos todos). Con follow=True espera los
+        que faltan hasta que el trabajo termine.
+        """
+        next_index = 0
+        while True:
+            status = (self.get(job_id) or {}).get("status")
+            batch = self.results(job_id, next_index, page)
+            for result in batch:
+                yield result
+            if batch:
+                next_index = batch[-1]["index"] + 1
+            if len(batch) == page:
+                continue
+            if not follow or status in FINISHED or status is None:
+                return
+            time.sleep(poll_seconds)
+
+    def _claim_next(self) -> Optional[Dict[str, Any]]:
+        """Toma el trabajo en cola más antiguo, o uno en curso cuyo lease venció."""
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND COALESCE(heartbeat_at, 0) < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now - self.lease_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE jobs SET status = ?, owner = ?, heartbeat_at = ?, started_at = COALESCE(started_at, ?) "
+                "WHERE id = ?",
+                (RUNNING, self.owner, now, now, row["id"]),
+            )
+        return self.get(row["id"])
+
+    def _renew_leases(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE status = ? AND owner = ?", (time.time(), RUNNING, self.owner)
+            ).rowcount
+
+    def _release_leases(self) -> int:
+        # detención ordenada: los trabajos propios vuelven a la cola sin esperar a que venza el lease
+        with self._lock:
+            return self._db.execute(
+                "UPDATE jobs SET status = ?, owner = NULL WHERE status = ? AND owner = ?", (QUEUED, RUNNING, self.owner)
+            ).rowcount
+
+    def _pending(self, job_id: str, limit: int) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT idx, payload FROM job_items WHERE job_id = ? AND result IS NULL ORDER BY idx LIMIT ?",
+                (job_id, limit),
+            ).fetchall()
+
+    def _store(self, job_id: str, indexes: List[int], results: List[Dict[str, Any]]) -> int:
+        """Guarda los resultados de los ítems que todavía no tenían; devuelve cuántos guardó."""
+        stored = errors = 0
+        with self._lock, self._db:
+            self._db.execute("BEGIN")
+            for i, result in zip(indexes, results):
+                # si otra instancia ya guardó este ítem (tomó el trabajo tras vencer el lease) no se pisa ni se cuenta
+                written = self._db.execute(
+                    "UPDATE job_items SET result = ? WHERE job_id = ? AND idx = ? AND result IS NULL",
+                    (json.dumps(result, ensure_ascii=False), job_id, i),
+                ).rowcount
+                stored += written
+                errors += written if "error" in result else 0
+            self._db.execute(
+                "UPDATE jobs SET processed = processed + ?, errors = errors + ? WHERE id = ?",
+                (stored, errors, job_id),
+            )
+        return stored
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        # solo el dueño actual cierra el trabajo
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ? AND owner = ?",
+                (status, error, time.time(), job_id, self.owner),
+            )
+
+    def requeue_interrupted(self) -> int:
+        """Devuelve a la cola los trabajos en curso cuyo dueño dejó de renovar el lease."""
+        with self._lock:
+            return self._db.execute(
+                "UPDATE jobs SET status = ?, owner = NULL WHERE status = ? AND COALESCE(heartbeat_at, 0) < ?",
+                (QUEUED, RUNNING, time.time() - self.lease_seconds),
+            ).rowcount
+
+    # ---- ejecución ----
+
+    async def _run_chunk(self, handler: Handler, items: List[Dict[str, Any]], policy: InferencePolicy) -> List[Dict[str, Any]]:
+        executor = get_executor()
+        while True:
+            try:
+                return await executor.run(handler, items, policy)
+            except ExecutorSaturated as exc:
+                # el pool está ocupado con requests interactivos: se cede y se reintenta
+                await asyncio.sleep(exc.retry_after)
+
+    async def process(self, job: Dict[str, Any]) -> None:
+        handler = _handlers.get(job["kind"])
+        if handler is None:
+            await asyncio.to_thread(self._finish, job["id"], FAILED, f"tipo de trabajo desconocido: {job['kind']!r}")
+            return
+        policy = InferencePolicy(**job["policy"])
+        try:
+            while True:
+                rows = await asyncio.to_thread(self._pending, job["id"], self.chunk_size)
+                if not rows:
+                    break
+                indexes = [row["idx"] for row in rows]
+                results = await self._run_chunk(handler, [json.loads(row["payload"]) for row in rows], policy)
+                await asyncio.to_thread(self._store, job["id"], indexes, results)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.exception("Falló el trabajo %s", job["id"])
+            await asyncio.to_thread(self._finish, job["id"], FAILED, f"{type(exc).__name__}: {exc}")
+            return
+        await asyncio.to_thread(self._finish, job["id"], DONE)
+
+    async def _worker(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            # se limpia antes de buscar: un submit posterior vuelve a despertar a la tarea
+            self._wakeup.clear()
+            job = await asyncio.to_thread(self._claim_next)
+            if job is None:
+                # sin submit local, se vuelve a mirar al vencer un lease (trabajos de otra instancia detenida)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.lease_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self.process(job)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await asyncio.to_thread(self._renew_leases)
+
+    def start(self) -> None:
+        """Arranca las tareas (en el event loop actual) y retoma los trabajos interrumpidos."""
+        if self._tasks:
+            return
+        requeued = self.requeue_interrupted()
+        if requeued:
+            logger.info("Retomando %d trabajo(s) interrumpido(s)", requeued)
+        self._wakeup = asyncio.Event()
+        self._wakeup.set()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        # el tramo en curso se descarta; sus ítems siguen pendientes para la próxima vez
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._wakeup = None
+        await asyncio.to_thread(self._release_leases)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Cola global, creada a demanda con la configuración de Settings."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = JobQueue(settings.JOB_DB_PATH, settings.JOB_CONCURRENCY, settings.JOB_CHUNK_SIZE,
+                                  settings.JOB_LEASE_SECONDS)
+    return _queue
+
+
+def set_job_queue(queue: Optional[JobQueue]) -> None:
+    global _queue
+    with _queue_lock:
+        _queue = queue
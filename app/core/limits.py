@@ -0,0 +1,96 @@
+"""
+Límites de tamaño de las entradas: cuerpo del request (MAX_REQUEST_BYTES, MAX_UPLOAD_BYTES
+para los archivos multipart o MAX_BULK_REQUEST_BYTES para los trabajos masivos) y textos libres
+(MAX_TEXT_CHARS para cvTexto / puestoTexto).
+Por encima de cualquiera de los dos se responde 413 antes de llegar al pool de inferencia.
+"""
+from __future__ import annotations
+from typing import Annotated, Any, Dict, List, Optional
+
+from fastapi import HTTPException
+from pydantic import AfterValidator
+from pydantic_core import PydanticCustomError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Tipo del error de validación de los textos demasiado largos (se responde 413, no 422)
+TEXT_TOO_LONG = "text_too_long"
+
+
+def _check_text_size(value: str) -> str:
+    limit = settings.MAX_TEXT_CHARS
+    if limit and len(value) > limit:
+        raise PydanticCustomError(
+            TEXT_TOO_LONG,
+            "El texto tiene {length} caracteres; el máximo es {limit}",
+            {"length": len(value), "limit": limit},
+        )
+    return value
+
+
+# Texto libre acotado por MAX_TEXT_CHARS (se lee al validar, así responde a cambios de Settings)
+BoundedText = Annotated[str, AfterValidator(_check_text_size)]
+
+
+def text_too_long_errors(errors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [error for error in errors if error.get("type") == TEXT_TOO_LONG]
+
+
+# Alta de trabajos masivos (hasta JOB_MAX_ITEMS ítems por cuerpo)
+BULK_JOBS_PATH = "/analyze/jobs"
+
+
+def _body_limit(scope: Scope, headers: Headers) -> int:
+    if headers.get("content-type", "").startswith("multipart/form-data"):
+        return settings.MAX_UPLOAD_BYTES
+    if scope["method"] == "POST" and scope["path"].rstrip("/") == BULK_JOBS_PATH:
+        return settings.MAX_BULK_REQUEST_BYTES
+    return settings.MAX_REQUEST_BYTES
+
+
+def _too_large_detail(limit: int) -> str:
+    return f"El cuerpo del request supera el máximo de {limit} bytes"
+
+
+class BodySizeLimitMiddleware:
+    """
+    Middleware ASGI que rechaza con 413 los cuerpos de más de MAX_REQUEST_BYTES (MAX_UPLOAD_BYTES
+    si son multipart/form-data, MAX_BULK_REQUEST_BYTES en POST /analyze/jobs): de inmediato si lo
+    declara Content-Length y, si no (chunked), al superar el límite mientras se lee.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        limit = _body_limit(scope, headers)
+        if not limit:
+            await self.app(scope, receive, send)
+            return
+
+        declared: Optional[str] = headers.get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            response = JSONResponse({"detail": _too_large_detail(limit)}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI propaga las HTTPException levantadas al leer el cuerpo
+                    raise HTTPException(status_code=413, detail=_too_large_detail(limit))
+            return message
+
+        await self.app(scope, limited_receive, send)
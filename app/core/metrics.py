@@ -0,0 +1,275 @@
+"""
+Métricas del servicio en formato de texto de Prometheus, sin dependencias externas.
+
+Contadores, gauges e histogramas con etiquetas, seguros entre hilos. En modo procesos
+(INFERENCE_EXECUTOR=process) los workers no tienen registro propio: acumulan sus
+mediciones y el executor las devuelve junto con cada resultado para aplicarlas en el
+proceso principal, que es el que expone /metrics.
+"""
+from __future__ import annotations
+import bisect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Buckets por defecto de los clientes de Prometheus (latencia de requests, en segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+# Etapas internas: desde decenas de microsegundos
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# (nombre de la métrica, operación, valores de etiquetas, valor)
+Sample = Tuple[str, str, Tuple[str, ...], float]
+
+_pending: Optional[List[Sample]] = None
+_pending_lock = threading.Lock()
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) == len(self.labelnames):
+            try:
+                return tuple(str(labels[n]) for n in self.labelnames)
+            except KeyError:
+                pass
+        raise ValueError(f"{self.name}: se esperaban las etiquetas {self.labelnames}, llegaron {tuple(labels)}")
+
+    def _record(self, op: str, key: Tuple[str, ...], value: float) -> None:
+        if _pending is not None:
+            with _pending_lock:
+                _pending.append((self.name, op, key, value))
+            return
+        with self._lock:
+            self._apply(op, key, value)
+
+    def _apply(self, op: str, key: Tuple[str, ...], value: float) -> None:
+        raise NotImplementedError
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._record("inc", self._key(labels), amount)
+
+    def _apply(self, op: str, key: Tuple[str, ...], value: float) -> None:
+        self._values[key] = self._values.get(key, 0.0) + value
+
+    def get(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self._header() + [f"{self.name}{_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._record("set", self._key(labels), value)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self._record("inc", self._key(labels), -amount)
+
+    def _apply(self, op: str, key: Tuple[str, ...], value: float) -> None:
+        if op == "set":
+            self._values[key] = value
+        else:
+            super()._apply(op, key, value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # por etiqueta: [conteo por bucket (no acumulado, el último es +Inf), suma]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        self._record("observe", self._key(labels), value)
+
+    def time(self, **labels: str) -> "_Timer":
+        """Context manager que observa la duración del bloque."""
+        return _Timer(self, self._key(labels))
+
+    def _apply(self, op: str, key: Tuple[str, ...], value: float) -> None:
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, (list(counts), total)) for k, (counts, total) in self._values.items())
+        lines = self._header()
+        bounds = self.buckets + (float("inf"),)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_key", "_start")
+
+    def __init__(self, histogram: Histogram, key: Tuple[str, ...]):
+        self._histogram = histogram
+        self._key = key
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram._record("observe", self._key, time.perf_counter() - self._start)
+
+
+class MetricsRegistry:
+    """Conjunto de métricas del proceso; `collectors` se ejecutan antes de cada exposición."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        self._collectors.append(collector)
+
+    def apply(self, samples: Sequence[Sample]) -> None:
+        """Aplica mediciones hechas en otro proceso (ver forward_samples)."""
+        for name, op, key, value in samples:
+            metric = self._metrics.get(name)
+            if metric is not None:
+                with metric._lock:
+                    metric._apply(op, key, value)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        return "\n".join(line for metric in self._metrics.values() for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def forward_samples() -> None:
+    """En un worker de procesos: acumular las mediciones para devolverlas al proceso principal."""
+    global _pending
+    with _pending_lock:
+        if _pending is None:
+            _pending = []
+
+
+def drain_samples() -> List[Sample]:
+    global _pending
+    if _pending is None:
+        return []
+    with _pending_lock:
+        samples, _pending = _pending, []
+    return samples
+
+
+# ====== Métricas del servicio ======
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    "fte_http_requests_total", "Requests HTTP atendidos.", ("method", "route", "status")))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "fte_http_request_duration_seconds", "Latencia de los requests HTTP.", ("method", "route")))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    "fte_http_requests_in_flight", "Requests HTTP en curso."))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "fte_stage_duration_seconds", "Duración de cada etapa del análisis.", ("stage",), buckets=STAGE_BUCKETS))
+MODEL_LOAD_SECONDS = REGISTRY.register(Gauge(
+    "fte_model_load_seconds", "Duración de la última carga del modelo."))
+MODEL_LOADS = REGISTRY.register(Counter(
+    "fte_model_loads_total", "Cargas del modelo (inicial y recargas).", ("result",)))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "fte_cache_lookups_total", "Consultas a las caches de resultados.", ("cache", "result")))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    "fte_cache_hit_ratio", "Proporción de aciertos acumulada de cada cache.", ("cache",)))
+COALESCED_REQUESTS = REGISTRY.register(Counter(
+    "fte_coalesced_requests_total", "Requests que esperaron un análisis idéntico ya en curso.", ("operation",)))
+MICRO_BATCH_SIZE = REGISTRY.register(Histogram(
+    "fte_micro_batch_size", "Requests individuales evaluados en cada pasada del modelo (1 = ejecución inmediata).",
+    ("operation",), buckets=(1, 2, 4, 8, 16, 32, 64, 128)))
+EXECUTOR_IN_FLIGHT = REGISTRY.register(Gauge(
+    "fte_inference_in_flight", "Trabajos en ejecución o en espera en el pool de inferencia."))
+EXECUTOR_CAPACITY = REGISTRY.register(Gauge(
+    "fte_inference_capacity", "Trabajos admitidos por el pool de inferencia (workers + cola)."))
+EXECUTOR_REJECTED = REGISTRY.register(Counter(
+    "fte_inference_rejected_total", "Trabajos rechazados por saturación (pool de inferencia o de documentos).",
+    ("pool",)))
+
+
+def stage(name: str) -> _Timer:
+    """Mide una etapa del análisis: `with stage("tfidf"): ...`."""
+    return _Timer(STAGE_LATENCY, (name,))
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def _collect_cache_ratios() -> None:
+    with CACHE_LOOKUPS._lock:
+        lookups = dict(CACHE_LOOKUPS._values)
+    for cache in {cache for cache, _ in lookups}:
+        hits = lookups.get((cache, "hit"), 0.0)
+        total = hits + lookups.get((cache, "miss"), 0.0)
+        CACHE_HIT_RATIO.set(hits / total if total else 0.0, cache=cache)
+
+
+REGISTRY.add_collector(_collect_cache_ratios)
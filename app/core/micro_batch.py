@@ -0,0 +1,89 @@
+"""
+Micro-lotes de requests individuales.
+
+Con el pool de inferencia con workers libres cada request se ejecuta de inmediato, como
+siempre. Cuando están todos ocupados, los requests que llegan se agrupan (hasta
+MICRO_BATCH_WAIT_MS o MICRO_BATCH_MAX_ITEMS, lo que ocurra primero) y se evalúan con la
+función por lote del servicio: una sola matriz TF-IDF y una sola llamada al clasificador
+para todos. Cada request recibe su propio resultado.
+"""
+from __future__ import annotations
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core import metrics
+from app.core.config import InferencePolicy, settings
+from app.core.executor import get_executor
+from app.core.profiling import current_profile
+
+# función por lote (ítems, política) -> {"resultados": [...], "meta": {...}}
+BatchFn = Callable[[List[Any], InferencePolicy], Dict[str, Any]]
+
+
+class MicroBatcher:
+    """Agrupa los ítems que llegan mientras el pool está ocupado; uno por política de inferencia."""
+
+    def __init__(self, name: str, batch_fn: BatchFn,
+                 max_wait_ms: Optional[float] = None, max_items: Optional[int] = None):
+        # nombre de la operación en fte_micro_batch_size{operation=name}
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_wait_ms = settings.MICRO_BATCH_WAIT_MS if max_wait_ms is None else max_wait_ms
+        self.max_items = settings.MICRO_BATCH_MAX_ITEMS if max_items is None else max_items
+        # política serializada -> ítems en espera, su política y el temporizador del lote
+        self._pending: Dict[str, List[Tuple[Any, asyncio.Future]]] = {}
+        self._policies: Dict[str, InferencePolicy] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+
+    def _pool_busy(self) -> bool:
+        executor = get_executor()
+        return executor.stats()["in_flight"] >= executor.workers
+
+    async def submit(self, item: Any, policy: InferencePolicy, immediate: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Resultado de `item`. `immediate` es la ejecución individual, que se usa con el pool libre,
+        con los micro-lotes deshabilitados o en un request perfilado (se perfila solo ese request).
+        """
+        if self.max_wait_ms <= 0 or current_profile() is not None or not self._pool_busy():
+            metrics.MICRO_BATCH_SIZE.observe(1, operation=self.name)
+            return await immediate()
+
+        key = policy.model_dump_json()
+        future = asyncio.get_running_loop().create_future()
+        bucket = self._pending.setdefault(key, [])
+        bucket.append((item, future))
+        self._policies[key] = policy
+        if len(bucket) >= self.max_items:
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(self.max_wait_ms / 1000, self._flush, key)
+        return await future
+
+    def _flush(self, key: str) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        bucket = self._pending.pop(key, [])
+        policy = self._policies.pop(key, None)
+        if bucket:
+            asyncio.ensure_future(self._dispatch(bucket, policy))
+
+    async def _dispatch(self, bucket: List[Tuple[Any, asyncio.Future]], policy: InferencePolicy) -> None:
+        metrics.MICRO_BATCH_SIZE.observe(len(bucket), operation=self.name)
+        try:
+            result = await get_executor().run(self.batch_fn, [item for item, _ in bucket], policy)
+        except BaseException as exc:
+            # p. ej. ExecutorSaturated: todos los requests del lote responden 503
+            for _, future in bucket:
+                if not future.done():
+                    future.set_exception(exc)
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            return
+        for (_, future), resultado in zip(bucket, result["resultados"]):
+            if future.done():  # el cliente se desconectó
+                continue
+            if "error" in resultado:
+                future.set_exception(RuntimeError(resultado["error"]))
+            else:
+                future.set_result(resultado)
@@ -0,0 +1,139 @@
+"""
+Almacén persistente de perfiles de participantes sobre SQLite.
+
+Por participante guarda el último perfil calculado junto con la huella de sus entradas (CV,
+talleres y política de inferencia) y la versión del modelo que lo produjo. /analyze/profile
+lo devuelve sin pasar por el modelo mientras entradas y modelo no cambien, y
+GET /profile/{participanteId} lo sirve directo desde la base, con ETag.
+Cada recálculo es una versión nueva; se retienen las últimas PROFILE_HISTORY_SIZE.
+"""
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    participante_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    inputs_hash TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    etag TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS profile_snapshots (
+    participante_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    inputs_hash TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (participante_id, version)
+);
+"""
+
+
+def _etag(participante_id: str, version: int, result: str) -> str:
+    digest = hashlib.sha256(f"{participante_id}\x00{version}\x00{result}".encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _record(row: sqlite3.Row) -> Dict[str, Any]:
+    record = dict(row)
+    record["result"] = json.loads(record["result"])
+    return record
+
+
+class ProfileStore:
+    """Último perfil de cada participante y sus versiones anteriores (path ":memory:" para pruebas)."""
+
+    def __init__(self, path: str, history_size: int = 10):
+        self.path = path
+        self.history_size = max(1, history_size)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, participante_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM profiles WHERE participante_id = ?", (participante_id,)).fetchone()
+        return _record(row) if row is not None else None
+
+    def lookup(self, participante_id: str, inputs_hash: str, model_version: str) -> Optional[Dict[str, Any]]:
+        """Perfil guardado si se calculó con las mismas entradas y el mismo modelo; si no, None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result FROM profiles WHERE participante_id = ? AND inputs_hash = ? AND model_version = ?",
+                (participante_id, inputs_hash, model_version),
+            ).fetchone()
+        return json.loads(row["result"]) if row is not None else None
+
+    def save(self, participante_id: str, inputs_hash: str, model_version: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Guarda el perfil como versión nueva y descarta las que exceden history_size."""
+        payload = json.dumps(result, ensure_ascii=False, sort_keys=True)
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            row = self._db.execute(
+                "SELECT version FROM profiles WHERE participante_id = ?", (participante_id,)
+            ).fetchone()
+            version = (row["version"] if row is not None else 0) + 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO profiles "
+                "(participante_id, version, inputs_hash, model_version, result, etag, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (participante_id, version, inputs_hash, model_version, payload,
+                 _etag(participante_id, version, payload), now),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO profile_snapshots "
+                "(participante_id, version, inputs_hash, model_version, result, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (participante_id, version, inputs_hash, model_version, payload, now),
+            )
+            self._db.execute(
+                "DELETE FROM profile_snapshots WHERE participante_id = ? AND version <= ?",
+                (participante_id, version - self.history_size),
+            )
+        return self.get(participante_id)
+
+    def history(self, participante_id: str) -> List[Dict[str, Any]]:
+        """Versiones retenidas del perfil, de la más reciente a la más antigua."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM profile_snapshots WHERE participante_id = ? ORDER BY version DESC", (participante_id,)
+            ).fetchall()
+        return [_record(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_store: Optional[ProfileStore] = None
+_store_lock = threading.Lock()
+
+
+def get_profile_store() -> Optional[ProfileStore]:
+    """Almacén global creado a demanda con PROFILE_DB_PATH; None si está deshabilitado (path vacío)."""
+    global _store
+    if _store is None and settings.PROFILE_DB_PATH:
+        with _store_lock:
+            if _store is None:
+                _store = ProfileStore(settings.PROFILE_DB_PATH, settings.PROFILE_HISTORY_SIZE)
+    return _store
+
+
+def set_profile_store(store: Optional[ProfileStore]) -> None:
+    global _store
+    with _store_lock:
+        _store = store
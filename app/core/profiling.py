@@ -0,0 +1,243 @@
+"""
+Perfilado opcional por request con cProfile.
+
+Se activa para un request con el header `X-Profile: 1` (o `?profile=1`) y un token de servicio
+válido, o al azar con PROFILE_SAMPLE_RATE. El trabajo de CPU corre en el pool de inferencia,
+así que es el executor el que envuelve la función en el profiler (en el hilo o proceso que la
+ejecuta) y deja las estadísticas en el request activo. Sin perfilado el costo es leer una
+ContextVar por llamada al executor.
+
+Los perfiles se guardan en memoria (los últimos PROFILE_KEEP) y se consultan por id en
+/admin/profiles/{id} (resumen) o /admin/profiles/{id}/pstats (archivo para pstats/snakeviz).
+"""
+from __future__ import annotations
+import cProfile
+import marshal
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import Headers, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.security import is_service_authorization
+
+# Funciones que se destacan en el resumen y en el header Server-Timing: limpieza de PII y modelo
+# (predict_proba_batch = TF-IDF + clasificador; transform/predict_proba según el motor;
+# cv_features / predict_proba_incremental en el re-perfilado incremental)
+PROFILE_TARGETS = ("_clean_personal_info", "predict_proba_batch", "transform", "predict_proba", "predict_proba_tfidf",
+                   "cv_features", "predict_proba_incremental")
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# cProfile: {(archivo, línea, función): (llamadas primitivas, llamadas, tottime, cumtime, callers)}
+RawStats = Dict[Tuple[str, int, str], Tuple[Any, ...]]
+
+
+class ProfiledRequest:
+    """Perfil en curso de un request: acumula las estadísticas de cada trabajo del executor."""
+
+    def __init__(self, request_id: str, path: str, reason: str):
+        self.request_id = request_id
+        self.path = path
+        self.reason = reason
+        self.started = time.perf_counter()
+        self._stats: List[RawStats] = []
+
+    def add(self, stats: RawStats) -> None:
+        if stats:
+            self._stats.append(stats)
+
+    def merged(self) -> Optional[pstats.Stats]:
+        if not self._stats:
+            return None
+        merged = pstats.Stats(_Snapshot(self._stats[0]))
+        for stats in self._stats[1:]:
+            merged.add(_Snapshot(stats))
+        return merged
+
+
+class _Snapshot:
+    # pstats.Stats acepta cualquier objeto con create_stats() y .stats
+    def __init__(self, stats: RawStats):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+_current: ContextVar[Optional[ProfiledRequest]] = ContextVar("fte_profiled_request", default=None)
+
+
+def current_profile() -> Optional[ProfiledRequest]:
+    return _current.get()
+
+
+@contextmanager
+def profiling(path: str, reason: str, request_id: Optional[str] = None) -> Iterator[ProfiledRequest]:
+    """Marca el contexto actual (el request) como perfilado mientras dura el bloque."""
+    profile = ProfiledRequest(request_id or uuid.uuid4().hex, path, reason)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+def run_profiled(fn: Callable[..., Any], *args: Any) -> Tuple[Any, RawStats]:
+    """Ejecuta fn(*args) bajo cProfile en el hilo/proceso actual; devuelve (resultado, estadísticas)."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # otro profiler activo (p. ej. sys.monitoring en 3.12+): se ejecuta sin perfilar
+        return fn(*args), {}
+    try:
+        result = fn(*args)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+def _label(key: Tuple[str, int, str]) -> str:
+    filename, line, name = key
+    if filename == "~":
+        return name  # funciones built-in: "<built-in method ...>"
+    if filename.startswith(_ROOT):
+        filename = os.path.relpath(filename, _ROOT)
+    else:
+        filename = os.path.basename(filename)
+    return f"{filename}:{line}({name})"
+
+
+def summarize(stats: pstats.Stats, top_n: int) -> Dict[str, Any]:
+    """Desglose compacto: las top_n funciones por tiempo acumulado y el total de las funciones objetivo."""
+    rows = []
+    targets: Dict[str, float] = {}
+    for key, (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append((cumtime, tottime, ncalls, key))
+        name = key[2]
+        if name in PROFILE_TARGETS and key[0] != "~":
+            # funciones recursivas o anidadas (predict_proba llama a transform): el mayor cumtime
+            targets[name] = max(targets.get(name, 0.0), cumtime)
+    rows.sort(key=lambda row: row[0], reverse=True)
+    return {
+        "total_calls": stats.total_calls,
+        "total_ms": round(stats.total_tt * 1000, 3),
+        "targets_ms": {name: round(t * 1000, 3) for name, t in sorted(targets.items())},
+        "functions": [
+            {"function": _label(key), "ncalls": ncalls, "tottime_ms": round(tottime * 1000, 3), "cumtime_ms": round(cumtime * 1000, 3)}
+            for cumtime, tottime, ncalls, key in rows[:top_n]
+        ],
+    }
+
+
+def server_timing(summary: Dict[str, Any], wall_seconds: float) -> str:
+    """Header Server-Timing con las funciones objetivo y el tiempo total del request."""
+    parts = [f"{name};dur={ms}" for name, ms in summary["targets_ms"].items()]
+    parts.append(f"total;dur={round(wall_seconds * 1000, 3)}")
+    return ", ".join(parts)
+
+
+class ProfileStore:
+    """Últimos perfiles por id (resumen + estadísticas serializadas en el formato de pstats)."""
+
+    def __init__(self, keep: int):
+        self.keep = keep
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, profile: ProfiledRequest, stats: pstats.Stats, summary: Dict[str, Any]) -> None:
+        if self.keep <= 0:
+            return
+        entry = {
+            "request_id": profile.request_id,
+            "path": profile.path,
+            "reason": profile.reason,
+            "created_at": time.time(),
+            "summary": summary,
+            "pstats": marshal.dumps(stats.stats),
+        }
+        with self._lock:
+            self._items[profile.request_id] = entry
+            while len(self._items) > self.keep:
+                self._items.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._items.get(request_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._items.values())
+        return [
+            {k: e[k] for k in ("request_id", "path", "reason", "created_at")} | {"total_ms": e["summary"]["total_ms"]}
+            for e in reversed(entries)
+        ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+profile_store = ProfileStore(settings.PROFILE_KEEP)
+
+
+# ids de request aceptados del cliente (X-Request-ID) para nombrar el perfil
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI (sin BaseHTTPMiddleware, para no sumar costo a los requests no perfilados):
+    decide si el request se perfila y, al enviar la respuesta, guarda el perfil y agrega
+    los headers X-Profile-Id y Server-Timing.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _reason(self, scope: Scope) -> Optional[str]:
+        headers = Headers(scope=scope)
+        flag = headers.get("x-profile")
+        if flag is None and scope.get("query_string"):
+            flag = QueryParams(scope["query_string"]).get("profile")
+        if flag in ("1", "true") and is_service_authorization(headers.get("authorization")):
+            return "requested"
+        if settings.PROFILE_SAMPLE_RATE > 0 and random.random() < settings.PROFILE_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        reason = self._reason(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("x-request-id", "")
+        with profiling(scope["path"], reason, request_id if _REQUEST_ID_RE.match(request_id) else None) as profile:
+            async def send_with_profile(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    # el handler ya terminó: el trabajo del executor está completo
+                    stats = profile.merged()
+                    if stats is not None:
+                        summary = summarize(stats, settings.PROFILE_TOP_N)
+                        profile_store.put(profile, stats, summary)
+                        timing = server_timing(summary, time.perf_counter() - profile.started)
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (b"x-profile-id", profile.request_id.encode("latin-1")),
+                            (b"server-timing", timing.encode("latin-1")),
+                        ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_profile)
@@ -5,11 +5,20 @@ from app.core.config import settings
 
 http_bearer = HTTPBearer(auto_error=False)
 
-def verify_service_bearer(credentials: HTTPAuthorizationCredentials = Security(http_bearer)):
-    if not credentials or not credentials.scheme.lower() == "bearer":
-        raise HTTPException(status_code=401, detail="Missing Bearer token")
-    token = credentials.credentials
+def is_valid_service_token(token: str) -> bool:
     try:
         jwt.decode(token, settings.SERVICE_JWT_SECRET, algorithms=["HS256"])
     except Exception:
+        return False
+    return True
+
+def is_service_authorization(header: str | None) -> bool:
+    """Valida un header Authorization "Bearer <jwt>" fuera de las dependencias de FastAPI."""
+    scheme, _, token = (header or "").partition(" ")
+    return scheme.lower() == "bearer" and is_valid_service_token(token.strip())
+
+def verify_service_bearer(credentials: HTTPAuthorizationCredentials = Security(http_bearer)):
+    if not credentials or not credentials.scheme.lower() == "bearer":
+        raise HTTPException(status_code=401, detail="Missing Bearer token")
+    if not is_valid_service_token(credentials.credentials):
         raise HTTPException(status_code=401, detail="Invalid service token")
@@ -0,0 +1,48 @@
+"""
+Coalescencia de requests idénticos en curso (single-flight).
+
+Si llega un análisis igual a otro que todavía se está calculando (doble envío del front,
+reintentos en paralelo, ráfaga tras un despliegue), no se vuelve a ejecutar: espera el mismo
+cálculo y recibe una copia de su resultado. A diferencia de la cache de resultados, no guarda
+nada: la entrada se descarta apenas termina el cálculo, así que sirve también sin cache.
+"""
+from __future__ import annotations
+import asyncio
+import copy
+from typing import Any, Awaitable, Callable, Dict
+
+from app.core import metrics
+from app.core.config import settings
+
+
+class SingleFlight:
+    """Un cálculo por clave a la vez; los requests concurrentes con la misma clave lo comparten."""
+
+    def __init__(self, name: str):
+        # nombre de la operación en fte_coalesced_requests_total{operation=name}
+        self.name = name
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await factory()
+        flight = self._flights.get(key)
+        if flight is not None:
+            metrics.COALESCED_REQUESTS.inc(operation=self.name)
+        else:
+            flight = self._flights[key] = asyncio.ensure_future(factory())
+            flight.add_done_callback(lambda done: self._forget(key, done))
+        # shield: si un cliente se desconecta no se cancela el cálculo de los demás.
+        # Cada uno recibe su copia (las rutas pueden completar el meta del resultado)
+        return copy.deepcopy(await asyncio.shield(flight))
+
+    def _forget(self, key: str, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+
+profile_flights = SingleFlight("profile")
+job_flights = SingleFlight("job")
@@ -0,0 +1,61 @@
+"""
+Respuestas NDJSON para los endpoints por lote (`Accept: application/x-ndjson`).
+
+El lote se procesa en micro-lotes de STREAM_BATCH_SIZE ítems y cada resultado se escribe,
+una línea JSON con su `index`, apenas termina su micro-lote: el primer byte sale tras el
+primer micro-lote y en memoria hay a lo sumo dos (el que se envía y el siguiente, que ya
+se calcula en el pool mientras tanto).
+"""
+from __future__ import annotations
+import asyncio
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.core.executor import ExecutorSaturated, get_executor
+
+NDJSON = "application/x-ndjson"
+
+# función por lote (ítems, política) -> {"resultados": [...], "meta": {...}}
+BatchFn = Callable[[List[Any], Any], Dict[str, Any]]
+
+
+def wants_ndjson(accept: Optional[str]) -> bool:
+    return bool(accept) and NDJSON in accept
+
+
+async def run_waiting(fn: BatchFn, items: List[Any], policy: Any) -> Dict[str, Any]:
+    """Ejecuta en el pool; si está saturado espera y reintenta (la respuesta ya empezó: no hay 503)."""
+    while True:
+        try:
+            return await get_executor().run(fn, items, policy)
+        except ExecutorSaturated as exc:
+            await asyncio.sleep(exc.retry_after)
+
+
+async def stream_batches(fn: BatchFn, items: List[Any], policy: Any, batch_size: int) -> StreamingResponse:
+    """
+    StreamingResponse NDJSON de fn aplicada por micro-lotes. El primer micro-lote se calcula
+    antes de responder, así un pool saturado sigue respondiendo 503 con Retry-After.
+    """
+    batches = [items[i: i + batch_size] for i in range(0, len(items), batch_size)]
+    first = await get_executor().run(fn, batches[0], policy)
+
+    async def lines() -> AsyncIterator[str]:
+        result, index, upcoming = first, 0, None
+        try:
+            for k in range(len(batches)):
+                if k + 1 < len(batches):
+                    upcoming = asyncio.ensure_future(run_waiting(fn, batches[k + 1], policy))
+                for item in result["resultados"]:
+                    yield json.dumps({"index": index, **item}, ensure_ascii=False) + "\n"
+                    index += 1
+                if upcoming is not None:
+                    result, upcoming = await upcoming, None
+        finally:
+            # el cliente cortó la conexión: no seguir calculando el micro-lote siguiente
+            if upcoming is not None:
+                upcoming.cancel()
+
+    return StreamingResponse(lines(), media_type=NDJSON)
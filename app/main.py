@@ -1,15 +1,120 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from app.core import metrics
+from app.core.config import settings
+from app.core.executor import ExecutorSaturated, get_executor, shutdown_document_executor, shutdown_executor
+from app.core.job_queue import get_job_queue
+from app.core.limits import BodySizeLimitMiddleware, text_too_long_errors
+from app.core.profiling import ProfilingMiddleware
+from app.ml.model_loader import (
+    mark_failed,
+    mark_ready,
+    mark_starting,
+    start_model_watcher,
+    stop_model_watcher,
+    warm_up_model,
+)
+from app.routes.admin_routes import router as admin_router
 from app.routes.health_routes import router as health_router
 from app.routes.analyze_routes import router as analyze_router
+from app.routes.bulk_routes import router as bulk_router
 from app.routes.job_routes import router as job_router
+from app.routes.metrics_routes import router as metrics_router
+from app.routes.profile_routes import router as profile_router
+
+
+async def _warm_up() -> None:
+    """Carga y calienta el modelo en el pool de inferencia; /health/ready responde 503 hasta terminar."""
+    executor = get_executor()
+    # en modo procesos cada worker carga su propia copia: se calientan todos
+    copies = executor.workers if executor.kind == "process" else 1
+    try:
+        results = await asyncio.gather(*(executor.run(warm_up_model) for _ in range(copies)))
+    except Exception as exc:
+        mark_failed(f"{type(exc).__name__}: {exc}")
+        return
+    mark_ready(results[0])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    mark_starting()
+    get_executor()
+    warmup = asyncio.create_task(_warm_up())
+    start_model_watcher(settings.MODEL_WATCH_INTERVAL_SECONDS)
+    # trabajos masivos: retoma los que quedaron interrumpidos en la base SQLite
+    get_job_queue().start()
+    yield
+    warmup.cancel()
+    await get_job_queue().stop()
+    stop_model_watcher()
+    shutdown_executor()
+    shutdown_document_executor()
+
 
 app = FastAPI(
     title="FTE-AI",
     description="Microservicio de análisis de competencias y perfilado de participantes para la FTE.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+
+app.add_middleware(BodySizeLimitMiddleware)
+app.add_middleware(ProfilingMiddleware)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Cuenta y mide cada request; la ruta se etiqueta por su plantilla (/profile/{id}), no por la URL."""
+    metrics.HTTP_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.HTTP_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        # las URLs sin ruta (404) se agrupan para no crear una serie por cada path
+        path = route.path if route is not None else "unmatched"
+        metrics.HTTP_REQUESTS.inc(method=request.method, route=path, status=str(status))
+        metrics.HTTP_LATENCY.observe(elapsed, method=request.method, route=path)
+
+
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servicio saturado, reintente más tarde"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError):
+    # un texto por encima de MAX_TEXT_CHARS es un problema de tamaño (413), no de formato (422)
+    too_long = text_too_long_errors(exc.errors())
+    if too_long:
+        return JSONResponse(
+            status_code=413,
+            content={"detail": [{k: e[k] for k in ("loc", "msg", "ctx") if k in e} for e in too_long]},
+        )
+    return await request_validation_exception_handler(request, exc)
+
+
 # Registrar rutas
 app.include_router(health_router)
 app.include_router(analyze_router)
 app.include_router(job_router)
+app.include_router(bulk_router)
+app.include_router(profile_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
@@ -0,0 +1,404 @@
+"""
+Formato compacto del modelo para inferencia: arrays numpy crudos en lugar del Pipeline pickleado.
+
+Un artefacto compacto es un directorio con:
+  meta.json      clases, metadata del entrenamiento y configuración del analizador TF-IDF
+  vocab.npy      vocabulario ordenado (array unicode); la posición de cada término es su columna
+                 (al cargar se arma un dict término -> columna para contar en O(1) por término)
+  idf.npy        (n_terminos,) pesos idf
+  coef.npy       (n_terminos, n_clases) coeficientes de los clasificadores one-vs-rest, apilados
+  intercept.npy  (n_clases,)
+
+Los arrays se abren con np.load(mmap_mode="r"): cargar el modelo no deserializa objetos de
+sklearn y las páginas las comparte el sistema operativo entre todos los procesos que lo abren.
+CompactModel reproduce TfidfVectorizer + OneVsRestClassifier(LogisticRegression) y expone
+predict_proba/decision_function, así que sirve donde se usa el pipeline: todas las clases se
+calculan con un solo producto disperso (TF-IDF × coeficientes apilados) y una sigmoide
+vectorizada, sin recorrer los estimadores uno a uno ni las validaciones de sklearn.
+CompactModel.from_pipeline arma el mismo motor en memoria a partir del pipeline entrenado.
+
+Uso (convertir un artefacto joblib existente):
+    python app/ml/compact_model.py models/pipeline_competencias.joblib
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from scipy.special import expit
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos, la exportación sigue siendo atómica
+    fcntl = None
+
+FORMAT_VERSION = 1
+_ARRAYS = ("vocab", "idf", "coef", "intercept")
+
+
+def compact_path_for(model_path: str) -> str:
+    """Ruta del artefacto compacto que acompaña a un artefacto joblib."""
+    return os.path.splitext(model_path)[0] + ".compact"
+
+
+def is_compact_artifact(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, "meta.json"))
+
+
+def _strip_accents_unicode(s: str) -> str:
+    try:
+        s.encode("ASCII", errors="strict")
+        return s
+    except UnicodeEncodeError:
+        normalized = unicodedata.normalize("NFKD", s)
+        return "".join([c for c in normalized if not unicodedata.combining(c)])
+
+
+def _strip_accents_ascii(s: str) -> str:
+    return unicodedata.normalize("NFKD", s).encode("ASCII", "ignore").decode("ASCII")
+
+
+_ACCENT_FUNCTIONS = {None: None, "unicode": _strip_accents_unicode, "ascii": _strip_accents_ascii}
+
+
+class CompactModel:
+    """
+    TF-IDF + regresiones logísticas one-vs-rest evaluadas con numpy/scipy.
+    Los términos se buscan con searchsorted sobre el vocabulario ordenado, que en un artefacto
+    compacto está mapeado en memoria y compartido entre workers. `index` (término -> columna)
+    acelera la búsqueda, pero es una copia privada del vocabulario: solo la usan los modelos
+    armados en memoria desde el pipeline (from_pipeline), que ya tienen su propia copia.
+    """
+
+    def __init__(self, vocab: np.ndarray, idf: np.ndarray, coef: np.ndarray, intercept: np.ndarray,
+                 analyzer: Dict[str, Any], classes: List[str], metadata: Dict[str, Any],
+                 index: Optional[Dict[str, int]] = None):
+        self.vocab = vocab
+        self.idf = idf
+        self.coef = coef
+        self.intercept = intercept
+        self.analyzer = analyzer
+        self.classes = list(classes)
+        self.metadata = dict(metadata)
+        self._index = index
+
+        self._lowercase = analyzer["lowercase"]
+        self._strip_accents = _ACCENT_FUNCTIONS[analyzer["strip_accents"]]
+        self._token_re = re.compile(analyzer["token_pattern"])
+        self._stop_words = frozenset(analyzer["stop_words"]) if analyzer["stop_words"] is not None else None
+        self._min_n, self._max_n = analyzer["ngram_range"]
+        self._sublinear_tf = analyzer["sublinear_tf"]
+        self._norm = analyzer["norm"]
+        self._multilabel = analyzer["multilabel"]
+
+    # ---- analizador (mismo orden que sklearn: minúsculas, acentos, tokens, stop words, n-gramas)
+    def analyze(self, text: str) -> List[str]:
+        return self.ngrams(self.tokens(text))
+
+    def tokens(self, text: str) -> List[str]:
+        """Tokens (unigramas) del texto, sin stop words."""
+        if self._lowercase:
+            text = text.lower()
+        if self._strip_accents is not None:
+            text = self._strip_accents(text)
+        tokens = self._token_re.findall(text)
+        if self._stop_words is not None:
+            tokens = [w for w in tokens if w not in self._stop_words]
+        return tokens
+
+    def ngrams(self, tokens: List[str], start: int = 0) -> List[str]:
+        """N-gramas de los tokens; con start > 0 solo los que incluyen algún token desde esa posición."""
+        min_n, max_n = self._min_n, self._max_n
+        if max_n == 1:
+            return tokens[start:] if start else tokens
+        terms: List[str] = []
+        if min_n == 1:
+            terms = tokens[start:] if start else list(tokens)
+            min_n += 1
+        n_original = len(tokens)
+        for n in range(min_n, min(max_n + 1, n_original + 1)):
+            for i in range(max(0, start - n + 1), n_original - n + 1):
+                terms.append(" ".join(tokens[i: i + n]))
+        return terms
+
+    @property
+    def max_ngram(self) -> int:
+        return self._max_n
+
+    def term_counts(self, terms: List[str]) -> Dict[int, int]:
+        """Columna -> ocurrencias de los términos que están en el vocabulario."""
+        index = self._index
+        if index is None:
+            return self._sorted_term_counts(terms)
+        counts: Dict[int, int] = {}
+        for term in terms:
+            col = index.get(term)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+        return counts
+
+    def _sorted_term_counts(self, terms: List[str]) -> Dict[int, int]:
+        vocab = self.vocab
+        n_vocab = vocab.shape[0]
+        if not terms or not n_vocab:
+            return {}
+        wanted = np.asarray(terms)
+        pos = np.searchsorted(vocab, wanted)
+        pos[pos == n_vocab] = 0
+        cols, counts = np.unique(pos[vocab[pos] == wanted], return_counts=True)
+        return dict(zip(cols.tolist(), counts.tolist()))
+
+    def tf_weights(self, counts: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Columnas y pesos TF-IDF (sin normalizar) de un conteo de términos, en el orden del conteo."""
+        nnz = len(counts)
+        cols = np.fromiter(counts.keys(), dtype=np.int64, count=nnz)
+        tf = np.fromiter(counts.values(), dtype=np.float64, count=nnz)
+        if self._sublinear_tf:
+            np.log(tf, out=tf)
+            tf += 1.0
+        tf *= self.idf[cols]
+        return cols, tf
+
+    @property
+    def l2_norm(self) -> bool:
+        return self._norm == "l2"
+
+    def transform(self, texts: List[str]) -> sp.csr_matrix:
+        """Matriz TF-IDF (n_textos, n_terminos), equivalente a TfidfVectorizer.transform."""
+        indptr = [0]
+        indices: List[np.ndarray] = []
+        values: List[np.ndarray] = []
+        for text in texts:
+            counts = self.term_counts(self.analyze(text))
+            nnz = len(counts)
+            if nnz:
+                cols, tf = self.tf_weights(counts)
+                if self._norm == "l2":
+                    norm = np.sqrt(np.dot(tf, tf))
+                    if norm > 0:
+                        tf /= norm
+                indices.append(cols)
+                values.append(tf)
+            indptr.append(indptr[-1] + nnz)
+        return sp.csr_matrix(
+            (
+                np.concatenate(values) if values else np.empty(0, dtype=np.float64),
+                np.concatenate(indices) if indices else np.empty(0, dtype=np.int64),
+                np.asarray(indptr, dtype=np.int64),
+            ),
+            shape=(len(texts), self.vocab.shape[0]),
+        )
+
+    @classmethod
+    def from_pipeline(cls, pipeline, classes, metadata: Dict[str, Any]) -> "CompactModel":
+        """Motor numpy en memoria con el vocabulario, idf y coeficientes del pipeline ya entrenado."""
+        extracted = _extract(pipeline)
+        vocab = extracted["vocab"]
+        return cls(
+            vocab, extracted["idf"], extracted["coef"], extracted["intercept"],
+            extracted["analyzer"], classes, metadata,
+            index={term: i for i, term in enumerate(vocab.tolist())},
+        )
+
+    def decision_function(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.transform(texts) @ self.coef) + self.intercept
+
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        return self.predict_proba_tfidf(self.transform(texts))
+
+    def predict_proba_tfidf(self, X: sp.csr_matrix) -> np.ndarray:
+        """Probabilidades a partir de una matriz ya devuelta por transform()."""
+        return self.proba_from_decision(np.asarray(X @ self.coef) + self.intercept)
+
+    def proba_from_decision(self, decision: np.ndarray) -> np.ndarray:
+        """Probabilidades a partir de la función de decisión (n_textos, n_clases)."""
+        proba = expit(decision)
+        if not self._multilabel and proba.shape[1] > 1:
+            proba /= proba.sum(axis=1)[:, np.newaxis]
+        return proba
+
+
+def _extract(pipeline) -> Dict[str, Any]:
+    """Arrays y configuración del analizador de un Pipeline TfidfVectorizer + OneVsRest(LogisticRegression)."""
+    steps = getattr(pipeline, "steps", None)
+    if not steps or len(steps) != 2:
+        raise ValueError("se espera un Pipeline de dos pasos: TfidfVectorizer + OneVsRestClassifier")
+    vectorizer, classifier = steps[0][1], steps[1][1]
+    if vectorizer.analyzer != "word" or vectorizer.preprocessor is not None or vectorizer.tokenizer is not None:
+        raise ValueError("solo se admite el analizador 'word' de sklearn sin preprocesador/tokenizador propio")
+    if vectorizer.binary or vectorizer.norm not in ("l2", None) or vectorizer.strip_accents not in _ACCENT_FUNCTIONS:
+        raise ValueError("configuración de TfidfVectorizer no soportada por el formato compacto")
+    terms = sorted(vectorizer.vocabulary_, key=vectorizer.vocabulary_.get)
+    coef_rows, intercept = [], []
+    for est in classifier.estimators_:
+        if hasattr(est, "coef_") and est.coef_.shape[0] == 1:
+            coef_rows.append(est.coef_)
+            intercept.append(float(est.intercept_[0]))
+        elif hasattr(est, "y_"):
+            # clase constante en el entrenamiento (_ConstantPredictor de OneVsRest):
+            # coeficientes nulos e intercepto ±inf dan exactamente p = 1 o p = 0
+            coef_rows.append(np.zeros((1, len(terms))))
+            intercept.append(np.inf if float(np.ravel(est.y_)[0]) > 0 else -np.inf)
+        else:
+            raise ValueError(f"estimador no soportado por el formato compacto: {type(est).__name__}")
+
+    order = np.argsort(np.asarray(terms))
+    idf = vectorizer.idf_ if vectorizer.use_idf else np.ones(len(terms))
+    coef = np.vstack(coef_rows)
+    stop_words = vectorizer.get_stop_words()
+    return {
+        "vocab": np.asarray(terms)[order],
+        "idf": np.ascontiguousarray(idf[order], dtype=np.float64),
+        "coef": np.ascontiguousarray(coef[:, order].T, dtype=np.float64),
+        "intercept": np.array(intercept, dtype=np.float64),
+        "analyzer": {
+            "lowercase": bool(vectorizer.lowercase),
+            "strip_accents": vectorizer.strip_accents,
+            "token_pattern": vectorizer.token_pattern,
+            "stop_words": sorted(stop_words) if stop_words is not None else None,
+            "ngram_range": list(vectorizer.ngram_range),
+            "sublinear_tf": bool(vectorizer.sublinear_tf),
+            "norm": vectorizer.norm,
+            "multilabel": bool(getattr(classifier, "multilabel_", True)),
+        },
+    }
+
+
+def _json_default(obj):
+    if hasattr(obj, "item"):
+        return obj.item()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def artifact_parts(artifact: Any) -> Tuple[Any, List[str], Dict[str, Any]]:
+    """
+    (pipeline, clases, metadata) de un artefacto de joblib: el dict de train.py (con "classes"
+    o un MultiLabelBinarizer en "mlb") o un pipeline suelto, sin clases ni metadata.
+    """
+    if not isinstance(artifact, dict):
+        return artifact, [], {}
+    pipeline = artifact.get("pipeline") or artifact
+    classes = artifact.get("classes")
+    if classes is None and "mlb" in artifact:
+        classes = getattr(artifact["mlb"], "classes_", None)
+    return pipeline, list(classes if classes is not None else []), dict(artifact.get("metadata", {}))
+
+
+def export_compact(pipeline, classes, metadata: Dict[str, Any], out_dir: str) -> str:
+    """
+    Escribe el artefacto compacto de `pipeline` en out_dir. Se arma en un directorio temporal
+    y se mueve al final, para que nadie lea un artefacto a medio escribir.
+    """
+    extracted = _extract(pipeline)
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for name in _ARRAYS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), extracted[name], allow_pickle=False)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "classes": [str(c) for c in classes],
+        "metadata": metadata,
+        "analyzer": extracted["analyzer"],
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as fh:
+        json.dump(meta, fh, ensure_ascii=False, indent=2, default=_json_default)
+
+    old_dir = f"{out_dir}.old-{os.getpid()}"
+    if os.path.exists(out_dir):
+        os.replace(out_dir, old_dir)
+    os.replace(tmp_dir, out_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    return out_dir
+
+
+def load_compact(path: str, mmap: bool = True) -> CompactModel:
+    """Abre un artefacto compacto; con mmap=True los arrays quedan mapeados en modo solo lectura."""
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as fh:
+        meta = json.load(fh)
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"versión de formato compacto no soportada: {meta.get('format_version')!r}")
+    mmap_mode = "r" if mmap else None
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+        for name in _ARRAYS
+    }
+    return CompactModel(
+        arrays["vocab"], arrays["idf"], arrays["coef"], arrays["intercept"],
+        meta["analyzer"], meta["classes"], meta.get("metadata", {}),
+    )
+
+
+def compact_version(path: str) -> str:
+    """Huella del contenido del artefacto compacto (todos sus archivos)."""
+    digest = hashlib.sha256()
+    for name in ["meta.json"] + [f"{n}.npy" for n in _ARRAYS]:
+        with open(os.path.join(path, name), "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    with open(path, "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+def ensure_shared_compact(model_path: str, shared_dir: str, version: str) -> str:
+    """
+    Devuelve el artefacto compacto de `model_path` dentro de shared_dir (p. ej. /dev/shm/fte-ai),
+    exportándolo si todavía no existe. El primer proceso que llega lo exporta bajo un lock de
+    archivo; el resto espera y reutiliza el mismo directorio, de modo que todos los workers del
+    nodo mapean las mismas páginas. Al exportar una versión nueva se borran las anteriores
+    (los procesos que aún las tienen mapeadas no se ven afectados).
+    Lanza ValueError si el artefacto no se puede exportar (sin clases o con otro pipeline).
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    target = os.path.join(shared_dir, f"{stem}-{version}.compact")
+    if is_compact_artifact(target):
+        return target
+    with _file_lock(os.path.join(shared_dir, f".{stem}.lock")):
+        if not is_compact_artifact(target):
+            import joblib
+            pipeline, classes, metadata = artifact_parts(joblib.load(model_path))
+            if not classes:
+                raise ValueError("el artefacto no define clases")
+            try:
+                export_compact(pipeline, classes, metadata, target)
+            except AttributeError as exc:
+                raise ValueError(f"el pipeline no admite el formato compacto: {exc}") from exc
+            for name in os.listdir(shared_dir):
+                stale = os.path.join(shared_dir, name)
+                if name.startswith(f"{stem}-") and stale != target:
+                    shutil.rmtree(stale, ignore_errors=True)
+    return target
+
+
+def main(model_path: str, out_dir: Optional[str] = None) -> None:
+    import joblib
+    pipeline, classes, metadata = artifact_parts(joblib.load(model_path))
+    out_dir = out_dir or compact_path_for(model_path)
+    export_compact(pipeline, classes, metadata, out_dir)
+    print(f"[compact] artefacto compacto guardado en: {out_dir}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:3])
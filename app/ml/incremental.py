@@ -0,0 +1,67 @@
+"""
+Re-perfilado incremental de un participante con el modelo compacto (TF-IDF + regresiones logísticas).
+
+El documento de un perfil es el CV limpio seguido de un token `topic:<tema>` por taller. Del CV
+se guardan el conteo de términos, sus pesos TF-IDF sin normalizar, la norma al cuadrado y el
+producto con los coeficientes de todas las clases. Al cambiar los talleres solo se recalculan
+los términos que aportan los temas (incluidos los n-gramas que cruzan del CV a los temas) y,
+como el clasificador es lineal, la decisión se corrige con una actualización dispersa:
+
+    decisión = (s_cv + Σ_j (w_j - u_j) · coef_j) / ‖v‖ + intercepto
+    ‖v‖²     = ‖v_cv‖² + Σ_j (w_j² - u_j²)
+
+con u_j y w_j el peso del término j sin y con los temas. El resultado es el mismo que el de
+transformar el documento completo, sin volver a limpiar ni tokenizar el CV.
+"""
+from __future__ import annotations
+from typing import Dict, List
+
+import numpy as np
+
+from app.ml.compact_model import CompactModel
+
+
+class CvFeatures:
+    """CV ya limpio y vectorizado de un participante."""
+
+    __slots__ = ("text_hash", "text", "tail", "counts", "weights", "sq_norm", "scores")
+
+    def __init__(self, text_hash: str, text: str, tail: List[str], counts: Dict[int, int],
+                 weights: Dict[int, float], sq_norm: float, scores: np.ndarray):
+        self.text_hash = text_hash  # hash del CV recibido (antes de limpiar)
+        self.text = text  # CV limpio, tal como entra al documento del modelo
+        self.tail = tail  # últimos tokens del CV: forman n-gramas con los primeros temas
+        self.counts = counts
+        self.weights = weights
+        self.sq_norm = sq_norm
+        self.scores = scores
+
+
+def cv_features(model: CompactModel, text_hash: str, text: str) -> CvFeatures:
+    tokens = model.tokens(text)
+    counts = model.term_counts(model.ngrams(tokens))
+    cols, values = model.tf_weights(counts)
+    tail = tokens[len(tokens) - (model.max_ngram - 1):] if model.max_ngram > 1 and tokens else []
+    return CvFeatures(
+        text_hash, text, tail, counts,
+        dict(zip(cols.tolist(), values.tolist())),
+        float(np.dot(values, values)),
+        values @ np.asarray(model.coef[cols]),
+    )
+
+
+def predict_proba_incremental(model: CompactModel, features: CvFeatures, topic_text: str) -> np.ndarray:
+    """Probabilidades (1, n_clases) del documento CV + `topic_text` a partir del CV ya vectorizado."""
+    tail = features.tail
+    delta = model.term_counts(model.ngrams(tail + model.tokens(topic_text), start=len(tail)))
+    decision = features.scores.copy()
+    sq_norm = features.sq_norm
+    if delta:
+        merged = {col: features.counts.get(col, 0) + count for col, count in delta.items()}
+        cols, new = model.tf_weights(merged)
+        old = np.fromiter((features.weights.get(col, 0.0) for col in merged), dtype=np.float64, count=len(merged))
+        decision += (new - old) @ np.asarray(model.coef[cols])
+        sq_norm += float(np.dot(new, new) - np.dot(old, old))
+    if model.l2_norm and sq_norm > 0:
+        decision /= np.sqrt(sq_norm)
+    return model.proba_from_decision(decision[np.newaxis, :] + model.intercept)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import List
+import numpy as np
+from sklearn.pipeline import Pipeline
+from app.core.metrics import stage
+from app.ml.compact_model import CompactModel
+
+
+def _classifier_proba(estimator, X) -> np.ndarray:
+    try:
+        return np.asarray(estimator.predict_proba(X))
+    except AttributeError:
+        # si el estimador no tiene predict_proba (algunos modelos), usamos decision_function -> sigmoide soft
+        logits = np.asarray(estimator.decision_function(X))
+        return 1 / (1 + np.exp(-logits))
+
+
+def predict_proba_batch(pipeline, texts: List[str]) -> np.ndarray:
+    """
+    Probabilidades por clase para varios textos en una sola pasada del modelo.
+    Devuelve una matriz (n_textos, n_clases); la fila i corresponde a texts[i].
+    TF-IDF y clasificador se miden por separado (etapas "tfidf" y "classifier").
+    """
+    if isinstance(pipeline, CompactModel):
+        with stage("tfidf"):
+            X = pipeline.transform(texts)
+        with stage("classifier"):
+            return pipeline.predict_proba_tfidf(X)
+    if isinstance(pipeline, Pipeline) and len(pipeline.steps) > 1:
+        with stage("tfidf"):
+            X = pipeline[:-1].transform(texts)
+        with stage("classifier"):
+            return _classifier_proba(pipeline[-1], X)
+    with stage("classifier"):
+        return _classifier_proba(pipeline, texts)
+
+
+def clip_text(text: str, limit: int) -> str:
+    """Recorta el texto a `limit` caracteres sin partir la última palabra (0 = sin recorte)."""
+    if limit <= 0 or len(text) <= limit:
+        return text
+    cut = text.rfind(" ", limit // 2, limit + 1)
+    return text[: cut if cut > 0 else limit]
+
+
+def split_windows(text: str, window_chars: int, max_windows: int) -> List[str]:
+    """
+    Parte el texto en a lo sumo max_windows ventanas de hasta window_chars caracteres, cortando
+    en un espacio de la segunda mitad de cada ventana para no partir palabras. Siempre devuelve
+    al menos una ventana; un texto corto (o window_chars = 0) es su única ventana.
+    """
+    if window_chars <= 0 or len(text) <= window_chars:
+        return [text]
+    windows: List[str] = []
+    start = 0
+    while start < len(text) and len(windows) < max_windows:
+        end = start + window_chars
+        if end < len(text):
+            cut = text.rfind(" ", start + window_chars // 2, end + 1)
+            if cut > start:
+                end = cut
+        window = text[start:end].strip()
+        if window:
+            windows.append(window)
+        start = end
+    return windows or [""]
+
+
+def document_key(windows: List[str], aggregate: str):
+    """Parte de la clave de cache de un documento: su texto o, si tiene varias ventanas, ventanas y agregación."""
+    return windows[0] if len(windows) == 1 else (tuple(windows), aggregate)
+
+
+def predict_proba_windows(pipeline, documents: List[List[str]], aggregate: str = "max") -> np.ndarray:
+    """
+    Probabilidades por documento cuando cada documento es una lista de ventanas: todas las
+    ventanas pasan por el modelo juntas y sus filas se agregan por clase (max o mean), así el
+    costo crece en forma lineal con las ventanas y no con el tamaño del texto original.
+    """
+    if all(len(windows) == 1 for windows in documents):
+        return predict_proba_batch(pipeline, [windows[0] for windows in documents])
+    counts = np.array([len(windows) for windows in documents])
+    matrix = np.asarray(predict_proba_batch(pipeline, [w for windows in documents for w in windows]))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    if aggregate == "mean":
+        return np.add.reduceat(matrix, starts, axis=0) / counts[:, None]
+    return np.maximum.reduceat(matrix, starts, axis=0)
@@ -1,17 +1,331 @@
 import os
+import hashlib
+import logging
+import threading
+import time
 import joblib
-from functools import lru_cache
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+from app.core import metrics
+from app.core.config import settings
+from app.ml.compact_model import (
+    CompactModel,
+    artifact_parts,
+    compact_version,
+    ensure_shared_compact,
+    is_compact_artifact,
+    load_compact,
+)
+from app.ml.inference import predict_proba_batch
 
 DEFAULT_MODEL_PATH = os.getenv("MODEL_PATH", "models/pipeline_competencias.joblib")
 
-@lru_cache(maxsize=1)
-def load_model(model_path: str = DEFAULT_MODEL_PATH):
-    artifact = joblib.load(model_path)
-    pipeline = artifact.get("pipeline") or artifact
-    classes = artifact.get("classes")
-    if classes is None and "mlb" in artifact:
-        classes = getattr(artifact["mlb"], "classes_", None)
-    if classes is None:
-        classes = []
-    metadata = artifact.get("metadata", {})
+logger = logging.getLogger(__name__)
+
+Model = Tuple[Any, List[str], Dict[str, Any]]
+
+
+class ModelValidationError(ValueError):
+    """El artefacto candidato no superó la validación y no reemplaza al modelo en uso."""
+
+
+def _artifact_version(model_path: str) -> str:
+    """Huella del contenido del artefacto: cambia si se reemplaza el modelo en disco."""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def _load_artifact(model_path: str) -> Model:
+    if is_compact_artifact(model_path):
+        # formato compacto (directorio de arrays numpy mapeados en memoria)
+        model = load_compact(model_path)
+        metadata = dict(model.metadata)
+        metadata["artifact_version"] = compact_version(model_path)
+        return model, list(model.classes), metadata
+    if settings.MODEL_SHARED_DIR:
+        # pesos exportados una vez por nodo y mapeados por todos los workers
+        try:
+            shared_path = ensure_shared_compact(model_path, settings.MODEL_SHARED_DIR, _artifact_version(model_path))
+        except ValueError:
+            logger.warning("el artefacto %s no admite el formato compacto; se carga sin compartir", model_path)
+        else:
+            return _load_artifact(shared_path)
+    pipeline, classes, metadata = artifact_parts(joblib.load(model_path))
+    metadata["artifact_version"] = _artifact_version(model_path)
+    if settings.INFERENCE_ENGINE == "numpy":
+        try:
+            pipeline = CompactModel.from_pipeline(pipeline, list(classes), metadata)
+        except (ValueError, AttributeError):
+            logger.warning("el pipeline de %s no admite el motor numpy; se usa sklearn", model_path)
     return pipeline, list(classes), metadata
+
+
+def _load_recorded(model_path: str) -> Model:
+    """_load_artifact registrando la duración y el resultado en las métricas."""
+    start = time.perf_counter()
+    try:
+        model = _load_artifact(model_path)
+    except Exception:
+        metrics.MODEL_LOADS.inc(result="error")
+        raise
+    metrics.MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+    metrics.MODEL_LOADS.inc(result="ok")
+    return model
+
+
+# Modelo en uso como una única tupla (ruta, modelo): leerla o reemplazarla es una sola
+# operación atómica, así que cada request trabaja de principio a fin con el modelo que tomó.
+_current: Optional[Tuple[str, Model]] = None
+_load_lock = threading.Lock()
+_reload_lock = threading.Lock()
+
+
+def load_model(model_path: Optional[str] = None) -> Model:
+    """
+    Devuelve (pipeline, clases, metadata) del modelo en uso; la primera llamada lo carga.
+    Sin ruta se usa el modelo vigente (el de MODEL_PATH o el último recargado con reload_model).
+    """
+    global _current
+    current = _current
+    if current is not None and (model_path is None or current[0] == model_path):
+        return current[1]
+    path = model_path or DEFAULT_MODEL_PATH
+    with _load_lock:
+        current = _current
+        if current is None or (model_path is not None and current[0] != model_path):
+            current = (path, _load_recorded(path))
+            _current = current
+        return current[1]
+
+
+def _clear_model() -> None:
+    global _current
+    with _load_lock:
+        _current = None
+
+
+# compatibilidad con el antiguo lru_cache: las pruebas descartan el modelo con cache_clear()
+load_model.cache_clear = _clear_model
+
+
+def current_model_path() -> str:
+    current = _current
+    return current[0] if current is not None else DEFAULT_MODEL_PATH
+
+
+# Textos de humo con los que se valida un artefacto antes de ponerlo en uso
+SMOKE_TEXTS = [
+    "analista de datos con experiencia en sql, excel y power bi topic:excel topic:sql",
+    "desarrollador python con docker, kubernetes y despliegue continuo topic:python",
+    "supervisor hse, seguridad industrial y gestión de calidad iso 9001",
+    "",
+]
+
+
+def validate_model(pipeline, classes: List[str], metadata: Dict[str, Any]) -> None:
+    """Predice sobre SMOKE_TEXTS y exige probabilidades finitas en [0, 1] con una columna por clase."""
+    if not classes:
+        raise ModelValidationError("el artefacto no define clases")
+    try:
+        proba = predict_proba_batch(pipeline, SMOKE_TEXTS)
+    except Exception as exc:
+        raise ModelValidationError(f"el modelo falla al predecir: {type(exc).__name__}: {exc}") from exc
+    if proba.shape != (len(SMOKE_TEXTS), len(classes)):
+        raise ModelValidationError(
+            f"forma de salida {proba.shape}, se esperaba {(len(SMOKE_TEXTS), len(classes))}"
+        )
+    if not np.all(np.isfinite(proba)) or proba.min() < 0.0 or proba.max() > 1.0:
+        raise ModelValidationError("probabilidades fuera de [0, 1] o no finitas")
+
+
+def reload_model(model_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Carga y valida un artefacto nuevo sin detener el servicio; si es válido reemplaza al
+    modelo en uso. Los requests en curso terminan con el modelo anterior y los siguientes
+    toman el nuevo. Si la carga o la validación fallan, el modelo en uso no cambia.
+    """
+    global _current
+    with _reload_lock:
+        path = model_path or current_model_path()
+        previous = _current
+        start = time.perf_counter()
+        candidate = _load_recorded(path)
+        loaded = time.perf_counter()
+        # la validación también deja calientes sklearn/numpy para el primer request
+        try:
+            validate_model(*candidate)
+        except ModelValidationError:
+            metrics.MODEL_LOADS.inc(result="rejected")
+            raise
+        validated = time.perf_counter()
+        with _load_lock:
+            _current = (path, candidate)
+
+    pipeline, classes, metadata = candidate
+    info = {
+        "load_seconds": round(loaded - start, 4),
+        "warmup_seconds": round(validated - loaded, 4),
+        "previous_version": model_version(previous[1][0], previous[1][2]) if previous else None,
+        "artifact": _artifact_info(path, pipeline, classes, metadata),
+    }
+    mark_reloaded(info)
+    logger.info("modelo recargado: %s -> %s", info["previous_version"], info["artifact"]["version"])
+    return info
+
+
+class ModelWatcher(threading.Thread):
+    """Recarga el modelo cuando cambia el archivo en disco (mtime/tamaño), revisando cada `interval` s."""
+
+    def __init__(self, interval: float):
+        super().__init__(name="model-watcher", daemon=True)
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        last = _file_signature(current_model_path())
+        while not self._stop_event.wait(self.interval):
+            path = current_model_path()
+            signature = _file_signature(path)
+            if signature is None or signature == last:
+                continue
+            # se registra aunque falle: un archivo a medio escribir se reintenta al volver a cambiar
+            last = signature
+            try:
+                reload_model(path)
+            except Exception:
+                logger.exception("no se pudo recargar el modelo desde %s; se mantiene el actual", path)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+_watcher: Optional[ModelWatcher] = None
+
+
+def start_model_watcher(interval: float) -> Optional[ModelWatcher]:
+    """Arranca el watcher del proceso (uno solo); con interval <= 0 queda deshabilitado."""
+    global _watcher
+    if interval <= 0:
+        return None
+    if _watcher is None or not _watcher.is_alive():
+        _watcher = ModelWatcher(interval)
+        _watcher.start()
+    return _watcher
+
+
+def stop_model_watcher() -> None:
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher.join(timeout=5)
+        _watcher = None
+
+
+def model_version(pipeline, metadata) -> str:
+    """Versión del modelo en uso; si el artefacto no la trae, identifica al objeto cargado."""
+    return str(metadata.get("artifact_version") or f"obj-{id(pipeline)}")
+
+
+# ====== Warm-up / readiness ======
+_status: Dict[str, Any] = {"status": "starting"}
+# versión informada por el último resultado calculado en el pool (ver note_model_version) y
+# versiones reemplazadas por una recarga, que un resultado atrasado ya no puede volver a fijar
+_reported_version: Optional[str] = None
+_retired_versions: set = set()
+
+
+def warm_up_model() -> Dict[str, Any]:
+    """
+    Carga el modelo y ejecuta una predicción de prueba para que el primer request real
+    no pague la deserialización ni la inicialización de sklearn/numpy.
+    Devuelve tiempos y metadatos del artefacto (serializable, apto para procesos hijos).
+    """
+    start = time.perf_counter()
+    pipeline, classes, metadata = load_model()
+    loaded = time.perf_counter()
+    predict_proba_batch(pipeline, ["warm up: python sql excel topic:excel"])
+    warmed = time.perf_counter()
+    return {
+        "load_seconds": round(loaded - start, 4),
+        "warmup_seconds": round(warmed - loaded, 4),
+        "artifact": _artifact_info(current_model_path(), pipeline, classes, metadata),
+    }
+
+
+def _artifact_info(path: str, pipeline, classes: List[str], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "path": path,
+        "version": model_version(pipeline, metadata),
+        "classes": len(classes),
+        "best_threshold": metadata.get("best_threshold"),
+        "best_params": metadata.get("best_params"),
+    }
+
+
+def mark_ready(info: Dict[str, Any]) -> None:
+    global _status, _reported_version
+    _status = {"status": "ready", **info}
+    _reported_version = None
+    if info.get("previous_version"):
+        _retired_versions.add(info["previous_version"])
+    _retired_versions.discard((info.get("artifact") or {}).get("version"))
+
+
+def mark_reloaded(info: Dict[str, Any]) -> None:
+    """Actualiza la readiness tras una recarga (también la informada por un worker del pool)."""
+    if _status.get("status") == "ready":
+        mark_ready(info)
+
+
+def mark_failed(error: str) -> None:
+    global _status
+    _status = {"status": "failed", "error": error}
+
+
+def mark_starting() -> None:
+    global _status
+    _status = {"status": "starting"}
+
+
+def readiness() -> Dict[str, Any]:
+    return dict(_status)
+
+
+def note_model_version(version: str) -> None:
+    """
+    Registra la versión con la que el pool calculó un resultado. En modo procesos cada worker
+    recarga el modelo por su cuenta (watcher propio) y este proceso se entera por acá.
+    """
+    global _reported_version
+    if version not in _retired_versions:
+        _reported_version = version
+
+
+def serving_model_version() -> Optional[str]:
+    """
+    Versión del modelo que atiende los requests: la del último resultado calculado en el pool,
+    la informada por el warm-up o la última recarga (en modo procesos el modelo vive en los
+    workers) o, si no hubo warm-up, la del modelo ya cargado en este proceso. None si todavía
+    no hay modelo.
+    """
+    if _reported_version is not None:
+        return _reported_version
+    artifact = _status.get("artifact")
+    if artifact and artifact.get("version"):
+        return str(artifact["version"])
+    current = _current
+    if current is None:
+        return None
+    pipeline, _, metadata = current[1]
+    return model_version(pipeline, metadata)
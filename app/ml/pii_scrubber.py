@@ -0,0 +1,124 @@
+"""
+Limpieza de información personal (teléfonos, correos, nombres, direcciones) compartida
+entre el servicio de análisis y el entrenamiento.
+
+Los patrones se compilan una sola vez al importar el módulo. El resultado es idéntico al de
+aplicar `re.sub(patron, ' ', texto, flags=re.IGNORECASE)` con cada patrón de PII_PATTERNS en
+orden, pero sin recorrer el CV veinte veces con el motor de expresiones regulares:
+
+- Casi todos los patrones empiezan por una etiqueta literal (celular, correo, nombre, ...).
+  Sobre el texto en minúsculas se ubican las etiquetas con búsquedas de subcadenas y el patrón
+  solo se evalúa en esas posiciones. Como los reemplazos únicamente insertan espacios, una
+  etiqueta ausente en el texto original no puede aparecer en los pasos intermedios.
+- `\\s+` -> ' ' seguido de strip() equivale a `' '.join(texto.split())`: `\\s` y str.isspace()
+  reconocen exactamente los mismos caracteres.
+- En un CV sin etiquetas ni '@' quedan dos pasadas: teléfonos y espacios.
+
+La única diferencia entre IGNORECASE y str.lower() para las letras de las etiquetas son
+'İ' (U+0130) y 'ı' (U+0131); si aparecen, se aplica la secuencia completa de patrones.
+"""
+from __future__ import annotations
+import re
+from typing import List, Tuple
+
+# (patrón, etiquetas) en el orden original de aplicación. Las etiquetas son los literales
+# (en minúsculas) por los que puede empezar una coincidencia; None = sin etiqueta.
+_PATTERN_LABELS: List[Tuple[str, Tuple[str, ...] | None]] = [
+    # Teléfonos y celulares (números con 7-15 dígitos)
+    (r'\b\d{7,15}\b', None),
+    (r'\bcelular\s*:?\s*\d+', ("celular",)),
+    (r'\btel[ée]fono\s*:?\s*\d+', ("telefono", "teléfono")),
+    (r'\bm[óo]vil\s*:?\s*\d+', ("movil", "móvil")),
+    # Correos electrónicos
+    (r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', None),
+    (r'\bcorreo\s*electr[óo]nico\s*:?\s*[^\s]+', ("correo",)),
+    (r'\bemail\s*:?\s*[^\s]+', ("email",)),
+    # Nombres y apellidos (patrones comunes)
+    (r'\bnombre\s*y\s*apellidos?\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)*', ("nombre",)),
+    (r'\bnombre\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)+', ("nombre",)),
+    # Lugares y direcciones
+    (r'\blugar\s*de\s*nacimiento\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s]+', ("lugar",)),
+    (r'\bnacionalidad\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s]+', ("nacionalidad",)),
+    (r'\bdomicilio\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s\d,.-]+', ("domicilio",)),
+    (r'\bdirecci[óo]n\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s\d,.-]+', ("direccion", "dirección")),
+    # Etiquetas de datos personales (sin el valor)
+    (r'\bcelular\s*:?\s*', ("celular",)),
+    (r'\bcorreo\s*electr[óo]nico\s*:?\s*', ("correo",)),
+    (r'\bnombre\s*y\s*apellidos?\s*:?\s*', ("nombre",)),
+    (r'\blugar\s*de\s*nacimiento\s*:?\s*', ("lugar",)),
+    (r'\bnacionalidad\s*:?\s*', ("nacionalidad",)),
+    (r'\bdomicilio\s*:?\s*', ("domicilio",)),
+    # Múltiples espacios
+    (r'\s+', None),
+]
+
+# Patrones en orden de aplicación (referencia del comportamiento esperado)
+PII_PATTERNS: List[str] = [pattern for pattern, _ in _PATTERN_LABELS]
+
+_COMPILED: List[Tuple[re.Pattern, Tuple[str, ...] | None]] = [
+    (re.compile(pattern, re.IGNORECASE), labels) for pattern, labels in _PATTERN_LABELS
+]
+_PHONE_RE = _COMPILED[0][0]
+_ALL_LABELS = tuple(sorted({label for _, labels in _COMPILED if labels for label in labels}))
+
+# Caracteres en los que IGNORECASE y str.lower() difieren para las letras de las etiquetas
+_CASE_EXCEPTIONS = ("İ", "ı")
+
+
+def _sub_at_labels(regex: re.Pattern, labels: Tuple[str, ...], text: str) -> str:
+    """Equivale a regex.sub(' ', text) evaluando el patrón solo donde empieza una etiqueta."""
+    lowered = text.lower()
+    starts = set()
+    for label in labels:
+        pos = lowered.find(label)
+        while pos != -1:
+            starts.add(pos)
+            pos = lowered.find(label, pos + 1)
+    if not starts:
+        return text
+
+    parts: List[str] = []
+    last = 0
+    for pos in sorted(starts):
+        if pos < last:
+            continue
+        m = regex.match(text, pos)
+        if m:
+            parts.append(text[last:pos])
+            parts.append(' ')
+            last = m.end()
+    if not parts:
+        return text
+    parts.append(text[last:])
+    return ''.join(parts)
+
+
+def _scrub_sequential(text: str) -> str:
+    cleaned = text
+    for regex, _ in _COMPILED[:-1]:
+        cleaned = regex.sub(' ', cleaned)
+    return ' '.join(cleaned.split())
+
+
+def scrub_personal_info(text: str) -> str:
+    """
+    Elimina información personal del texto del CV para mejorar la clasificación.
+    Remueve: teléfonos, correos, nombres propios, direcciones, lugares específicos, etc.
+    """
+    if not text:
+        return ""
+    if any(ch in text for ch in _CASE_EXCEPTIONS):
+        return _scrub_sequential(text)
+
+    lowered = text.lower()
+    present = {label for label in _ALL_LABELS if label in lowered}
+
+    cleaned = _PHONE_RE.sub(' ', text)
+    for regex, labels in _COMPILED[1:-1]:
+        if labels is None:
+            # correo electrónico: sin etiqueta, solo puede coincidir si hay '@'
+            if "@" in cleaned:
+                cleaned = regex.sub(' ', cleaned)
+        elif present.intersection(labels):
+            cleaned = _sub_at_labels(regex, labels, cleaned)
+    return ' '.join(cleaned.split())
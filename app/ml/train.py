@@ -12,7 +12,13 @@ from sklearn.pipeline import Pipeline
 from sklearn.metrics import classification_report, f1_score, fbeta_score, make_scorer
 import joblib
 import numpy as np
-import re
+
+try:
+    from app.ml.compact_model import compact_path_for, export_compact
+    from app.ml.pii_scrubber import scrub_personal_info
+except ModuleNotFoundError:  # ejecutado como script: `python app/ml/train.py`
+    from compact_model import compact_path_for, export_compact
+    from pii_scrubber import scrub_personal_info
 
 # --- configuración por defecto ---
 DATA_PATH = os.getenv("DATA_PATH", "data/dataset_competencias.csv")
@@ -67,49 +73,7 @@ def clean_personal_info(text: str) -> str:
     Elimina información personal del texto del CV para mejorar la clasificación.
     Remueve: teléfonos, correos, nombres propios, direcciones, lugares específicos, etc.
     """
-    if not text:
-        return ""
-    
-    # Patrones a eliminar o reemplazar
-    patterns = [
-        # Teléfonos y celulares (números con 7-15 dígitos, posibles espacios/guiones)
-        (r'\b\d{7,15}\b', ' '),
-        (r'\bcelular\s*:?\s*\d+', ' '),
-        (r'\btel[ée]fono\s*:?\s*\d+', ' '),
-        (r'\bm[óo]vil\s*:?\s*\d+', ' '),
-        
-        # Correos electrónicos
-        (r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', ' '),
-        (r'\bcorreo\s*electr[óo]nico\s*:?\s*[^\s]+', ' '),
-        (r'\bemail\s*:?\s*[^\s]+', ' '),
-        
-        # Nombres y apellidos (patrones comunes)
-        (r'\bnombre\s*y\s*apellidos?\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)*', ' '),
-        (r'\bnombre\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)+', ' '),
-        
-        # Lugares y direcciones
-        (r'\blugar\s*de\s*nacimiento\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s]+', ' '),
-        (r'\bnacionalidad\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s]+', ' '),
-        (r'\bdomicilio\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s\d,.-]+', ' '),
-        (r'\bdirecci[óo]n\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s\d,.-]+', ' '),
-        
-        # Etiquetas de datos personales (sin el valor)
-        (r'\bcelular\s*:?\s*', ' '),
-        (r'\bcorreo\s*electr[óo]nico\s*:?\s*', ' '),
-        (r'\bnombre\s*y\s*apellidos?\s*:?\s*', ' '),
-        (r'\blugar\s*de\s*nacimiento\s*:?\s*', ' '),
-        (r'\bnacionalidad\s*:?\s*', ' '),
-        (r'\bdomicilio\s*:?\s*', ' '),
-        
-        # Múltiples espacios
-        (r'\s+', ' '),
-    ]
-    
-    cleaned = text
-    for pattern, replacement in patterns:
-        cleaned = re.sub(pattern, replacement, cleaned, flags=re.IGNORECASE)
-    
-    return cleaned.strip()
+    return scrub_personal_info(text)
 
 def load_dataset(path: str) -> pd.DataFrame:
     df = pd.read_csv(path)
@@ -259,8 +223,13 @@ def main(data_path: str, model_path: str, test_size: float = 0.2, random_state:
             "label_cardinality": label_cardinality,
         },
     }
-    joblib.dump(artifact, model_path)
+    # escritura atómica: el servicio (recarga en caliente) nunca ve un archivo a medio escribir
+    tmp_path = f"{model_path}.tmp"
+    joblib.dump(artifact, tmp_path)
+    os.replace(tmp_path, model_path)
     print(f"[train] modelo guardado en: {model_path}")
+    compact_path = export_compact(pipeline, target_names, artifact["metadata"], compact_path_for(model_path))
+    print(f"[train] artefacto compacto guardado en: {compact_path}")
     print("[train] listo OK")
 
 if __name__ == "__main__":
@@ -0,0 +1,115 @@
+import asyncio
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from pydantic import BaseModel, Field, ValidationError
+from app.core.config import InferencePolicy, get_inference_policy, reload_inference_policy, set_inference_policy
+from app.core.executor import get_executor
+from app.core.profiling import profile_store
+from app.core.security import verify_service_bearer
+from app.ml.model_loader import DEFAULT_MODEL_PATH, ModelValidationError, mark_reloaded, reload_model
+
+router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(verify_service_bearer)])
+
+# Solo se cargan artefactos del directorio de modelos (joblib ejecuta código al deserializar)
+MODELS_DIR = os.path.dirname(os.path.abspath(DEFAULT_MODEL_PATH))
+
+
+class ReloadRequest(BaseModel):
+    path: Optional[str] = Field(None, description="Artefacto a cargar; por defecto el modelo en uso")
+
+
+def _resolve_model_path(path: Optional[str]) -> Optional[str]:
+    if path is None:
+        return None
+    resolved = os.path.realpath(path)
+    if os.path.dirname(resolved) != os.path.realpath(MODELS_DIR):
+        raise HTTPException(status_code=400, detail="El artefacto debe estar en el directorio de modelos")
+    if not os.path.isfile(resolved):
+        raise HTTPException(status_code=404, detail="Artefacto no encontrado")
+    return resolved
+
+
+@router.post("/model/reload")
+async def reload_model_endpoint(req: Optional[ReloadRequest] = None):
+    """
+    Recarga el modelo en caliente: carga y valida el artefacto en segundo plano y lo pone en uso
+    solo si es válido. En modo procesos lo valida un worker y luego se reemplazan todos los
+    workers por procesos nuevos que cargan ese artefacto (el pool no garantiza a qué worker va
+    cada trabajo, así que no alcanza con enviar la recarga una vez por worker). Los procesos
+    nuevos se arrancan y calientan antes de recibir requests: la respuesta llega recién entonces.
+    """
+    path = _resolve_model_path(req.path if req else None)
+    executor = get_executor()
+    try:
+        if executor.kind == "process":
+            info = await executor.run(reload_model, path)
+            await asyncio.to_thread(executor.recycle, info["artifact"]["path"])
+            # la readiness (y la versión en uso) del proceso principal sigue a la de los workers
+            mark_reloaded(info)
+        else:
+            info = await asyncio.to_thread(reload_model, path)
+    except ModelValidationError as exc:
+        raise HTTPException(status_code=422, detail=f"Modelo rechazado: {exc}")
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Artefacto no encontrado")
+    return {"status": "reloaded", **info}
+
+
+class PolicyUpdate(BaseModel):
+    threshold: Optional[float] = Field(None, description="null = volver al umbral del modelo")
+    min_results: Optional[int] = None
+    min_prob_floor: Optional[float] = None
+
+
+@router.get("/policy")
+def get_policy():
+    return {"policy": get_inference_policy().model_dump()}
+
+
+@router.put("/policy")
+def update_policy(req: PolicyUpdate):
+    """Reemplaza en caliente los campos enviados; los requests siguientes usan la política nueva."""
+    try:
+        policy = InferencePolicy(**{**get_inference_policy().model_dump(), **req.model_dump(exclude_unset=True)})
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False))
+    return {"policy": set_inference_policy(policy).model_dump()}
+
+
+@router.post("/policy/reload")
+def reload_policy():
+    """Vuelve a leer la política del entorno / .env."""
+    try:
+        policy = reload_inference_policy()
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False))
+    return {"policy": policy.model_dump()}
+
+
+@router.get("/profiles")
+def list_profiles():
+    return {"profiles": profile_store.list()}
+
+
+def _get_profile(request_id: str):
+    entry = profile_store.get(request_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado (o ya descartado)")
+    return entry
+
+
+@router.get("/profiles/{request_id}")
+def get_profile(request_id: str):
+    entry = _get_profile(request_id)
+    return {k: v for k, v in entry.items() if k != "pstats"}
+
+
+@router.get("/profiles/{request_id}/pstats")
+def download_profile(request_id: str):
+    """Estadísticas en el formato de cProfile: `pstats.Stats(archivo)` o snakeviz."""
+    return Response(
+        content=_get_profile(request_id)["pstats"],
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{request_id}.prof"'},
+    )
@@ -1,6 +1,25 @@
-from fastapi import APIRouter
-from pydantic import BaseModel, Field
-from app.services.analysis_service import analyze_participant_profile
+import asyncio
+from fastapi import APIRouter, File, Form, Header, HTTPException, UploadFile
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from app.core.cache import content_key
+from app.core.config import InferencePolicy, get_inference_policy, settings
+from app.core.executor import get_document_executor, get_executor
+from app.core.limits import BoundedText
+from app.core.metrics import record_cache_lookup
+from app.core.micro_batch import MicroBatcher
+from app.core.profile_store import get_profile_store
+from app.core.single_flight import profile_flights
+from app.core.streaming import NDJSON, stream_batches, wants_ndjson
+from app.ml.model_loader import note_model_version, serving_model_version
+from app.services.analysis_service import analyze_participant_profile, analyze_participant_profiles_batch
+from app.services.document_service import (
+    DocumentError,
+    UnsupportedDocument,
+    detect_format,
+    document_cache,
+    document_hash,
+    extract_text,
+)
 
 router = APIRouter(prefix="/analyze", tags=["Analysis"])
 
@@ -11,8 +30,107 @@ class TallerLite(BaseModel):
 class AnalyzeInput(BaseModel):
     participanteId: str
     talleres: list[TallerLite] | None = None
-    cvTexto: str | None = None
+    cvTexto: BoundedText | None = None
+
+class AnalyzeBatchInput(BaseModel):
+    participantes: list[AnalyzeInput] = Field(..., min_length=1, description="Participantes a perfilar en una sola pasada del modelo")
+
+_TALLERES = TypeAdapter(list[TallerLite])
+
+# con el pool ocupado, los perfiles individuales se evalúan agrupados
+_profile_batcher = MicroBatcher("profile", analyze_participant_profiles_batch)
+
+def _profile_key(payload: AnalyzeInput, policy: InferencePolicy) -> str:
+    # entrada normalizada: los espacios de los extremos no cambian el análisis
+    talleres = [(t.tema.strip().lower(), t.asistencia_pct) for t in payload.talleres or []]
+    return content_key(payload.participanteId, (payload.cvTexto or "").strip(), talleres, policy.model_dump_json())
+
+async def _analyze_profile(payload: AnalyzeInput) -> dict:
+    """
+    Perfil guardado si entradas, política y modelo no cambiaron; si no, análisis en el pool:
+    requests idénticos concurrentes comparten un solo cálculo y, con el pool ocupado, se
+    agrupa con otros perfiles en una sola pasada del modelo. El resultado se guarda.
+    """
+    policy = get_inference_policy()
+    key = _profile_key(payload, policy)
+    store = get_profile_store()
+    version = serving_model_version()
+    if store is not None and version is not None:
+        stored = await asyncio.to_thread(store.lookup, payload.participanteId, key, version)
+        record_cache_lookup("profile_store", stored is not None)
+        if stored is not None:
+            return stored
+
+    def immediate():
+        return get_executor().run(analyze_participant_profile, payload, policy)
+
+    async def compute():
+        result = await _profile_batcher.submit(payload, policy, immediate)
+        # versión del modelo que calculó el perfil (en modo procesos, la del worker, que puede
+        # haber recargado antes que este proceso)
+        computed_with = result.get("meta", {}).get("modelVersion")
+        if computed_with is not None:
+            if get_executor().kind == "process":
+                note_model_version(computed_with)
+            if store is not None:
+                await asyncio.to_thread(store.save, payload.participanteId, key, computed_with, result)
+        return result
+
+    return await profile_flights.run(key, compute)
 
 @router.post("/profile")
-def analyze_profile(payload: AnalyzeInput):
-    return analyze_participant_profile(payload)
+async def analyze_profile(payload: AnalyzeInput):
+    return await _analyze_profile(payload)
+
+@router.post("/profile/batch",
+             responses={200: {"content": {NDJSON: {}}, "description": f"Con `Accept: {NDJSON}`, un resultado por línea"}})
+async def analyze_profile_batch(payload: AnalyzeBatchInput, accept: str | None = Header(None)):
+    policy = get_inference_policy()
+    if wants_ndjson(accept):
+        # un resultado por línea a medida que termina cada micro-lote
+        return await stream_batches(analyze_participant_profiles_batch, payload.participantes, policy, settings.STREAM_BATCH_SIZE)
+    return await get_executor().run(analyze_participant_profiles_batch, payload.participantes, policy)
+
+@router.post("/profile/upload")
+async def analyze_profile_upload(
+    participanteId: str = Form(...),
+    file: UploadFile = File(..., description="CV en PDF o DOCX"),
+    talleres: str | None = Form(None, description='JSON, p. ej. [{"tema": "excel", "asistencia_pct": 0.9}]'),
+):
+    """Perfil a partir del CV en PDF/DOCX: el texto se extrae en el pool de documentos y se analiza como cvTexto."""
+    data = await file.read()
+    try:
+        lista_talleres = _TALLERES.validate_json(talleres) if talleres else None
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False, include_context=False))
+    try:
+        fmt = detect_format(data, file.filename, file.content_type)
+    except UnsupportedDocument as exc:
+        raise HTTPException(status_code=415, detail=str(exc))
+
+    # volver a subir el mismo archivo no repite la extracción
+    key = document_hash(data)
+    extracted = document_cache.get(key)
+    cached = extracted is not None
+    if not cached:
+        timeout = settings.UPLOAD_EXTRACT_TIMEOUT_SECONDS
+        try:
+            # extract_text revisa el plazo entre páginas; el timeout cubre la extracción completa
+            extracted = await get_document_executor().run(extract_text, data, fmt, timeout=timeout)
+        except DocumentError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=422, detail=f"La extracción del documento superó {timeout:g} s")
+        document_cache.set(key, extracted)
+
+    payload = AnalyzeInput(participanteId=participanteId, talleres=lista_talleres, cvTexto=extracted["text"])
+    result = await _analyze_profile(payload)
+    result["meta"]["documento"] = {
+        "format": extracted["format"],
+        "pages": extracted["pages"],
+        "chars": len(extracted["text"]),
+        "truncated": extracted["truncated"],
+        "sha256": key,
+        "cached": cached,
+    }
+    return result
@@ -0,0 +1,73 @@
+import json
+from typing import Any, Dict
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field, model_validator
+from app.core.config import settings
+from app.core.job_queue import get_job_queue
+from app.core.streaming import NDJSON
+from app.routes.analyze_routes import AnalyzeInput
+from app.routes.job_routes import JobRequest
+from app.services.bulk_service import JOB, PROFILE
+
+router = APIRouter(prefix="/analyze", tags=["Analyze / Bulk"])
+
+class BulkJobRequest(BaseModel):
+    participantes: list[AnalyzeInput] | None = Field(None, description="Participantes a perfilar")
+    puestos: list[JobRequest] | None = Field(None, description="Puestos a analizar")
+
+    @model_validator(mode="after")
+    def one_kind(self):
+        items = [x for x in (self.participantes, self.puestos) if x is not None]
+        if len(items) != 1 or not items[0]:
+            raise ValueError("Enviar una lista no vacía de 'participantes' o de 'puestos' (no ambas)")
+        if len(items[0]) > settings.JOB_MAX_ITEMS:
+            raise ValueError(f"Un trabajo admite a lo sumo {settings.JOB_MAX_ITEMS} ítems")
+        return self
+
+def _job_status(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "jobId": job["id"],
+        "tipo": job["kind"],
+        "estado": job["status"],
+        "total": job["total"],
+        "procesados": job["processed"],
+        "errores": job["errors"],
+        "progreso": round(job["processed"] / job["total"], 4) if job["total"] else 1.0,
+        "error": job["error"],
+        "creado": job["created_at"],
+        "iniciado": job["started_at"],
+        "finalizado": job["finished_at"],
+    }
+
+def _get_job(job_id: str) -> Dict[str, Any]:
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return job
+
+# rutas sincrónicas: FastAPI las ejecuta en su threadpool, así las consultas a SQLite (y el alta de
+# hasta JOB_MAX_ITEMS ítems) no bloquean el event loop
+@router.post("/jobs", status_code=202)
+def create_bulk_job(req: BulkJobRequest):
+    """Encola un análisis masivo; el progreso se consulta en /analyze/jobs/{jobId}."""
+    if req.participantes is not None:
+        kind, items = PROFILE, [p.model_dump() for p in req.participantes]
+    else:
+        kind, items = JOB, [p.model_dump() for p in req.puestos]
+    job = get_job_queue().submit(kind, items)
+    return JSONResponse(status_code=202, content=_job_status(job), headers={"Location": f"/analyze/jobs/{job['id']}"})
+
+@router.get("/jobs/{job_id}")
+def get_bulk_job(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=0, le=1000)):
+    """Estado y progreso del trabajo, con una página de los resultados ya calculados."""
+    job = _get_job(job_id)
+    return {**_job_status(job), "resultados": get_job_queue().results(job_id, offset, limit)}
+
+@router.get("/jobs/{job_id}/results")
+def stream_bulk_job_results(job_id: str, follow: bool = Query(False, description="Esperar los resultados pendientes")):
+    """Resultados en NDJSON (uno por línea, con su `index`); con follow=true hasta que el trabajo termine."""
+    _get_job(job_id)
+    # generador sincrónico: StreamingResponse lo recorre en el threadpool, fuera del event loop
+    lines = (json.dumps(result, ensure_ascii=False) + "\n" for result in get_job_queue().iter_results(job_id, follow))
+    return StreamingResponse(lines, media_type=NDJSON)
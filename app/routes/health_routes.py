@@ -1,7 +1,19 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.cache import result_cache
+from app.ml.model_loader import readiness
 
 router = APIRouter(prefix="/health", tags=["Health"])
 
 @router.get("")
 def health_check():
     return {"status": "ok", "message": "FTE-AI service is running"}
+
+@router.get("/ready")
+def readiness_check():
+    status = readiness()
+    return JSONResponse(status_code=200 if status["status"] == "ready" else 503, content=status)
+
+@router.get("/cache")
+def cache_stats():
+    return {"result_cache": result_cache.stats()}
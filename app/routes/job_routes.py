@@ -1,18 +1,51 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Header
 from pydantic import BaseModel, Field
-from app.services.job_service import analyze_job_requirements
+from app.core.cache import content_key
+from app.core.config import get_inference_policy, settings
+from app.core.executor import get_executor
+from app.core.limits import BoundedText
+from app.core.micro_batch import MicroBatcher
+from app.core.single_flight import job_flights
+from app.core.streaming import NDJSON, stream_batches, wants_ndjson
+from app.services.job_service import analyze_job_requirements, analyze_job_requirements_batch
 
 router = APIRouter(prefix="/analyze", tags=["Analyze / Job"])
 
 class JobRequest(BaseModel):
-    puestoTexto: str = Field(..., description="Descripción libre del puesto / necesidades")
+    puestoTexto: BoundedText = Field(..., description="Descripción libre del puesto / necesidades")
     topK: int = Field(6, ge=1, le=20, description="Máximo de competencias a retornar")
 
 class JobResponse(BaseModel):
     competencias: list
     meta: dict
 
+class JobBatchRequest(BaseModel):
+    puestos: list[JobRequest] = Field(..., min_length=1, description="Puestos a analizar en una sola pasada del modelo")
+
+class JobBatchResponse(BaseModel):
+    resultados: list
+    meta: dict
+
+# con el pool ocupado, los puestos individuales se evalúan agrupados
+_job_batcher = MicroBatcher("job", analyze_job_requirements_batch)
+
 @router.post("/job", response_model=JobResponse)
-def analyze_job(req: JobRequest):
-    result = analyze_job_requirements(req.puestoTexto, top_k=req.topK)
-    return result
+async def analyze_job(req: JobRequest):
+    policy = get_inference_policy()
+
+    def immediate():
+        return get_executor().run(analyze_job_requirements, req.puestoTexto, req.topK, policy)
+
+    # requests idénticos concurrentes comparten un solo cálculo
+    key = content_key(req.puestoTexto.strip(), req.topK, policy.model_dump_json())
+    return await job_flights.run(key, lambda: _job_batcher.submit((req.puestoTexto, req.topK), policy, immediate))
+
+@router.post("/job/batch", response_model=JobBatchResponse,
+             responses={200: {"content": {NDJSON: {}}, "description": f"Con `Accept: {NDJSON}`, un resultado por línea"}})
+async def analyze_job_batch(req: JobBatchRequest, accept: str | None = Header(None)):
+    puestos = [(p.puestoTexto, p.topK) for p in req.puestos]
+    policy = get_inference_policy()
+    if wants_ndjson(accept):
+        # un resultado por línea a medida que termina cada micro-lote
+        return await stream_batches(analyze_job_requirements_batch, puestos, policy, settings.STREAM_BATCH_SIZE)
+    return await get_executor().run(analyze_job_requirements_batch, puestos, policy)
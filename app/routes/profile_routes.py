@@ -0,0 +1,48 @@
+from typing import Any, Dict
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import JSONResponse, Response
+from app.core.profile_store import ProfileStore, get_profile_store
+
+router = APIRouter(prefix="/profile", tags=["Profiles"])
+
+def _store() -> ProfileStore:
+    store = get_profile_store()
+    if store is None:
+        raise HTTPException(status_code=404, detail="Almacén de perfiles deshabilitado (PROFILE_DB_PATH vacío)")
+    return store
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # comparación débil (RFC 9110): W/"x" equivale a "x"
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+def _snapshot_meta(record: Dict[str, Any], updated: float) -> Dict[str, Any]:
+    # con otro modelo en uso, el próximo /analyze/profile del participante lo recalcula
+    return {"version": record["version"], "modelVersion": record["model_version"], "actualizado": updated}
+
+@router.get("/{participanteId}", responses={304: {"description": "If-None-Match coincide con el ETag"}})
+def get_profile(participanteId: str, if_none_match: str | None = Header(None)):
+    """Último perfil calculado del participante, servido desde el almacén sin pasar por el modelo."""
+    record = _store().get(participanteId)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    headers = {"ETag": record["etag"], "Cache-Control": "no-cache"}
+    if if_none_match and _etag_matches(if_none_match, record["etag"]):
+        return Response(status_code=304, headers=headers)
+    result = record["result"]
+    result.setdefault("meta", {})["snapshot"] = _snapshot_meta(record, record["updated_at"])
+    return JSONResponse(content=result, headers=headers)
+
+@router.get("/{participanteId}/versions")
+def get_profile_versions(participanteId: str):
+    """Versiones retenidas del perfil (PROFILE_HISTORY_SIZE), de la más reciente a la más antigua."""
+    snapshots = _store().history(participanteId)
+    if not snapshots:
+        raise HTTPException(status_code=404, detail="Perfil no encontrado")
+    return {
+        "participanteId": participanteId,
+        "versiones": [
+            {**_snapshot_meta(s, s["created_at"]), "competencias": s["result"].get("competencias", [])}
+            for s in snapshots
+        ],
+    }
@@ -2,8 +2,9 @@ from __future__ import annotations
 from collections import defaultdict
 from math import log
 from typing import Any, Dict, List, Tuple
-import os
-import re
+import numpy as np
+from app.ml.pii_scrubber import scrub_personal_info
+from app.services.keyword_automaton import KeywordAutomaton
 
 # ====== Reglas de fallback alineadas con el dataset ======
 # Nota: estos mapas solo se usan cuando el modelo ML no está disponible.
@@ -81,48 +82,20 @@ def _clean_personal_info(text: str) -> str:
     Elimina información personal del texto del CV para mejorar la clasificación.
     Remueve: teléfonos, correos, nombres propios, direcciones, lugares específicos, etc.
     """
-    if not text:
-        return ""
-    
-    # Patrones a eliminar o reemplazar
-    patterns = [
-        # Teléfonos y celulares
-        (r'\b\d{7,15}\b', ' '),
-        (r'\bcelular\s*:?\s*\d+', ' '),
-        (r'\btel[ée]fono\s*:?\s*\d+', ' '),
-        (r'\bm[óo]vil\s*:?\s*\d+', ' '),
-        # Correos electrónicos
-        (r'\b[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\b', ' '),
-        (r'\bcorreo\s*electr[óo]nico\s*:?\s*[^\s]+', ' '),
-        (r'\bemail\s*:?\s*[^\s]+', ' '),
-        # Nombres y apellidos
-        (r'\bnombre\s*y\s*apellidos?\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)*', ' '),
-        (r'\bnombre\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)+', ' '),
-        # Lugares y direcciones
-        (r'\blugar\s*de\s*nacimiento\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s]+', ' '),
-        (r'\bnacionalidad\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s]+', ' '),
-        (r'\bdomicilio\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s\d,.-]+', ' '),
-        (r'\bdirecci[óo]n\s*:?\s*[A-ZÁÉÍÓÚÑ][a-záéíóúñ\s\d,.-]+', ' '),
-        # Etiquetas de datos personales
-        (r'\bcelular\s*:?\s*', ' '),
-        (r'\bcorreo\s*electr[óo]nico\s*:?\s*', ' '),
-        (r'\bnombre\s*y\s*apellidos?\s*:?\s*', ' '),
-        (r'\blugar\s*de\s*nacimiento\s*:?\s*', ' '),
-        (r'\bnacionalidad\s*:?\s*', ' '),
-        (r'\bdomicilio\s*:?\s*', ' '),
-        # Múltiples espacios
-        (r'\s+', ' '),
-    ]
-    
-    cleaned = text
-    for pattern, replacement in patterns:
-        cleaned = re.sub(pattern, replacement, cleaned, flags=re.IGNORECASE)
-    
-    return cleaned.strip()
+    return scrub_personal_info(text)
 
 def _normalize_text(s: str) -> str:
     return s.strip().lower()
 
+# Sinónimos normalizados una sola vez: un único recorrido del CV cuenta todos los términos
+_SYNONYM_AUTOMATON = KeywordAutomaton(
+    _normalize_text(term) for synonyms in COMPETENCIA_SYNONYMS.values() for term in synonyms
+)
+_COMPETENCIA_TERM_IDS: Dict[str, List[int]] = {
+    comp: [_SYNONYM_AUTOMATON.index[_normalize_text(term)] for term in synonyms]
+    for comp, synonyms in COMPETENCIA_SYNONYMS.items()
+}
+
 def _safe(val: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, val))
 
@@ -143,11 +116,10 @@ def _score_from_cv(cv_text: str) -> Dict[str, float]:
     if not cv_text:
         return {}
     text = _normalize_text(cv_text)
+    term_counts = _SYNONYM_AUTOMATON.count(text)
     counts: Dict[str, float] = {}
-    for comp, synonyms in COMPETENCIA_SYNONYMS.items():
-        freq = 0
-        for term in synonyms:
-            freq += text.count(_normalize_text(term))
+    for comp, term_ids in _COMPETENCIA_TERM_IDS.items():
+        freq = sum(term_counts[i] for i in term_ids)
         if freq > 0:
             counts[comp] = log(1 + freq, 2)
     if not counts:
@@ -179,82 +151,231 @@ def _fuse_scores(scores_talleres: Dict[str, float], scores_cv: Dict[str, float])
     return fused
 
 # ====== ML ======
-from app.ml.model_loader import load_model
+from app.ml.model_loader import load_model, model_version
+from app.core.cache import TTLCache, content_key, result_cache
+from app.core.config import InferencePolicy, get_inference_policy, settings
+from app.core.metrics import stage
+from app.ml.compact_model import CompactModel
+from app.ml.incremental import CvFeatures, cv_features, predict_proba_incremental
+from app.ml.inference import clip_text, document_key, predict_proba_windows, split_windows
+from app.services.ranking import rank_matrix, to_competencias
 
-def _build_text_for_model(cv_text: str | None, talleres: List[Dict[str, Any]] | None) -> str:
+def _prepare_cv(cv_text: str | None) -> str:
     cv = (cv_text or "").strip()
     # Limpiar información personal antes de procesar
-    cv = _clean_personal_info(cv)
-    cv = cv.lower()
-    taller_tokens = ""
-    if talleres:
-        topics = [t.get("tema", "").strip().lower() for t in talleres if t.get("tema")]
-        taller_tokens = " " + " ".join(f"topic:{t}" for t in topics)
-    return (cv + taller_tokens).strip()
+    with stage("pii_scrub"):
+        cv = _clean_personal_info(cv)
+    with stage("build_text"):
+        return cv.lower()
 
-def _predict_with_ml(cv_text: str | None, talleres: List[Dict[str, Any]] | None) -> List[Dict[str, Any]]:
-    pipeline, classes, metadata = load_model()  # levanta de models/pipeline_competencias.joblib
-    text = _build_text_for_model(cv_text, talleres)
-    proba = None
-    try:
-        proba = pipeline.predict_proba([text])[0]  # vector de probabilidades por clase
-    except AttributeError:
-        # si el estimador no tiene predict_proba (algunos modelos), usamos decision_function -> sigmoide soft
-        import numpy as np
-        logits = pipeline.decision_function([text])[0]
-        proba = 1 / (1 + np.exp(-logits))
-    # umbral simple - menos estricto para detectar más competencias
-    threshold = float(os.getenv("ML_THRESHOLD", metadata.get("best_threshold", metadata.get("threshold", "0.20"))))
+def _taller_tokens(talleres: List[Dict[str, Any]] | None) -> str:
+    if not talleres:
+        return ""
+    topics = [t.get("tema", "").strip().lower() for t in talleres if t.get("tema")]
+    return " " + " ".join(f"topic:{t}" for t in topics)
+
+def _build_text_for_model(cv_text: str | None, talleres: List[Dict[str, Any]] | None) -> str:
+    return (_prepare_cv(cv_text) + _taller_tokens(talleres)).strip()
 
-    # resultados por encima del umbral
-    above = [
-        {"competencia": cls, "nivel": round(float(p) * 100.0, 1), "confianza": 0.85, "fuente": ["ml"]}
-        for cls, p in zip(classes, proba)
-        if float(p) >= threshold
-    ]
-    above.sort(key=lambda x: -x["nivel"])
+def _build_document_for_model(cv_text: str | None, talleres: List[Dict[str, Any]] | None) -> List[str]:
+    """
+    Ventanas del documento para el modelo (ver TEXT_WINDOW_CHARS). Un CV corto es una sola
+    ventana igual a _build_text_for_model; uno largo se recorta antes de la limpieza de PII y
+    cada ventana lleva los temas de los talleres.
+    """
+    window, max_windows = settings.TEXT_WINDOW_CHARS, settings.TEXT_MAX_WINDOWS
+    if window <= 0 or len(cv_text or "") <= window:
+        return [_build_text_for_model(cv_text, talleres)]
+    cv = _prepare_cv(clip_text(cv_text, window * max_windows))
+    taller_tokens = _taller_tokens(talleres)
+    return [(w + taller_tokens).strip() for w in split_windows(cv, window, max_windows)]
+
+# CV vectorizado por participanteId (ver app/ml/incremental.py); se comparte sin copiar
+cv_feature_cache = TTLCache(settings.PROFILE_FEATURE_CACHE_SIZE, settings.PROFILE_FEATURE_CACHE_TTL_SECONDS,
+                            copy_values=False, name="profile_features")
 
-    # Fallback: si hay muy pocos por encima del umbral, completar con los mejores siguientes
-    min_results = int(os.getenv("ML_MIN_RESULTS", "5"))
-    min_prob_floor = float(os.getenv("ML_MIN_PROB_FLOOR", "0.15"))
-    if len(above) >= min_results:
-        return above
+def _cv_features(pipeline, metadata: Dict[str, Any], participante_id: str, cv_text: str | None) -> CvFeatures | None:
+    """
+    CV limpio y vectorizado del participante, reutilizado mientras el CV no cambie.
+    None si no aplica: cache deshabilitada, motor sklearn o CV que se evalúa en ventanas.
+    """
+    window = settings.TEXT_WINDOW_CHARS
+    if cv_feature_cache.maxsize <= 0 or not isinstance(pipeline, CompactModel):
+        return None
+    if window > 0 and len(cv_text or "") > window:
+        return None
+    version = model_version(pipeline, metadata)
+    cv_feature_cache.bind_version(version)
+    # la versión va en la clave: un request que empezó con el modelo anterior y guarda sus
+    # términos después de la recarga no se los pasa a los requests del modelo nuevo
+    key = (version, participante_id)
+    text_hash = content_key(cv_text or "")
+    features = cv_feature_cache.get(key)
+    if features is None or features.text_hash != text_hash:
+        cv = _prepare_cv(cv_text)
+        with stage("tfidf"):
+            features = cv_features(pipeline, text_hash, cv)
+        cv_feature_cache.set(key, features)
+    return features
 
-    # Tomar candidatos restantes por probabilidad
-    pairs = list(zip(classes, proba))
-    # excluir ya elegidos
-    chosen = {c["competencia"] for c in above}
-    remaining = [(c, float(p)) for c, p in pairs if c not in chosen]
-    remaining.sort(key=lambda x: -x[1])
-    for cls, p in remaining:
-        if p < min_prob_floor:
-            break
-        above.append({"competencia": cls, "nivel": round(p * 100.0, 1), "confianza": 0.70, "fuente": ["ml"]})
-        if len(above) >= min_results:
-            break
-    return above
+def _ml_policy(policy: InferencePolicy, metadata: Dict[str, Any]) -> Tuple[float, int, float]:
+    # umbral de Settings o, si no se fijó, el del entrenamiento del modelo
+    return policy.resolve_threshold(metadata), policy.min_results, policy.min_prob_floor
+
+def _rank_ml_probabilities(classes: List[str], matrix, threshold: float, min_results: int, min_prob_floor: float) -> List[List[Dict[str, Any]]]:
+    """Ranking de cada fila de probabilidades: umbral, orden por nivel y completado hasta min_results."""
+    with stage("ranking"):
+        matrix = np.atleast_2d(np.asarray(matrix))[:, : len(classes)]
+        ranked = rank_matrix(matrix, threshold, min_prob_floor, min_results, order_by_nivel=True)
+        return [to_competencias(classes, items) for items in ranked]
+
+def _result_key(pipeline, metadata: Dict[str, Any], document: List[str], policy: Tuple[float, int, float]) -> str:
+    # la versión del modelo forma parte de la clave: cambiar el artefacto invalida la cache
+    version = model_version(pipeline, metadata)
+    result_cache.bind_version(version)
+    return content_key("profile", version, document_key(document, settings.TEXT_WINDOW_AGGREGATE), policy)
+
+def _predict_with_ml(cv_text: str | None, talleres: List[Dict[str, Any]] | None,
+                     policy: InferencePolicy | None = None, participante_id: str | None = None) -> List[Dict[str, Any]]:
+    pipeline, classes, metadata = load_model()  # levanta de models/pipeline_competencias.joblib
+    # con participante_id, el CV ya vectorizado de un análisis anterior se reutiliza
+    features = _cv_features(pipeline, metadata, participante_id, cv_text) if participante_id else None
+    if features is None:
+        document = _build_document_for_model(cv_text, talleres)
+    else:
+        document = [(features.text + _taller_tokens(talleres)).strip()]
+    policy = _ml_policy(policy or get_inference_policy(), metadata)
+    key = _result_key(pipeline, metadata, document, policy)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+    if features is not None:
+        # solo los términos de los talleres: actualización dispersa de los puntajes del CV
+        with stage("incremental"):
+            proba = predict_proba_incremental(pipeline, features, _taller_tokens(talleres))
+    else:
+        # una fila de probabilidades por clase (las ventanas de un CV largo ya agregadas)
+        proba = predict_proba_windows(pipeline, [document], settings.TEXT_WINDOW_AGGREGATE)
+    result = _rank_ml_probabilities(classes, proba, *policy)[0]
+    result_cache.set(key, result)
+    return result
 
-def analyze_participant_profile(payload) -> Dict[str, Any]:
+def _predict_with_ml_batch(texts: List[str | List[str]], policy: InferencePolicy | None = None) -> List[List[Dict[str, Any]] | Exception]:
+    """
+    Inferencia de varios documentos ya construidos (texto o lista de ventanas) con una sola
+    pasada TF-IDF + OneVsRest.
+    Los documentos ya presentes en la cache de resultados no vuelven al modelo.
+    Si la pasada conjunta falla, se reintenta documento por documento para que un texto
+    problemático no arrastre al resto: su posición devuelve la excepción en lugar del ranking.
+    """
+    if not texts:
+        return []
+    pipeline, classes, metadata = load_model()
+    policy = _ml_policy(policy or get_inference_policy(), metadata)
+    aggregate = settings.TEXT_WINDOW_AGGREGATE
+    documents = [[text] if isinstance(text, str) else text for text in texts]
+    keys = [_result_key(pipeline, metadata, document, policy) for document in documents]
+    results: List[List[Dict[str, Any]] | Exception | None] = [result_cache.get(key) for key in keys]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if not pending:
+        return results
+
+    try:
+        rows = list(predict_proba_windows(pipeline, [documents[i] for i in pending], aggregate))
+    except Exception:
+        rows = []
+        for i in pending:
+            try:
+                rows.append(predict_proba_windows(pipeline, [documents[i]], aggregate)[0])
+            except Exception as exc:
+                rows.append(exc)
+    ok = [(i, proba) for i, proba in zip(pending, rows) if not isinstance(proba, Exception)]
+    for i, proba in zip(pending, rows):
+        if isinstance(proba, Exception):
+            results[i] = proba
+    if ok:
+        ranked = _rank_ml_probabilities(classes, np.vstack([proba for _, proba in ok]), *policy)
+        for (i, _), result in zip(ok, ranked):
+            results[i] = result
+            result_cache.set(keys[i], result)
+    return results
+
+def _payload_inputs(payload) -> Tuple[str | None, List[Dict[str, Any]] | None]:
     talleres = None
     if getattr(payload, "talleres", None):
         talleres = [t.model_dump() if hasattr(t, "model_dump") else t for t in payload.talleres]
     cv_text = getattr(payload, "cvTexto", None)
+    return cv_text, talleres
 
-    # Siempre usar ML si el modelo está disponible; si no, caer a reglas
-    compet_ml = _predict_with_ml(cv_text, talleres)
+def _loaded_model_version() -> str:
+    # se lee antes de predecir: si el modelo se recarga en el medio, el perfil queda asociado a la
+    # versión anterior y el almacén de perfiles lo recalcula en lugar de servirlo como vigente
+    pipeline, _, metadata = load_model()
+    return model_version(pipeline, metadata)
+
+def _build_profile(participante_id: str, cv_text: str | None, talleres: List[Dict[str, Any]] | None,
+                   compet_ml: List[Dict[str, Any]], policy: InferencePolicy | None = None,
+                   version: str | None = None) -> Dict[str, Any]:
     if compet_ml:
+        policy = policy or get_inference_policy()
         return {
-            "participanteId": payload.participanteId,
+            "participanteId": participante_id,
             "competencias": compet_ml,
-            "meta": {"mode": "ml"}
+            "meta": {"mode": "ml", "modelVersion": version, "policy": policy.describe(load_model()[2])}
         }
 
     # Fallback: reglas + fusión
-    scores_talleres = _score_from_talleres(talleres or [])
-    scores_cv = _score_from_cv(cv_text or "")
-    competencias = _fuse_scores(scores_talleres, scores_cv)
+    with stage("rules"):
+        scores_talleres = _score_from_talleres(talleres or [])
+        scores_cv = _score_from_cv(cv_text or "")
+        competencias = _fuse_scores(scores_talleres, scores_cv)
     return {
-        "participanteId": payload.participanteId,
+        "participanteId": participante_id,
         "competencias": competencias,
-        "meta": {"mode": "rules", "W_TALLERES": W_TALLERES, "W_CV": W_CV}
+        "meta": {"mode": "rules", "modelVersion": version, "W_TALLERES": W_TALLERES, "W_CV": W_CV}
+    }
+
+def analyze_participant_profile(payload, policy: InferencePolicy | None = None) -> Dict[str, Any]:
+    cv_text, talleres = _payload_inputs(payload)
+    # una sola política para todo el request, aunque se recargue mientras tanto
+    policy = policy or get_inference_policy()
+    version = _loaded_model_version()
+
+    # Siempre usar ML si el modelo está disponible; si no, caer a reglas
+    compet_ml = _predict_with_ml(cv_text, talleres, policy=policy, participante_id=payload.participanteId)
+    return _build_profile(payload.participanteId, cv_text, talleres, compet_ml, policy, version)
+
+def analyze_participant_profiles_batch(payloads: List[Any], policy: InferencePolicy | None = None) -> Dict[str, Any]:
+    """
+    Perfila varios participantes con una única pasada del modelo.
+    Los resultados respetan el orden de entrada; un participante con error se reporta
+    como {"participanteId", "error"} sin hacer fallar al resto del lote.
+    """
+    resultados: List[Dict[str, Any] | None] = [None] * len(payloads)
+    inputs: List[Tuple[int, str | None, List[Dict[str, Any]] | None]] = []
+    texts: List[List[str]] = []
+    for i, payload in enumerate(payloads):
+        try:
+            cv_text, talleres = _payload_inputs(payload)
+            texts.append(_build_document_for_model(cv_text, talleres))
+            inputs.append((i, cv_text, talleres))
+        except Exception as exc:
+            resultados[i] = {"participanteId": getattr(payload, "participanteId", None), "error": str(exc)}
+
+    policy = policy or get_inference_policy()
+    version = _loaded_model_version()
+    predictions = _predict_with_ml_batch(texts, policy)
+    for (i, cv_text, talleres), compet_ml in zip(inputs, predictions):
+        participante_id = payloads[i].participanteId
+        try:
+            if isinstance(compet_ml, Exception):
+                raise compet_ml
+            resultados[i] = _build_profile(participante_id, cv_text, talleres, compet_ml, policy, version)
+        except Exception as exc:
+            resultados[i] = {"participanteId": participante_id, "error": str(exc)}
+
+    errores = sum(1 for r in resultados if "error" in r)
+    return {
+        "resultados": resultados,
+        "meta": {"total": len(payloads), "ok": len(payloads) - errores, "errores": errores},
     }
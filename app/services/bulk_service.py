@@ -0,0 +1,26 @@
+from __future__ import annotations
+from types import SimpleNamespace
+from typing import Any, Dict, List
+from app.core.config import InferencePolicy
+from app.core.job_queue import register_handler
+from app.services.analysis_service import analyze_participant_profiles_batch
+from app.services.job_service import analyze_job_requirements_batch
+
+# Tipos de trabajo de /analyze/jobs
+PROFILE = "profile"
+JOB = "job"
+
+def analyze_profiles_chunk(items: List[Dict[str, Any]], policy: InferencePolicy) -> List[Dict[str, Any]]:
+    """Un tramo de participantes (payloads de AnalyzeInput ya validados) en una sola pasada del modelo."""
+    payloads = [
+        SimpleNamespace(participanteId=item["participanteId"], talleres=item.get("talleres"), cvTexto=item.get("cvTexto"))
+        for item in items
+    ]
+    return analyze_participant_profiles_batch(payloads, policy)["resultados"]
+
+def analyze_jobs_chunk(items: List[Dict[str, Any]], policy: InferencePolicy) -> List[Dict[str, Any]]:
+    """Un tramo de puestos (payloads de JobRequest ya validados) en una sola pasada del modelo."""
+    return analyze_job_requirements_batch([(item["puestoTexto"], item["topK"]) for item in items], policy)["resultados"]
+
+register_handler(PROFILE, analyze_profiles_chunk)
+register_handler(JOB, analyze_jobs_chunk)
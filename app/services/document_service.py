@@ -0,0 +1,111 @@
+from __future__ import annotations
+import hashlib
+import io
+import time
+from typing import Any, Dict, Iterator, List
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import stage
+
+# Formatos aceptados por /analyze/profile/upload
+PDF = "pdf"
+DOCX = "docx"
+
+_DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Texto extraído por hash del archivo (en el proceso principal): volver a subir el mismo CV no repite la extracción
+document_cache = TTLCache(settings.DOCUMENT_CACHE_SIZE, settings.DOCUMENT_CACHE_TTL_SECONDS, name="document")
+
+
+class DocumentError(ValueError):
+    """El archivo no es un PDF/DOCX legible (o su extracción superó el tiempo máximo)."""
+
+
+class UnsupportedDocument(DocumentError):
+    """El archivo no es PDF ni DOCX."""
+
+
+def document_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def detect_format(data: bytes, filename: str | None = None, content_type: str | None = None) -> str:
+    """Formato por contenido (firma del archivo); el nombre y el tipo declarado solo desempatan los ZIP."""
+    if data[:5] == b"%PDF-":
+        return PDF
+    if data[:4] == b"PK\x03\x04":
+        # un DOCX es un ZIP con word/document.xml
+        if b"word/" in data[:4096] or (filename or "").lower().endswith(".docx") or content_type == _DOCX_MIME:
+            return DOCX
+    raise UnsupportedDocument("Formato no soportado: se aceptan PDF y DOCX")
+
+
+def _pdf_pages(data: bytes, max_pages: int) -> Iterator[str]:
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+
+    # extract_pages interpreta una página por vez: se corta apenas se alcanza algún límite.
+    # Una página de más permite saber si el documento quedó recortado
+    for page in extract_pages(io.BytesIO(data), maxpages=max_pages + 1):
+        yield "\n".join(element.get_text().strip() for element in page if isinstance(element, LTTextContainer))
+
+
+def _docx_blocks(data: bytes) -> Iterator[str]:
+    from docx import Document
+
+    document = Document(io.BytesIO(data))
+    for paragraph in document.paragraphs:
+        yield paragraph.text
+    for table in document.tables:
+        for row in table.rows:
+            yield " | ".join(cell.text.strip() for cell in row.cells)
+
+
+def extract_text(data: bytes, fmt: str, max_pages: int | None = None, max_chars: int | None = None,
+                 timeout_seconds: float | None = None) -> Dict[str, Any]:
+    """
+    Extrae el texto de un PDF (página por página, a lo sumo max_pages) o de un DOCX.
+    La extracción se detiene al juntar max_chars caracteres y falla con DocumentError si
+    tarda más de timeout_seconds (se revisa entre páginas / párrafos; una sola página que no
+    termina la corta la ruta descartando el worker del pool de documentos).
+    """
+    max_pages = max_pages or settings.UPLOAD_MAX_PAGES
+    max_chars = settings.MAX_TEXT_CHARS if max_chars is None else max_chars
+    timeout_seconds = timeout_seconds or settings.UPLOAD_EXTRACT_TIMEOUT_SECONDS
+    deadline = time.monotonic() + timeout_seconds
+
+    blocks = _pdf_pages(data, max_pages) if fmt == PDF else _docx_blocks(data)
+    max_units = max_pages if fmt == PDF else float("inf")
+    parts: List[str] = []
+    chars, units, truncated = 0, 0, False
+    with stage("extract_text"):
+        try:
+            for block in blocks:
+                if time.monotonic() > deadline:
+                    raise DocumentError(f"La extracción del documento superó {timeout_seconds:g} s")
+                if units >= max_units:
+                    truncated = True
+                    break
+                units += 1
+                if block:
+                    parts.append(block)
+                    chars += len(block) + 1
+                if max_chars and chars >= max_chars:
+                    truncated = True
+                    break
+        except DocumentError:
+            raise
+        except Exception as exc:
+            # PDF dañado o cifrado, ZIP que no es un DOCX, etc.
+            raise DocumentError(f"No se pudo leer el documento: {type(exc).__name__}") from exc
+    text = "\n".join(parts)
+    if max_chars and len(text) > max_chars:
+        text = text[:max_chars]
+    return {
+        "text": text,
+        "format": fmt,
+        "pages": units if fmt == PDF else None,
+        "truncated": truncated,
+    }
+
@@ -1,9 +1,13 @@
 from __future__ import annotations
-import os
 from typing import List, Dict, Any, Tuple
-from app.ml.model_loader import load_model
-
-ML_THRESHOLD_ENV = os.getenv("ML_THRESHOLD")
+import numpy as np
+from app.ml.model_loader import load_model, model_version
+from app.core.cache import content_key, result_cache
+from app.core.config import InferencePolicy, get_inference_policy, settings
+from app.core.metrics import stage
+from app.ml.inference import clip_text, document_key, predict_proba_windows, split_windows
+from app.services.keyword_automaton import KeywordAutomaton
+from app.services.ranking import rank_matrix, to_competencias
 
 # Diccionario fallback de keywords → competencia (enfocado en PyMEs)
 KEYWORDS_MAP = {
@@ -59,63 +63,78 @@ KEYWORDS_MAP = {
     "cronograma": "Gestion de Proyectos",
 }
 
-def _get_threshold(metadata: Dict[str, Any]) -> float:
-    if ML_THRESHOLD_ENV is not None:
-        try:
-            return float(ML_THRESHOLD_ENV)
-        except ValueError:
-            pass
-    return float(metadata.get("best_threshold", metadata.get("threshold", 0.20)))
+def _rank_job_probabilities(classes: List[str], matrix, threshold: float, min_prob_floor: float, top_ks: List[int]) -> List[List[Dict[str, Any]]]:
+    """Ranking de cada fila de probabilidades: umbral, orden por score y completado hasta su topK."""
+    with stage("ranking"):
+        matrix = np.atleast_2d(np.asarray(matrix))
+        labels = classes if classes else [f"Clase_{i}" for i in range(matrix.shape[1])]
+        ranked = rank_matrix(matrix[:, : len(labels)], threshold, min_prob_floor, top_ks, order_by_nivel=False)
+        return [to_competencias(labels, items) for items in ranked]
+
+def _job_document(texto: str | None) -> List[str]:
+    """Ventanas del puesto para el modelo (ver TEXT_WINDOW_CHARS); uno corto es una sola ventana."""
+    window, max_windows = settings.TEXT_WINDOW_CHARS, settings.TEXT_MAX_WINDOWS
+    text = (texto or "").strip()
+    if window > 0:
+        # se recorta antes de pasar a minúsculas: lo que no entra en las ventanas no se procesa
+        text = clip_text(text, window * max_windows)
+    return split_windows(text.lower(), window, max_windows)
 
-def _predict_ml(texto: str, top_k: int) -> List[Dict[str, Any]]:
+def _predict_ml(texto: str, top_k: int, policy: InferencePolicy | None = None) -> List[Dict[str, Any]]:
+    return _predict_ml_batch([texto], [top_k], policy)[0]
+
+def _predict_ml_batch(textos: List[str], top_ks: List[int], policy: InferencePolicy | None = None) -> List[List[Dict[str, Any]]]:
+    """
+    Inferencia de varios puestos con una sola matriz TF-IDF y una sola llamada al clasificador.
+    Los puestos ya presentes en la cache de resultados no vuelven al modelo.
+    """
     pipe, classes, metadata = load_model()
-    if pipe is None:
-        return []
-    text = (texto or "").strip().lower()
-    try:
-        probs = pipe.predict_proba([text])[0]
-    except Exception:
-        import numpy as np
-        logits = pipe.decision_function([text])[0]
-        probs = 1 / (1 + np.exp(-logits))
-    threshold = _get_threshold(metadata)
-    min_prob_floor = float(os.getenv("ML_MIN_PROB_FLOOR", "0.15"))
+    if pipe is None or not textos:
+        return [[] for _ in textos]
+    with stage("build_text"):
+        documents = [_job_document(texto) for texto in textos]
+    policy = policy or get_inference_policy()
+    threshold = policy.resolve_threshold(metadata)
+    min_prob_floor = policy.min_prob_floor
+    aggregate = settings.TEXT_WINDOW_AGGREGATE
 
-    # 1) Por encima del umbral
-    scored: List[Tuple[str, float]] = [
-        (label, float(p))
-        for label, p in zip(classes if classes else [f"Clase_{i}" for i in range(len(probs))], probs)
-        if float(p) >= threshold
+    # la versión del modelo forma parte de la clave: cambiar el artefacto invalida la cache
+    version = model_version(pipe, metadata)
+    result_cache.bind_version(version)
+    keys = [
+        content_key("job", version, document_key(document, aggregate), top_k, threshold, min_prob_floor)
+        for document, top_k in zip(documents, top_ks)
     ]
-    scored.sort(key=lambda x: x[1], reverse=True)
+    results = [result_cache.get(key) for key in keys]
+    pending = [i for i, r in enumerate(results) if r is None]
+    if pending:
+        matrix = predict_proba_windows(pipe, [documents[i] for i in pending], aggregate)
+        ranked = _rank_job_probabilities(classes, matrix, threshold, min_prob_floor, [top_ks[i] for i in pending])
+        for i, result in zip(pending, ranked):
+            results[i] = result
+            result_cache.set(keys[i], result)
+    return results
 
-    # 2) Si faltan hasta top_k, completar con los mejores restantes sobre el piso
-    if top_k and top_k > 0 and len(scored) < top_k:
-        chosen = {l for l, _ in scored}
-        remaining = [
-            (label, float(p))
-            for label, p in zip(classes if classes else [f"Clase_{i}" for i in range(len(probs))], probs)
-            if label not in chosen
-        ]
-        remaining.sort(key=lambda x: x[1], reverse=True)
-        for label, p in remaining:
-            if p < min_prob_floor:
-                break
-            scored.append((label, p))
-            if len(scored) >= top_k:
-                break
+# Todas las keywords en un único autómata; los ids siguen el orden de KEYWORDS_MAP
+_KEYWORD_AUTOMATON = KeywordAutomaton(KEYWORDS_MAP)
 
-    return [
-        {"competencia": label, "nivel": round(score * 100.0, 1), "confianza": (0.85 if score >= threshold else 0.70), "fuente": ["ml"]}
-        for label, score in scored
-    ]
+def _match_keywords(texto: str) -> List[str]:
+    """
+    Keywords de KEYWORDS_MAP presentes en el texto delimitadas por espacios
+    (equivalente a `f" {kw} " in " " + texto + " "`), en una sola pasada sobre el texto.
+    """
+    found = _KEYWORD_AUTOMATON.delimited(texto.lower())
+    return [_KEYWORD_AUTOMATON.terms[i] for i in sorted(found)]
 
 def _predict_keywords(texto: str, top_k: int) -> List[Dict[str, Any]]:
-    t = " " + texto.lower() + " "
+    with stage("keywords"):
+        return _keyword_results(texto, top_k)
+
+def _keyword_results(texto: str, top_k: int) -> List[Dict[str, Any]]:
     counts: Dict[str, float] = {}
-    for kw, comp in KEYWORDS_MAP.items():
-        if f" {kw} " in t:
-            counts[comp] = counts.get(comp, 0.0) + 1.0
+    for kw in _match_keywords(texto):
+        comp = KEYWORDS_MAP[kw]
+        counts[comp] = counts.get(comp, 0.0) + 1.0
     results = [
         {"competencia": comp, "nivel": round(min(0.75, 0.35 + c * 0.2) * 100.0, 1), "confianza": 0.6, "fuente": ["keywords"]}
         for comp, c in counts.items()
@@ -123,9 +142,8 @@ def _predict_keywords(texto: str, top_k: int) -> List[Dict[str, Any]]:
     results.sort(key=lambda x: x["nivel"], reverse=True)
     return results[:top_k] if top_k and top_k > 0 else results
 
-def analyze_job_requirements(puesto_texto: str, top_k: int = 6) -> Dict[str, Any]:
-    # 1) ML
-    ml_results = _predict_ml(puesto_texto, top_k)
+def _merge_job_results(puesto_texto: str, ml_results: List[Dict[str, Any]], top_k: int,
+                       policy: InferencePolicy | None = None) -> Dict[str, Any]:
     # 2) Fallback por keywords si ML no devuelve nada
     if not ml_results:
         kw_results = _predict_keywords(puesto_texto, top_k)
@@ -144,5 +162,46 @@ def analyze_job_requirements(puesto_texto: str, top_k: int = 6) -> Dict[str, Any
         merged = merged[:top_k]
     return {
         "competencias": merged,
-        "meta": {"mode": "ml+keywords"},
+        "meta": {"mode": "ml+keywords", "policy": (policy or get_inference_policy()).describe(load_model()[2])},
+    }
+
+def analyze_job_requirements(puesto_texto: str, top_k: int = 6, policy: InferencePolicy | None = None) -> Dict[str, Any]:
+    policy = policy or get_inference_policy()
+    # 1) ML
+    ml_results = _predict_ml(puesto_texto, top_k, policy)
+    return _merge_job_results(puesto_texto, ml_results, top_k, policy)
+
+def analyze_job_requirements_batch(puestos: List[Tuple[str, int]], policy: InferencePolicy | None = None) -> Dict[str, Any]:
+    """
+    Analiza varios puestos (texto, top_k) con una única pasada del modelo.
+    Los resultados respetan el orden de entrada; un puesto con error se reporta
+    como {"error"} sin hacer fallar al resto del lote.
+    """
+    textos = [texto for texto, _ in puestos]
+    top_ks = [top_k for _, top_k in puestos]
+    policy = policy or get_inference_policy()
+    try:
+        ml_batch = _predict_ml_batch(textos, top_ks, policy)
+    except Exception:
+        # La pasada conjunta falló: se reintenta puesto por puesto para aislar el error
+        ml_batch = []
+        for texto, top_k in puestos:
+            try:
+                ml_batch.append(_predict_ml(texto, top_k, policy))
+            except Exception as exc:
+                ml_batch.append(exc)
+
+    resultados: List[Dict[str, Any]] = []
+    for (texto, top_k), ml_results in zip(puestos, ml_batch):
+        try:
+            if isinstance(ml_results, Exception):
+                raise ml_results
+            resultados.append(_merge_job_results(texto, ml_results, top_k, policy))
+        except Exception as exc:
+            resultados.append({"error": str(exc)})
+
+    errores = sum(1 for r in resultados if "error" in r)
+    return {
+        "resultados": resultados,
+        "meta": {"total": len(puestos), "ok": len(puestos) - errores, "errores": errores},
     }
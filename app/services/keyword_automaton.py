@@ -0,0 +1,95 @@
+"""
+Autómata Aho–Corasick para buscar muchos términos a la vez en un solo recorrido del texto.
+
+Se construye una vez (al importar los servicios) a partir de los diccionarios de fallback
+y reemplaza los bucles `text.count(term)` / `f" {kw} " in text` por término: el costo pasa de
+O(#términos × len(texto)) a O(len(texto) + #coincidencias), independiente del tamaño del diccionario.
+"""
+from __future__ import annotations
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class KeywordAutomaton:
+    """Busca todas las apariciones (incluso solapadas) de un conjunto de términos."""
+
+    def __init__(self, terms: Iterable[str]):
+        # términos únicos, en orden de primera aparición
+        self.terms: List[str] = [t for t in dict.fromkeys(terms) if t]
+        self.index: Dict[str, int] = {t: i for i, t in enumerate(self.terms)}
+        self._lengths: List[int] = [len(t) for t in self.terms]
+
+        # trie
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for term_id, term in enumerate(self.terms):
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(term_id)
+
+        # enlaces de fallo (BFS); cada estado hereda las salidas de su sufijo más largo
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt].extend(out[fail[nxt]])
+
+        self._goto = goto
+        self._fail = fail
+        self._out: List[Tuple[int, ...]] = [tuple(o) for o in out]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Genera (inicio, id_término) para cada aparición, en orden de posición final."""
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for term_id in out[state]:
+                    yield i - lengths[term_id] + 1, term_id
+
+    def count(self, text: str) -> List[int]:
+        """
+        Apariciones no solapadas de cada término (misma semántica que `text.count(term)`),
+        indexadas por id de término.
+        """
+        counts = [0] * len(self.terms)
+        next_free = [0] * len(self.terms)
+        lengths = self._lengths
+        for start, term_id in self.iter_matches(text):
+            if start >= next_free[term_id]:
+                counts[term_id] += 1
+                next_free[term_id] = start + lengths[term_id]
+        return counts
+
+    def delimited(self, text: str, sep: str = " ") -> Set[int]:
+        """
+        Ids de los términos que aparecen delimitados por `sep` o por los extremos del texto
+        (equivalente a `f"{sep}{term}{sep}" in f"{sep}{text}{sep}"`).
+        """
+        found: Set[int] = set()
+        n = len(text)
+        lengths = self._lengths
+        for start, term_id in self.iter_matches(text):
+            end = start + lengths[term_id]
+            if (start == 0 or text[start - 1] == sep) and (end == n or text[end] == sep):
+                found.add(term_id)
+        return found
@@ -0,0 +1,104 @@
+"""
+Ranking de competencias a partir de la matriz de probabilidades del modelo (n_textos, n_clases),
+compartido por el análisis de perfiles y el de puestos.
+
+Para cada fila:
+  1. Se toman las clases con p >= umbral, de mayor a menor. El perfil ordena por nivel
+     redondeado (p * 100 a un decimal) y el puesto por probabilidad; los empates conservan
+     el orden de las clases.
+  2. Si quedan menos que el límite de la fila (ML_MIN_RESULTS o topK), se completa con las
+     mejores clases restantes mientras p >= piso.
+
+El enmascarado y la selección top-k (np.argpartition) se hacen sobre toda la matriz; Python
+solo recorre las competencias elegidas para armar la respuesta.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+ABOVE_CONFIDENCE = 0.85
+FILL_CONFIDENCE = 0.70
+
+# (índice de clase, nivel, supera el umbral)
+Ranked = List[Tuple[int, float, bool]]
+
+
+def round_nivel(proba: np.ndarray) -> np.ndarray:
+    """
+    round(p * 100, 1) elemento a elemento, idéntico al round() de Python. np.round difiere solo
+    cuando p * 1000 queda a un paso de coma flotante de x.5; esos casos se recalculan con round().
+    """
+    scaled = np.asarray(proba, dtype=np.float64) * 100.0
+    rounded = scaled.round(1)
+    suspicious = np.abs(scaled * 10.0 % 1.0 - 0.5) < 1e-6
+    if suspicious.any():
+        for idx in np.flatnonzero(suspicious):
+            rounded.flat[idx] = round(float(scaled.flat[idx]), 1)
+    return rounded
+
+
+def _stable_top_k(key: np.ndarray, k: int) -> np.ndarray:
+    """
+    Índices de las k claves mayores de cada fila, de mayor a menor; ante empates gana el índice
+    menor (mismo resultado que un sort estable descendente, sin ordenar la fila completa).
+    """
+    n_rows, n_cols = key.shape
+    if k < n_cols:
+        kth = -np.partition(-key, k - 1, axis=1)[:, k - 1][:, np.newaxis]
+        greater = key > kth
+        equal = key == kth
+        missing = k - greater.sum(axis=1, keepdims=True)
+        selected = greater | (equal & (np.cumsum(equal, axis=1) <= missing))
+        cols = np.nonzero(selected)[1].reshape(n_rows, k)
+    else:
+        cols = np.broadcast_to(np.arange(n_cols), (n_rows, n_cols))
+    order = np.argsort(-np.take_along_axis(key, cols, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(cols, order, axis=1)
+
+
+def rank_matrix(
+    proba: np.ndarray,
+    threshold: float,
+    min_prob_floor: float,
+    limits: int | Sequence[int],
+    order_by_nivel: bool,
+) -> List[Ranked]:
+    """Aplica umbral, orden y completado por piso a cada fila de `proba` (ver docstring del módulo)."""
+    proba = np.atleast_2d(np.asarray(proba, dtype=np.float64))
+    n_rows, n_cols = proba.shape
+    if n_rows == 0:
+        return []
+    niveles = round_nivel(proba)
+
+    above = proba >= threshold
+    n_above = above.sum(axis=1)
+    above_key = niveles if order_by_nivel else proba
+    above_order = np.where(above, -above_key, np.inf).argsort(axis=1, kind="stable")
+
+    candidates = ~above & (proba >= min_prob_floor)
+    n_fill = np.minimum(np.maximum(np.asarray(limits) - n_above, 0), candidates.sum(axis=1))
+    k = min(int(n_fill.max()), n_cols)
+    fill_cols = _stable_top_k(np.where(candidates, proba, -np.inf), k).tolist() if k > 0 else None
+
+    ranked: List[Ranked] = []
+    for i, (row, order, count, fill) in enumerate(
+        zip(niveles.tolist(), above_order.tolist(), n_above.tolist(), n_fill.tolist())
+    ):
+        items: Ranked = [(j, row[j], True) for j in order[:count]]
+        if fill:
+            items.extend((j, row[j], False) for j in fill_cols[i][:fill])
+        ranked.append(items)
+    return ranked
+
+
+def to_competencias(labels: Sequence[str], ranked: Ranked) -> List[Dict[str, Any]]:
+    return [
+        {
+            "competencia": labels[j],
+            "nivel": nivel,
+            "confianza": ABOVE_CONFIDENCE if is_above else FILL_CONFIDENCE,
+            "fuente": ["ml"],
+        }
+        for j, nivel, is_above in ranked
+    ]
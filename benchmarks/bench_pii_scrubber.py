@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Micro-benchmark de la limpieza de información personal sobre CVs largos.
+Compara la implementación anterior (un `re.sub` por patrón) con `scrub_personal_info`
+y verifica que ambas produzcan exactamente el mismo texto.
+
+Uso: python benchmarks/bench_pii_scrubber.py [--size-kb 50] [--repeat 20]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.ml.pii_scrubber import PII_PATTERNS, scrub_personal_info  # noqa: E402
+
+
+def legacy_clean(text: str) -> str:
+    """Implementación previa: recorre el texto una vez por patrón."""
+    if not text:
+        return ""
+    cleaned = text
+    for pattern in PII_PATTERNS:
+        cleaned = re.sub(pattern, " ", cleaned, flags=re.IGNORECASE)
+    return cleaned.strip()
+
+
+def build_cv(texts, size_kb: int) -> str:
+    """Concatena CVs del dataset hasta alcanzar el tamaño pedido."""
+    parts, total, target = [], 0, size_kb * 1024
+    i = 0
+    while total < target:
+        parts.append(texts[i % len(texts)])
+        total += len(parts[-1]) + 1
+        i += 1
+    return "\n".join(parts)[:target]
+
+
+def timeit(fn, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de limpieza de PII")
+    parser.add_argument("--data", default="data/dataset_competencias.csv")
+    parser.add_argument("--size-kb", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.data)["cv_texto"].fillna("").astype(str).tolist()
+    label_re = re.compile(r"celular|tel[ée]fono|m[óo]vil|correo|email|nombre|lugar|nacionalidad|domicilio|direcci[óo]n|@", re.IGNORECASE)
+    corpora = {
+        "dataset (con etiquetas)": build_cv(texts, args.size_kb),
+        "sin etiquetas personales": build_cv([t for t in texts if not label_re.search(t)], args.size_kb),
+    }
+
+    for name, cv in corpora.items():
+        assert legacy_clean(cv) == scrub_personal_info(cv), "la salida difiere de la implementación previa"
+        t_old = timeit(legacy_clean, cv, args.repeat)
+        t_new = timeit(scrub_personal_info, cv, args.repeat)
+        print(f"[pii] {name:26s} {len(cv) / 1024:6.1f} KB  previo={t_old * 1000:7.2f} ms  "
+              f"actual={t_new * 1000:7.2f} ms  speedup={t_old / t_new:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
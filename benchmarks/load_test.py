@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+"""
+Generador de carga para /analyze/profile y /analyze/job con reporte de percentiles.
+
+Reproduce un corpus de requests armado con data/*.csv y examples_*.json (o un log JSONL con
+--replay) contra la app ASGI en el mismo proceso (httpx.ASGITransport, sin red) o contra un
+servidor levantado con uvicorn (--url). Dos modos:
+  - lazo cerrado (por defecto): --concurrency clientes envían un request tras otro
+  - lazo abierto (--rate R): llegadas de Poisson a R req/s, con a lo sumo --concurrency en
+    curso; la latencia se mide desde el instante programado, así la cola también cuenta
+
+Formato del log (una línea por request): {"method": "POST", "path": "/analyze/job", "body": {...}}
+
+Uso:
+  python benchmarks/load_test.py --concurrency 8 --duration 30
+  python benchmarks/load_test.py --rate 50 --requests 2000 --output carga.json
+  python benchmarks/load_test.py --record corpus.jsonl          # solo guarda el corpus
+  python benchmarks/load_test.py --replay corpus.jsonl --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import glob
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import httpx  # noqa: E402
+import pandas as pd  # noqa: E402
+
+ENDPOINTS = {"profile": "/analyze/profile", "job": "/analyze/job"}
+
+
+class Result(NamedTuple):
+    path: str
+    status: int  # 0 = sin respuesta (timeout, conexión)
+    latency: float
+    error: Optional[str] = None
+
+
+def _talleres(raw: Any) -> List[Dict[str, Any]]:
+    if not isinstance(raw, str):
+        return []
+    return [{"tema": tema.strip(), "asistencia_pct": 0.8} for tema in raw.split(",") if tema.strip()]
+
+
+def build_corpus(endpoints: List[str], data_glob: str = "data/*.csv", examples_glob: str = "examples_*.json") -> List[Dict[str, Any]]:
+    """Requests en orden fijo: los ejemplos del repositorio y cada fila de los CSV, una vez por endpoint."""
+    corpus: List[Dict[str, Any]] = []
+    for path in sorted(glob.glob(os.path.join(ROOT, examples_glob))):
+        with open(path, encoding="utf-8") as fh:
+            body = json.load(fh)
+        endpoint = "job" if "puestoTexto" in body else "profile"
+        if endpoint in endpoints:
+            corpus.append({"method": "POST", "path": ENDPOINTS[endpoint], "body": body})
+    for path in sorted(glob.glob(os.path.join(ROOT, data_glob))):
+        df = pd.read_csv(path)
+        name = os.path.splitext(os.path.basename(path))[0]
+        for i, row in enumerate(df.itertuples(index=False)):
+            cv = str(row.cv_texto) if isinstance(row.cv_texto, str) else ""
+            if "profile" in endpoints:
+                corpus.append({"method": "POST", "path": ENDPOINTS["profile"], "body": {
+                    "participanteId": f"{name}-{i}", "cvTexto": cv, "talleres": _talleres(row.talleres)}})
+            if "job" in endpoints:
+                corpus.append({"method": "POST", "path": ENDPOINTS["job"], "body": {"puestoTexto": cv, "topK": 6}})
+    return corpus
+
+
+def load_log(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def write_log(corpus: List[Dict[str, Any]], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as fh:
+        for entry in corpus:
+            fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+async def _send(client: httpx.AsyncClient, entry: Dict[str, Any], started: float) -> Result:
+    path = entry["path"]
+    try:
+        response = await client.request(entry.get("method", "POST"), path, json=entry.get("body"))
+        status, error = response.status_code, None
+    except httpx.HTTPError as exc:
+        status, error = 0, type(exc).__name__
+    return Result(path, status, time.perf_counter() - started, error)
+
+
+async def run_load(client: httpx.AsyncClient, corpus: List[Dict[str, Any]], concurrency: int,
+                   total: Optional[int] = None, duration: Optional[float] = None,
+                   rate: Optional[float] = None, seed: int = 42) -> List[Result]:
+    """Recorre el corpus en ciclo hasta `total` requests o `duration` segundos (lo que ocurra primero)."""
+    if not corpus:
+        raise ValueError("el corpus está vacío")
+    if total is None and duration is None:
+        total = len(corpus)
+    deadline = time.perf_counter() + duration if duration else float("inf")
+    entries = itertools.cycle(corpus)
+    sent = itertools.count()
+    results: List[Result] = []
+
+    def more() -> bool:
+        return time.perf_counter() < deadline and (total is None or next(sent) < total)
+
+    if rate is None:
+        async def worker() -> None:
+            while more():
+                results.append(await _send(client, next(entries), time.perf_counter()))
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return results
+
+    rng = random.Random(seed)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fire(entry: Dict[str, Any], scheduled: float) -> None:
+        async with slots:
+            results.append(await _send(client, entry, scheduled))
+
+    tasks = []
+    next_at = time.perf_counter()
+    while more():
+        next_at += rng.expovariate(rate)
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(next(entries), next_at)))
+    await asyncio.gather(*tasks)
+    return results
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentil por rango más cercano sobre valores ya ordenados."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(-(-q * len(sorted_values) // 100)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(results: List[Result], elapsed: float) -> Dict[str, Dict[str, Any]]:
+    """Throughput, percentiles de latencia (ms) y errores por endpoint y en total."""
+    groups: Dict[str, List[Result]] = defaultdict(list)
+    for result in results:
+        groups[result.path].append(result)
+    groups["total"] = list(results)
+
+    report = {}
+    for path, items in groups.items():
+        latencies = sorted(r.latency for r in items)
+        errors = sum(1 for r in items if not 200 <= r.status < 300)
+        report[path] = {
+            "requests": len(items),
+            "errors": errors,
+            "error_rate": round(errors / len(items), 4) if items else 0.0,
+            "status": dict(Counter(str(r.status) for r in items)),
+            "throughput_rps": round(len(items) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency_ms": {
+                name: round(percentile(latencies, q) * 1000, 3)
+                for name, q in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+            },
+        }
+    return report
+
+
+def _print_report(report: Dict[str, Dict[str, Any]], elapsed: float) -> None:
+    print(f"[load] duración {elapsed:.1f} s")
+    print(f"[load] {'endpoint':18s} {'reqs':>7s} {'req/s':>8s} {'err%':>6s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'max':>9s}  (ms)")
+    for path, r in report.items():
+        lat = r["latency_ms"]
+        print(f"[load] {path:18s} {r['requests']:7d} {r['throughput_rps']:8.1f} {r['error_rate'] * 100:6.2f} "
+              f"{lat['p50']:9.2f} {lat['p95']:9.2f} {lat['p99']:9.2f} {lat['max']:9.2f}")
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            response = await client.get("/health/ready")
+        except httpx.TransportError as exc:
+            # el servidor puede estar todavía arrancando
+            status: Any = type(exc).__name__
+        else:
+            if response.status_code == 200:
+                return
+            status = response.json()
+            if status.get("status") == "failed":
+                raise RuntimeError(f"el servicio no quedó listo: {status}")
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"el servicio no quedó listo: {status}")
+        await asyncio.sleep(0.1)
+
+
+async def _run(args, corpus: List[Dict[str, Any]]) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+            await _wait_ready(client, args.timeout)
+            start = time.perf_counter()
+            results = await run_load(client, corpus, args.concurrency, args.requests, args.duration, args.rate, args.seed)
+            return {"results": results, "elapsed": time.perf_counter() - start}
+
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport no ejecuta el lifespan: se corre aquí (pool de inferencia y warm-up)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://fte-ai", timeout=args.timeout) as client:
+            await _wait_ready(client, args.timeout)
+            start = time.perf_counter()
+            results = await run_load(client, corpus, args.concurrency, args.requests, args.duration, args.rate, args.seed)
+            return {"results": results, "elapsed": time.perf_counter() - start}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga de FTE-AI")
+    parser.add_argument("--url", help="Servidor a probar (p. ej. http://localhost:8000); sin --url, la app en proceso")
+    parser.add_argument("--endpoints", nargs="+", choices=sorted(ENDPOINTS), default=sorted(ENDPOINTS))
+    parser.add_argument("--replay", help="Log JSONL de requests a reproducir en lugar del corpus de data/")
+    parser.add_argument("--record", help="Guarda el corpus como log JSONL y termina")
+    parser.add_argument("--concurrency", "-c", type=int, default=8, help="Requests en curso como máximo")
+    parser.add_argument("--rate", type=float, help="Llegadas por segundo (lazo abierto); sin --rate, lazo cerrado")
+    parser.add_argument("--requests", "-n", type=int, help="Total de requests (por defecto, una pasada del corpus)")
+    parser.add_argument("--duration", "-d", type=float, help="Segundos de prueba")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", action="store_true", help="En proceso: mantener las caches y el almacén de perfiles (por defecto se deshabilitan)")
+    parser.add_argument("--output", "-o", help="Archivo JSON con el reporte")
+    args = parser.parse_args(argv)
+
+    os.chdir(ROOT)
+    if not args.url and not args.cache:
+        # el corpus se repite: sin esto se medirían las caches y el almacén de perfiles (que además
+        # persistiría entre corridas), no el modelo. La cola de trabajos queda en memoria, como en
+        # las pruebas, para no retomar ni dejar trabajos en data/jobs.sqlite3
+        os.environ["RESULT_CACHE_SIZE"] = "0"
+        os.environ["PROFILE_FEATURE_CACHE_SIZE"] = "0"
+        os.environ["PROFILE_DB_PATH"] = ""
+        os.environ["JOB_DB_PATH"] = ""
+
+    corpus = load_log(args.replay) if args.replay else build_corpus(args.endpoints)
+    if args.record:
+        write_log(corpus, args.record)
+        print(f"[load] {len(corpus)} requests guardados en {args.record}")
+        return 0
+
+    run = asyncio.run(_run(args, corpus))
+    report = summarize(run["results"], run["elapsed"])
+    _print_report(report, run["elapsed"])
+    if args.output:
+        config = {k: v for k, v in vars(args).items() if k not in ("output", "record")}
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"config": config, "elapsed_seconds": run["elapsed"], "endpoints": report}, fh, indent=2)
+        print(f"[load] reporte guardado en {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
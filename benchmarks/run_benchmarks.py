@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+"""
+Suite de benchmarks de los caminos críticos de inferencia y entrenamiento.
+
+Mide, con textos armados a partir de data/dataset_competencias.csv (siempre los mismos):
+  - analyze_participant_profile / analyze_job_requirements, individual y por lote, con CVs
+    de 1 KB a 200 KB (las caches de resultados y de CVs vectorizados se deshabilitan para
+    medir el modelo)
+  - throughput de la limpieza de PII
+  - carga del modelo (joblib y formato compacto)
+  - tiempo total de train.main sobre los CSV de data/
+
+Los resultados se guardan en JSON; con --compare se contrastan contra una corrida previa y
+el proceso termina con código 1 si alguna mediana empeora más de --max-regression %.
+
+Uso:
+  python benchmarks/run_benchmarks.py --output bench.json
+  python benchmarks/run_benchmarks.py --compare bench.json --max-regression 15
+  python run_tests.py --type bench --quick
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+from benchmarks.bench_pii_scrubber import build_cv  # noqa: E402
+
+CV_SIZES_KB = [1, 10, 50, 200]
+BATCH_SIZE = 16
+
+
+def measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    """Ejecuta fn `warmup` + `repeat` veces y resume los tiempos de las medidas (segundos)."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {
+        "unit": "s",
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "min": times[0],
+        "p95": times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))],
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "runs": len(times),
+    }
+
+
+def load_corpus(path: str) -> List[str]:
+    return pd.read_csv(path)["cv_texto"].fillna("").astype(str).tolist()
+
+
+def bench_inference(texts: List[str], sizes: List[int], repeat: int) -> Dict[str, Dict[str, Any]]:
+    from app.routes.analyze_routes import AnalyzeInput
+    from app.services.analysis_service import analyze_participant_profile, analyze_participant_profiles_batch
+    from app.services.job_service import analyze_job_requirements, analyze_job_requirements_batch
+
+    talleres = [{"tema": "excel", "asistencia_pct": 0.9}, {"tema": "python", "asistencia_pct": 0.8}]
+    results = {}
+    for size in sizes:
+        # documentos distintos dentro del lote: cada uno arranca en otro CV del dataset
+        docs = [build_cv(texts[i * 7:] + texts[: i * 7], size) for i in range(BATCH_SIZE)]
+        payloads = [AnalyzeInput(participanteId=f"bench-{i}", talleres=talleres, cvTexto=doc) for i, doc in enumerate(docs)]
+        puestos = [(doc, 6) for doc in docs]
+        batch_repeat = max(3, repeat // 4)
+        params = {"cv_kb": size}
+        batch_params = {"cv_kb": size, "batch": BATCH_SIZE}
+
+        results[f"profile.single.{size}kb"] = {
+            **measure(lambda: analyze_participant_profile(payloads[0]), repeat), "params": params}
+        results[f"profile.batch.{size}kb"] = {
+            **measure(lambda: analyze_participant_profiles_batch(payloads), batch_repeat), "params": batch_params}
+        results[f"job.single.{size}kb"] = {
+            **measure(lambda: analyze_job_requirements(docs[0], 6), repeat), "params": params}
+        results[f"job.batch.{size}kb"] = {
+            **measure(lambda: analyze_job_requirements_batch(puestos), batch_repeat), "params": batch_params}
+    return results
+
+
+def bench_pii(texts: List[str], repeat: int, size_kb: int = 200) -> Dict[str, Dict[str, Any]]:
+    from app.ml.pii_scrubber import scrub_personal_info
+
+    cv = build_cv(texts, size_kb)
+    stats = measure(lambda: scrub_personal_info(cv), repeat)
+    stats["mb_per_s"] = round(len(cv.encode("utf-8")) / stats["median"] / 1e6, 2)
+    return {f"pii.scrub.{size_kb}kb": {**stats, "params": {"cv_kb": size_kb}}}
+
+
+def bench_model_load(repeat: int) -> Dict[str, Dict[str, Any]]:
+    import joblib
+    from app.ml.compact_model import export_compact, load_compact
+    from app.ml.model_loader import DEFAULT_MODEL_PATH, load_model
+
+    def load_joblib():
+        load_model.cache_clear()
+        load_model(DEFAULT_MODEL_PATH)
+
+    results = {"model_load.joblib": {**measure(load_joblib, repeat), "params": {"path": DEFAULT_MODEL_PATH}}}
+    artifact = joblib.load(DEFAULT_MODEL_PATH)
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = export_compact(artifact["pipeline"], artifact["classes"], artifact.get("metadata", {}),
+                                 os.path.join(tmp, "model.compact"))
+        results["model_load.compact"] = {**measure(lambda: load_compact(out_dir), repeat), "params": {"mmap": True}}
+    load_model.cache_clear()
+    return results
+
+
+def bench_train(data_paths: List[str]) -> Dict[str, Dict[str, Any]]:
+    from app.ml.train import main as train_main
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in data_paths:
+            name = os.path.splitext(os.path.basename(path))[0]
+            model_path = os.path.join(tmp, f"{name}.joblib")
+            # GridSearchCV es muy verboso; solo interesa el tiempo total
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                stats = measure(lambda: train_main(path, model_path), repeat=1, warmup=0)
+            results[f"train.{name}"] = {**stats, "params": {"data": path}}
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    import numpy
+    import sklearn
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=ROOT).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "sklearn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "inference_engine": os.getenv("INFERENCE_ENGINE", "numpy"),
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression_pct: float) -> List[Dict[str, Any]]:
+    """
+    Contrasta las medianas de dos corridas. Devuelve una fila por benchmark presente en ambas,
+    con `regression=True` si la actual supera a la base en más de max_regression_pct %.
+    """
+    rows = []
+    for name, base in sorted(baseline.get("results", {}).items()):
+        cur = current.get("results", {}).get(name)
+        if cur is None or not base.get("median"):
+            continue
+        change = (cur["median"] / base["median"] - 1.0) * 100.0
+        rows.append({
+            "name": name,
+            "baseline": base["median"],
+            "current": cur["median"],
+            "change_pct": round(change, 1),
+            "regression": change > max_regression_pct,
+        })
+    return rows
+
+
+def _print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    for name, r in results.items():
+        extra = f"  {r['mb_per_s']:8.2f} MB/s" if "mb_per_s" in r else ""
+        print(f"[bench] {name:38s} mediana={r['median'] * 1000:10.3f} ms  p95={r['p95'] * 1000:10.3f} ms  n={r['runs']}{extra}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de inferencia y entrenamiento de FTE-AI")
+    parser.add_argument("--data", default="data/dataset_competencias.csv", help="CSV del que se arman los CVs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=CV_SIZES_KB, help="Tamaños de CV en KB")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--train-data", nargs="*", default=None, help="CSV para train.main (por defecto data/*.csv)")
+    parser.add_argument("--skip-train", action="store_true", help="No medir train.main")
+    parser.add_argument("--quick", action="store_true", help="Corrida corta: menos repeticiones, sin 200 KB ni entrenamiento")
+    parser.add_argument("--output", "-o", help="Archivo JSON donde guardar los resultados")
+    parser.add_argument("--compare", help="JSON de una corrida previa contra el que comparar")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="Empeoramiento máximo admitido (%%)")
+    args = parser.parse_args(argv)
+    os.chdir(ROOT)
+    # se mide el modelo, no las caches (antes de importar app.core.config): cada medida repite el
+    # mismo participanteId y CV, que con la cache de CVs vectorizados solo pagaría los talleres
+    os.environ["RESULT_CACHE_SIZE"] = "0"
+    os.environ["PROFILE_FEATURE_CACHE_SIZE"] = "0"
+    os.environ["PROFILE_DB_PATH"] = ""
+
+    repeat, sizes = args.repeat, args.sizes
+    if args.quick:
+        repeat, sizes, args.skip_train = min(repeat, 5), [s for s in sizes if s <= 50], True
+
+    texts = load_corpus(args.data)
+    results: Dict[str, Dict[str, Any]] = {}
+    results.update(bench_model_load(max(3, repeat // 4)))
+    results.update(bench_inference(texts, sizes, repeat))
+    results.update(bench_pii(texts, repeat))
+    if not args.skip_train:
+        results.update(bench_train(args.train_data or sorted(glob.glob("data/*.csv"))))
+    _print_results(results)
+
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        print(f"[bench] resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        rows = compare(report, baseline, args.max_regression)
+        for row in rows:
+            flag = "REGRESIÓN" if row["regression"] else "ok"
+            print(f"[compare] {row['name']:38s} {row['baseline'] * 1000:10.3f} -> {row['current'] * 1000:10.3f} ms  "
+                  f"{row['change_pct']:+7.1f}%  {flag}")
+        regressions = [row["name"] for row in rows if row["regression"]]
+        if regressions:
+            print(f"[compare] {len(regressions)} benchmark(s) empeoraron más de {args.max_regression}%: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,7 +21,7 @@ def main():
     parser = argparse.ArgumentParser(description="Ejecutar pruebas del microservicio FTE-AI")
     parser.add_argument(
         "--type",
-        choices=["unit", "integration", "model", "all"],
+        choices=["unit", "integration", "model", "bench", "all"],
         default="all",
         help="Tipo de pruebas a ejecutar"
     )
@@ -40,9 +40,38 @@ def main():
         "--markers",
         help="Filtrar por marcadores (ej: 'unit and not slow')"
     )
+    parser.add_argument(
+        "--quick",
+        action="store_true",
+        help="Benchmarks: corrida corta (sin CVs de 200 KB ni entrenamiento)"
+    )
+    parser.add_argument(
+        "--output",
+        help="Benchmarks: archivo JSON de resultados"
+    )
+    parser.add_argument(
+        "--compare",
+        help="Benchmarks: JSON de una corrida previa; falla si hay regresiones"
+    )
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=10.0,
+        help="Benchmarks: empeoramiento máximo admitido en %% (default 10)"
+    )
     
     args = parser.parse_args()
     
+    if args.type == "bench":
+        cmd = [sys.executable, "benchmarks/run_benchmarks.py", "--max-regression", str(args.max_regression)]
+        if args.quick:
+            cmd.append("--quick")
+        if args.output:
+            cmd.extend(["--output", args.output])
+        if args.compare:
+            cmd.extend(["--compare", args.compare])
+        sys.exit(run_command(cmd))
+    
     cmd = ["pytest"]
     
     if args.type == "unit":
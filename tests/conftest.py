@@ -11,6 +11,13 @@ from typing import Dict, List, Any
 # Agregar el directorio raíz al path para imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+# Cola de trabajos masivos en memoria: las pruebas no dejan una base SQLite en data/
+os.environ.setdefault("JOB_DB_PATH", "")
+# Almacén de perfiles deshabilitado salvo en las pruebas que instalan uno propio
+os.environ.setdefault("PROFILE_DB_PATH", "")
+# Extracción de documentos en hilos: las pruebas reemplazan extract_text por funciones locales
+os.environ.setdefault("DOCUMENT_EXECUTOR", "thread")
+
 @pytest.fixture
 def sample_cv_text():
     """CV de ejemplo para pruebas."""
@@ -77,3 +84,66 @@ def reset_model_cache():
     yield
     load_model.cache_clear()
 
+@pytest.fixture(autouse=True)
+def reset_result_cache():
+    """Vacía la cache de resultados de inferencia antes de cada prueba."""
+    from app.core.cache import result_cache
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+@pytest.fixture(autouse=True)
+def reset_feature_cache():
+    """Vacía la cache de CVs vectorizados por participante antes de cada prueba."""
+    from app.services.analysis_service import cv_feature_cache
+    cv_feature_cache.clear()
+    yield
+    cv_feature_cache.clear()
+
+@pytest.fixture(autouse=True)
+def reset_document_cache():
+    """Vacía la cache de textos extraídos de PDF/DOCX antes de cada prueba."""
+    from app.services.document_service import document_cache
+    document_cache.clear()
+    yield
+    document_cache.clear()
+
+@pytest.fixture
+def make_pdf():
+    """Arma un PDF mínimo con una línea de texto por página."""
+    def build(pages: List[str]) -> bytes:
+        objects: List[bytes] = [b"<< /Type /Catalog /Pages 2 0 R >>", b"",
+                                b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+        kids = []
+        for text in pages:
+            stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+            objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+            objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                           b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+            kids.append(b"%d 0 R" % len(objects))
+        objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+        out = bytearray(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+        out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+        return bytes(out)
+    return build
+
+@pytest.fixture
+def make_docx():
+    """Arma un DOCX con un párrafo por línea."""
+    def build(paragraphs: List[str]) -> bytes:
+        import io
+        from docx import Document
+        document = Document()
+        for paragraph in paragraphs:
+            document.add_paragraph(paragraph)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        return buffer.getvalue()
+    return build
@@ -4,6 +4,7 @@ Valida el flujo completo desde el payload hasta la respuesta.
 """
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+import numpy as np
 from app.services.analysis_service import analyze_participant_profile
 from app.routes.analyze_routes import AnalyzeInput, TallerLite
 
@@ -150,3 +151,61 @@ class TestAnalysisServiceIntegration:
         
         assert result["meta"]["mode"] == "ml"
 
+
+
+class TestAnalysisBatchIntegration:
+    """Pruebas de integración del perfilado por lotes."""
+
+    def _payloads(self):
+        return [
+            AnalyzeInput(participanteId="b-1", cvTexto="Analista con SQL, Power BI y Excel",
+                         talleres=[TallerLite(tema="sql", asistencia_pct=1.0)]),
+            AnalyzeInput(participanteId="b-2", cvTexto="Desarrollador con Docker y Kubernetes"),
+            AnalyzeInput(participanteId="b-3", talleres=[TallerLite(tema="hse", asistencia_pct=0.9)]),
+        ]
+
+    def test_batch_matches_single_requests(self):
+        """Verifica que el lote devuelva lo mismo que llamadas individuales y en el mismo orden."""
+        from app.services.analysis_service import analyze_participant_profiles_batch
+
+        payloads = self._payloads()
+        batch = analyze_participant_profiles_batch(payloads)
+
+        assert [r["participanteId"] for r in batch["resultados"]] == ["b-1", "b-2", "b-3"]
+        for payload, result in zip(payloads, batch["resultados"]):
+            assert result == analyze_participant_profile(payload)
+        assert batch["meta"] == {"total": 3, "ok": 3, "errores": 0}
+
+    @patch('app.services.analysis_service.load_model')
+    def test_batch_uses_single_model_call(self, mock_load_model):
+        """Verifica que todo el lote se resuelva con una sola llamada a predict_proba."""
+        from app.services.analysis_service import analyze_participant_profiles_batch
+
+        mock_pipeline = Mock()
+        mock_pipeline.predict_proba.return_value = np.array([[0.9, 0.1], [0.2, 0.8], [0.5, 0.5]])
+        mock_load_model.return_value = (mock_pipeline, ["Comp1", "Comp2"], {"best_threshold": 0.3})
+
+        batch = analyze_participant_profiles_batch(self._payloads())
+
+        mock_pipeline.predict_proba.assert_called_once()
+        assert len(mock_pipeline.predict_proba.call_args[0][0]) == 3
+        assert batch["resultados"][0]["competencias"][0]["competencia"] == "Comp1"
+        assert batch["resultados"][1]["competencias"][0]["competencia"] == "Comp2"
+
+    @patch('app.services.analysis_service._build_text_for_model')
+    def test_batch_reports_item_errors(self, mock_build_text):
+        """Verifica que un participante con error no haga fallar al lote."""
+        from app.services.analysis_service import analyze_participant_profiles_batch
+
+        def build(cv_text, talleres):
+            if cv_text and "Docker" in cv_text:
+                raise ValueError("texto inválido")
+            return (cv_text or "").lower()
+        mock_build_text.side_effect = build
+
+        batch = analyze_participant_profiles_batch(self._payloads())
+
+        assert batch["resultados"][1] == {"participanteId": "b-2", "error": "texto inválido"}
+        assert "competencias" in batch["resultados"][0]
+        assert "competencias" in batch["resultados"][2]
+        assert batch["meta"]["errores"] == 1
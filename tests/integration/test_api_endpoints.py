@@ -2,9 +2,11 @@
 Pruebas de integración para los endpoints de la API.
 Utiliza TestClient de FastAPI para pruebas end-to-end.
 """
+import time
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
+from app.core.config import settings
 from app.main import app
 
 
@@ -92,3 +94,524 @@ class TestAnalyzeEndpoints:
         data = response.json()
         assert data["meta"]["mode"] == "rules"
 
+    def test_analyze_profile_batch_endpoint(self, client):
+        """Verifica que /analyze/profile/batch devuelva un resultado por participante y en orden."""
+        payload = {
+            "participantes": [
+                {"participanteId": "lote-1", "cvTexto": "Analista con SQL y Power BI"},
+                {"participanteId": "lote-2", "talleres": [{"tema": "docker", "asistencia_pct": 1.0}]},
+            ]
+        }
+
+        response = client.post("/analyze/profile/batch", json=payload)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["participanteId"] for r in data["resultados"]] == ["lote-1", "lote-2"]
+        assert all("competencias" in r for r in data["resultados"])
+        assert data["meta"]["total"] == 2
+
+    def test_analyze_profile_batch_endpoint_rejects_empty(self, client):
+        """Verifica que un lote vacío sea rechazado por validación."""
+        response = client.post("/analyze/profile/batch", json={"participantes": []})
+
+        assert response.status_code == 422
+
+
+
+class TestJobEndpoints:
+    """Pruebas para los endpoints de análisis de puestos."""
+
+    def test_analyze_job_batch_endpoint(self, client):
+        """Verifica que /analyze/job/batch devuelva un resultado por puesto respetando topK."""
+        payload = {
+            "puestos": [
+                {"puestoTexto": "Atención al cliente y manejo de caja", "topK": 2},
+                {"puestoTexto": "Contabilidad, conciliaciones y facturación"},
+            ]
+        }
+
+        response = client.post("/analyze/job/batch", json=payload)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["resultados"]) == 2
+        assert len(data["resultados"][0]["competencias"]) <= 2
+        assert data["meta"]["total"] == 2
+
+    def test_analyze_job_batch_endpoint_validation(self, client):
+        """Verifica que se valide topK en cada puesto del lote."""
+        payload = {"puestos": [{"puestoTexto": "Ventas", "topK": 50}]}
+
+        response = client.post("/analyze/job/batch", json=payload)
+
+        assert response.status_code == 422
+
+
+class TestHealthEndpoints:
+    """Pruebas de liveness y readiness."""
+
+    def _wait_ready(self, client, timeout=10.0):
+        import time
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            response = client.get("/health/ready")
+            if response.json()["status"] != "starting":
+                return response
+            time.sleep(0.05)
+        return response
+
+    def test_ready_is_503_before_warmup(self, client):
+        """Verifica que /health/ready no reporte listo antes del warm-up."""
+        from app.ml.model_loader import mark_starting
+        mark_starting()
+
+        response = client.get("/health/ready")
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "starting"
+        assert client.get("/health").status_code == 200
+
+    def test_ready_after_startup_warmup(self):
+        """Verifica que el lifespan caliente el modelo y exponga tiempos y metadatos."""
+        with TestClient(app) as client:
+            response = self._wait_ready(client)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "ready"
+        assert data["load_seconds"] >= 0
+        assert data["artifact"]["classes"] > 0
+        assert data["artifact"]["version"]
+
+    def test_ready_reports_warmup_failure(self):
+        """Verifica que un fallo al cargar el modelo se reporte como no listo."""
+        with patch("app.main.warm_up_model", side_effect=FileNotFoundError("sin modelo")):
+            with TestClient(app) as client:
+                response = self._wait_ready(client)
+
+        assert response.status_code == 503
+        assert response.json()["status"] == "failed"
+        assert "sin modelo" in response.json()["error"]
+
+
+class TestAdminEndpoints:
+    """Pruebas de los endpoints de administración del modelo."""
+
+    def _auth(self):
+        import jwt
+        from app.core.config import settings
+        token = jwt.encode({"sub": "fte-api"}, settings.SERVICE_JWT_SECRET, algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+
+    def test_reload_requires_service_token(self, client):
+        """Verifica que la recarga del modelo exija el token de servicio."""
+        assert client.post("/admin/model/reload").status_code == 401
+        response = client.post("/admin/model/reload", headers={"Authorization": "Bearer invalido"})
+        assert response.status_code == 401
+
+    def test_reload_current_model(self, client):
+        """Verifica que la recarga valide el artefacto y devuelva su versión."""
+        response = client.post("/admin/model/reload", headers=self._auth())
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "reloaded"
+        assert data["artifact"]["classes"] > 0
+        assert data["artifact"]["version"]
+
+    def test_reload_in_process_mode_recycles_every_worker(self, client):
+        """Verifica que en modo procesos se reemplacen todos los workers y se actualice la readiness."""
+        from app.ml import model_loader
+
+        class ProcessExecutor:
+            kind, workers = "process", 4
+            recycled = []
+
+            async def run(self, fn, *args):
+                info = fn(*args)
+                return {**info, "artifact": {**info["artifact"], "version": "v-workers"}}
+
+            def recycle(self, model_path):
+                self.recycled.append(model_path)
+
+        executor = ProcessExecutor()
+        model_loader.mark_ready({"artifact": {"version": "v-anterior"}})
+        try:
+            with patch("app.routes.admin_routes.get_executor", return_value=executor):
+                response = client.post("/admin/model/reload", headers=self._auth())
+
+            assert response.status_code == 200
+            assert executor.recycled == [response.json()["artifact"]["path"]]
+            assert model_loader.readiness()["artifact"]["version"] == "v-workers"
+        finally:
+            model_loader.mark_starting()
+
+    def test_reload_rejects_path_outside_models_dir(self, client):
+        """Verifica que no se carguen artefactos fuera del directorio de modelos."""
+        response = client.post("/admin/model/reload", headers=self._auth(), json={"path": "/etc/passwd"})
+
+        assert response.status_code == 400
+
+    @patch("app.routes.admin_routes.reload_model")
+    def test_reload_rejected_model_returns_422(self, mock_reload, client):
+        """Verifica que un modelo que no pasa la validación responda 422."""
+        from app.ml.model_loader import ModelValidationError
+        mock_reload.side_effect = ModelValidationError("probabilidades fuera de [0, 1]")
+
+        response = client.post("/admin/model/reload", headers=self._auth())
+
+        assert response.status_code == 422
+        assert "rechazado" in response.json()["detail"]
+
+    def test_policy_update_and_reload(self, client):
+        """Verifica la consulta, la actualización parcial y la recarga de la política."""
+        from app.core.config import get_inference_policy, set_inference_policy
+        previous = get_inference_policy()
+        try:
+            response = client.put("/admin/policy", headers=self._auth(), json={"threshold": 0.5})
+            assert response.status_code == 200
+            assert response.json()["policy"]["threshold"] == 0.5
+            assert response.json()["policy"]["min_results"] == previous.min_results
+            assert client.get("/admin/policy", headers=self._auth()).json() == response.json()
+
+            response = client.post("/admin/policy/reload", headers=self._auth())
+            assert response.status_code == 200
+            assert response.json()["policy"]["threshold"] is None
+        finally:
+            set_inference_policy(previous)
+
+    def test_policy_update_rejects_invalid_values(self, client):
+        """Verifica que una política inválida responda 422 y no reemplace la vigente."""
+        from app.core.config import get_inference_policy
+        previous = get_inference_policy()
+
+        response = client.put("/admin/policy", headers=self._auth(), json={"min_prob_floor": 2})
+
+        assert response.status_code == 422
+        assert get_inference_policy() is previous
+
+
+class TestMetricsEndpoint:
+    """Pruebas del endpoint de métricas."""
+
+    @patch('app.services.job_service._predict_ml')
+    def test_metrics_exposes_requests_and_stages(self, mock_predict_ml, client):
+        """Verifica el formato de Prometheus con el request por plantilla de ruta y las etapas."""
+        mock_predict_ml.return_value = []
+        client.post("/analyze/job", json={"puestoTexto": "vendedor con excel", "topK": 3})
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        body = response.text
+        assert 'fte_http_requests_total{method="POST",route="/analyze/job",status="200"}' in body
+        assert 'fte_http_request_duration_seconds_bucket{method="POST",route="/analyze/job",le="+Inf"}' in body
+        assert 'fte_stage_duration_seconds_count{stage="keywords"}' in body
+        assert "# TYPE fte_http_requests_in_flight gauge" in body
+
+    def test_unknown_paths_share_one_series(self, client):
+        """Verifica que las URLs inexistentes no creen una serie por path."""
+        client.get("/no-existe-1")
+        client.get("/no-existe-2")
+
+        body = client.get("/metrics").text
+
+        assert 'route="unmatched",status="404"' in body
+        assert "no-existe" not in body
+
+
+class TestPayloadLimits:
+    """Pruebas de los límites de tamaño de las entradas."""
+
+    def test_long_text_returns_413(self, client, monkeypatch):
+        """Verifica 413 (no 422) para un texto por encima de MAX_TEXT_CHARS, también dentro de un lote."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MAX_TEXT_CHARS", 100)
+
+        single = client.post("/analyze/profile", json={"participanteId": "p-1", "cvTexto": "x" * 101})
+        batch = client.post("/analyze/job/batch", json={"puestos": [{"puestoTexto": "ok"}, {"puestoTexto": "y" * 500}]})
+
+        assert single.status_code == 413
+        assert batch.status_code == 413
+        assert batch.json()["detail"][0]["loc"] == ["body", "puestos", 1, "puestoTexto"]
+
+    @patch('app.services.job_service._predict_ml')
+    def test_text_at_limit_accepted(self, mock_predict_ml, client, monkeypatch):
+        """Verifica que un texto en el límite pase y que los demás errores sigan siendo 422."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MAX_TEXT_CHARS", 100)
+        mock_predict_ml.return_value = []
+
+        assert client.post("/analyze/job", json={"puestoTexto": "x" * 100}).status_code == 200
+        assert client.post("/analyze/job", json={"puestoTexto": "x", "topK": 99}).status_code == 422
+
+    def test_large_body_returns_413(self, client, monkeypatch):
+        """Verifica 413 por Content-Length y por cuerpo enviado en partes sin Content-Length."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MAX_REQUEST_BYTES", 50)
+
+        def chunks():
+            yield b'{"participanteId": "p-1", '
+            yield b'"cvTexto": "' + b"z" * 80 + b'"}'
+
+        declared = client.post("/analyze/profile", json={"participanteId": "p-1", "cvTexto": "z" * 80})
+        streamed = client.post("/analyze/profile", content=chunks(), headers={"Content-Type": "application/json"})
+
+        assert declared.status_code == 413
+        assert streamed.status_code == 413
+
+    def test_bulk_jobs_have_their_own_body_limit(self, client, monkeypatch):
+        """Verifica que POST /analyze/jobs use MAX_BULK_REQUEST_BYTES en lugar de MAX_REQUEST_BYTES."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "MAX_REQUEST_BYTES", 50)
+        monkeypatch.setattr(settings, "MAX_BULK_REQUEST_BYTES", 500)
+        puestos = [{"puestoTexto": "vendedor con excel"} for _ in range(3)]
+
+        with patch("app.routes.bulk_routes.get_job_queue") as get_queue:
+            get_queue.return_value.submit.return_value = {
+                "id": "j1", "kind": "job", "status": "queued", "total": 3, "processed": 0, "errors": 0,
+                "error": None, "created_at": 0.0, "started_at": None, "finished_at": None,
+            }
+            accepted = client.post("/analyze/jobs", json={"puestos": puestos})
+            too_large = client.post("/analyze/jobs", json={"puestos": puestos * 10})
+
+        assert accepted.status_code == 202
+        assert too_large.status_code == 413
+        assert client.post("/analyze/job/batch", json={"puestos": puestos}).status_code == 413
+
+
+class TestProfileUpload:
+    """Pruebas de la carga de CVs en PDF/DOCX."""
+
+    @patch('app.services.analysis_service._predict_with_ml')
+    def test_pdf_upload_analyzed_and_cached(self, mock_predict_ml, client, make_pdf):
+        """Verifica el análisis del texto extraído y que volver a subir el archivo use la cache."""
+        mock_predict_ml.return_value = []
+        pdf = make_pdf(["Analista de datos con SQL", "Experiencia en Excel"])
+        form = {"participanteId": "up-1", "talleres": '[{"tema": "excel", "asistencia_pct": 0.9}]'}
+
+        first = client.post("/analyze/profile/upload", data=form, files={"file": ("cv.pdf", pdf, "application/pdf")})
+        second = client.post("/analyze/profile/upload", data=form, files={"file": ("otro.pdf", pdf, "application/pdf")})
+
+        assert first.status_code == 200
+        assert first.json()["participanteId"] == "up-1"
+        assert first.json()["meta"]["documento"]["pages"] == 2
+        assert first.json()["meta"]["documento"]["cached"] is False
+        assert second.json()["meta"]["documento"]["cached"] is True
+        cv_text, talleres = mock_predict_ml.call_args[0][:2]
+        assert cv_text == "Analista de datos con SQL\nExperiencia en Excel"
+        assert talleres == [{"tema": "excel", "asistencia_pct": 0.9}]
+
+    def test_docx_upload(self, client, make_docx):
+        """Verifica el análisis de un DOCX."""
+        docx = make_docx(["Analista de datos", "Power BI y SQL"])
+
+        response = client.post("/analyze/profile/upload", data={"participanteId": "up-2"}, files={"file": ("cv.docx", docx)})
+
+        assert response.status_code == 200
+        assert response.json()["meta"]["documento"]["format"] == "docx"
+
+    def test_unsupported_and_unreadable_files(self, client):
+        """Verifica 415 para otros formatos y 422 para documentos ilegibles o talleres inválidos."""
+        form = {"participanteId": "up-3"}
+
+        assert client.post("/analyze/profile/upload", data=form, files={"file": ("cv.txt", b"hola")}).status_code == 415
+        assert client.post("/analyze/profile/upload", data=form, files={"file": ("cv.pdf", b"%PDF-1.4 basura")}).status_code == 422
+        assert client.post("/analyze/profile/upload", data={**form, "talleres": "no es json"},
+                           files={"file": ("cv.pdf", b"%PDF-1.4")}).status_code == 422
+
+    def test_extraction_timeout_covers_whole_document(self, client, make_pdf):
+        """Verifica 422 cuando la extracción completa supera UPLOAD_EXTRACT_TIMEOUT_SECONDS, aunque no avance de página."""
+        def stuck_extraction(data, fmt):
+            time.sleep(0.5)
+
+        with patch("app.routes.analyze_routes.extract_text", stuck_extraction), \
+                patch.object(settings, "UPLOAD_EXTRACT_TIMEOUT_SECONDS", 0.05):
+            response = client.post("/analyze/profile/upload", data={"participanteId": "up-4"},
+                                   files={"file": ("cv.pdf", make_pdf(["Analista"]), "application/pdf")})
+
+        assert response.status_code == 422
+        assert "superó" in response.json()["detail"]
+
+
+class TestBulkJobs:
+    """Pruebas de la cola de análisis masivos."""
+
+    @pytest.fixture
+    def jobs_client(self):
+        from app.core.job_queue import JobQueue, set_job_queue
+        set_job_queue(JobQueue(""))
+        with TestClient(app) as client:
+            yield client
+        set_job_queue(None)
+
+    @patch('app.services.job_service._predict_ml_batch')
+    def test_job_postings_processed_and_streamed(self, mock_predict_ml_batch, jobs_client):
+        """Verifica 202 con el id, el progreso hasta terminar y los resultados en NDJSON."""
+        import json
+        mock_predict_ml_batch.side_effect = lambda textos, top_ks, policy=None: [[] for _ in textos]
+        puestos = [{"puestoTexto": f"vendedor con excel {i}", "topK": 3} for i in range(5)]
+
+        created = jobs_client.post("/analyze/jobs", json={"puestos": puestos})
+        assert created.status_code == 202
+        job_id = created.json()["jobId"]
+        assert created.headers["Location"] == f"/analyze/jobs/{job_id}"
+
+        stream = jobs_client.get(f"/analyze/jobs/{job_id}/results", params={"follow": "true"})
+        assert stream.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in stream.text.splitlines()]
+        assert [line["index"] for line in lines] == list(range(5))
+        assert lines[0]["meta"]["mode"] == "keywords"
+
+        status = jobs_client.get(f"/analyze/jobs/{job_id}", params={"limit": 2}).json()
+        assert (status["estado"], status["procesados"], status["progreso"]) == ("done", 5, 1.0)
+        assert len(status["resultados"]) == 2
+
+    def test_routes_run_off_the_event_loop(self):
+        """Verifica que las rutas que consultan SQLite sean sincrónicas (FastAPI las corre en su threadpool)."""
+        import inspect
+        from app.routes import bulk_routes
+
+        for route in (bulk_routes.create_bulk_job, bulk_routes.get_bulk_job, bulk_routes.stream_bulk_job_results):
+            assert not inspect.iscoroutinefunction(route)
+
+    def test_invalid_requests(self, jobs_client):
+        """Verifica 422 sin ítems o con ambos tipos y 404 para un id inexistente."""
+        assert jobs_client.post("/analyze/jobs", json={}).status_code == 422
+        assert jobs_client.post("/analyze/jobs", json={"participantes": [{"participanteId": "a"}],
+                                                       "puestos": [{"puestoTexto": "x"}]}).status_code == 422
+        assert jobs_client.get("/analyze/jobs/no-existe").status_code == 404
+
+
+class TestNdjsonBatches:
+    """Pruebas de las respuestas NDJSON de los endpoints por lote."""
+
+    @patch('app.services.job_service._predict_ml_batch')
+    def test_job_batch_streams_micro_batches(self, mock_predict_ml_batch, client, monkeypatch):
+        """Verifica una línea por puesto, en orden, calculadas de a STREAM_BATCH_SIZE."""
+        import json
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "STREAM_BATCH_SIZE", 2)
+        mock_predict_ml_batch.side_effect = lambda textos, top_ks, policy=None: [[] for _ in textos]
+        puestos = [{"puestoTexto": f"vendedor con excel {i}", "topK": 3} for i in range(5)]
+
+        response = client.post("/analyze/job/batch", json={"puestos": puestos}, headers={"Accept": "application/x-ndjson"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["index"] for line in lines] == list(range(5))
+        assert all(line["meta"]["mode"] == "keywords" for line in lines)
+        assert [len(call.args[0]) for call in mock_predict_ml_batch.call_args_list] == [2, 2, 1]
+
+    @patch('app.services.analysis_service._predict_with_ml_batch')
+    def test_profile_batch_streams_results(self, mock_predict_batch, client, monkeypatch):
+        """Verifica el NDJSON de perfiles y que sin el header se mantenga la respuesta JSON."""
+        import json
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "STREAM_BATCH_SIZE", 2)
+        mock_predict_batch.side_effect = lambda texts, policy=None: [[] for _ in texts]
+        participantes = [{"participanteId": f"p-{i}", "cvTexto": "Analista con SQL"} for i in range(3)]
+
+        streamed = client.post("/analyze/profile/batch", json={"participantes": participantes},
+                               headers={"Accept": "application/x-ndjson"})
+        plain = client.post("/analyze/profile/batch", json={"participantes": participantes})
+
+        lines = [json.loads(line) for line in streamed.text.splitlines()]
+        assert [(line["index"], line["participanteId"]) for line in lines] == [(0, "p-0"), (1, "p-1"), (2, "p-2")]
+        assert plain.headers["content-type"] == "application/json"
+        assert plain.json()["meta"]["total"] == 3
+
+
+class TestProfileStoreEndpoints:
+    """Pruebas del almacén de perfiles: /analyze/profile sin recálculo y GET /profile/{participanteId}."""
+
+    PAYLOAD = {"participanteId": "store-1", "cvTexto": "Analista de datos con SQL y Excel",
+               "talleres": [{"tema": "excel", "asistencia_pct": 0.9}]}
+
+    @pytest.fixture
+    def store(self):
+        from app.core.profile_store import ProfileStore, set_profile_store
+        store = ProfileStore(":memory:")
+        set_profile_store(store)
+        yield store
+        set_profile_store(None)
+
+    def test_unchanged_inputs_skip_the_model(self, client, store):
+        """Verifica que repetir el análisis con las mismas entradas no vuelva al modelo."""
+        first = client.post("/analyze/profile", json=self.PAYLOAD)
+        with patch("app.routes.analyze_routes.analyze_participant_profile", side_effect=AssertionError) as analyze:
+            second = client.post("/analyze/profile", json=self.PAYLOAD)
+
+        assert not analyze.called
+        assert second.json() == first.json()
+        assert store.get("store-1")["version"] == 1
+
+    def test_changed_inputs_or_model_recompute(self, client, store):
+        """Verifica una versión nueva al cambiar los talleres o el modelo en uso."""
+        client.post("/analyze/profile", json=self.PAYLOAD)
+        client.post("/analyze/profile", json={**self.PAYLOAD, "talleres": [{"tema": "python", "asistencia_pct": 1.0}]})
+        assert store.get("store-1")["version"] == 2
+
+        with patch("app.routes.analyze_routes.serving_model_version", return_value="otro-modelo"):
+            recomputed = client.post("/analyze/profile", json={**self.PAYLOAD, "talleres": [{"tema": "python", "asistencia_pct": 1.0}]})
+        # se guarda la versión del modelo que calculó el perfil
+        assert store.get("store-1")["model_version"] == recomputed.json()["meta"]["modelVersion"]
+
+        versions = client.get("/profile/store-1/versions").json()["versiones"]
+        assert [v["version"] for v in versions] == [3, 2, 1]
+
+    def test_version_reported_by_process_worker(self, client, store, monkeypatch):
+        """Verifica que en modo procesos se guarde y se adopte la versión del worker que recargó antes que el proceso principal."""
+        from app.ml import model_loader
+        monkeypatch.setattr(model_loader, "_reported_version", None)
+        monkeypatch.setattr(model_loader, "_retired_versions", set())
+        monkeypatch.setattr(model_loader, "_status", dict(model_loader._status))
+
+        class ProcessExecutor:
+            kind = "process"
+            workers = 1
+
+            def stats(self):
+                return {"in_flight": 0}
+
+            async def run(self, fn, *args):
+                return {"participanteId": "store-1", "competencias": [], "meta": {"mode": "ml", "modelVersion": "worker-v2"}}
+
+        with patch("app.routes.analyze_routes.get_executor", return_value=ProcessExecutor()), \
+                patch("app.core.micro_batch.get_executor", return_value=ProcessExecutor()):
+            client.post("/analyze/profile", json=self.PAYLOAD)
+        assert store.get("store-1")["model_version"] == "worker-v2"
+        assert model_loader.serving_model_version() == "worker-v2"
+
+        with patch("app.routes.analyze_routes.analyze_participant_profile", side_effect=AssertionError) as analyze:
+            client.post("/analyze/profile", json=self.PAYLOAD)
+        assert not analyze.called
+
+        # una recarga retira la versión: un resultado atrasado no la vuelve a fijar
+        model_loader.mark_ready({"previous_version": "worker-v2", "artifact": {"version": "v3"}})
+        model_loader.note_model_version("worker-v2")
+        assert model_loader.serving_model_version() == "v3"
+
+    def test_get_profile_with_etag(self, client, store):
+        """Verifica el perfil servido desde el almacén, el ETag y el 304 con If-None-Match."""
+        computed = client.post("/analyze/profile", json=self.PAYLOAD).json()
+
+        response = client.get("/profile/store-1")
+        assert response.status_code == 200
+        assert response.json()["competencias"] == computed["competencias"]
+        assert response.json()["meta"]["snapshot"]["version"] == 1
+        etag = response.headers["ETag"]
+
+        not_modified = client.get("/profile/store-1", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == etag
+        assert client.get("/profile/store-1", headers={"If-None-Match": '"otro"'}).status_code == 200
+        assert client.get("/profile/no-existe").status_code == 404
+
+    def test_disabled_store(self, client):
+        """Verifica que sin PROFILE_DB_PATH el análisis funcione y GET /profile responda 404."""
+        assert client.post("/analyze/profile", json=self.PAYLOAD).status_code == 200
+        assert client.get("/profile/store-1").status_code == 404
@@ -0,0 +1,82 @@
+"""
+Pruebas de integración para el servicio de análisis de puestos.
+Valida el análisis individual y por lotes de descripciones de puesto.
+"""
+import pytest
+from unittest.mock import Mock, patch
+import numpy as np
+from app.services.job_service import (
+    KEYWORDS_MAP,
+    _predict_keywords,
+    analyze_job_requirements,
+    analyze_job_requirements_batch,
+)
+
+
+PUESTOS = [
+    ("Necesitamos alguien para atención al cliente, caja y reclamos con manejo de excel", 6),
+    ("Asistente contable para conciliaciones, facturación y flujo de caja", 3),
+    ("Técnico de mantenimiento preventivo y correctivo en planta de producción", 10),
+]
+
+
+class TestJobBatchIntegration:
+    """Pruebas del análisis de puestos por lotes."""
+
+    def test_batch_matches_single_requests(self):
+        """Verifica que el lote devuelva lo mismo que llamadas individuales, con topK por puesto."""
+        batch = analyze_job_requirements_batch(PUESTOS)
+
+        assert len(batch["resultados"]) == len(PUESTOS)
+        for (texto, top_k), result in zip(PUESTOS, batch["resultados"]):
+            assert result == analyze_job_requirements(texto, top_k=top_k)
+            assert len(result["competencias"]) <= top_k
+        assert batch["meta"] == {"total": 3, "ok": 3, "errores": 0}
+
+    @patch('app.services.job_service.load_model')
+    def test_batch_uses_single_model_call(self, mock_load_model):
+        """Verifica que todos los puestos se vectoricen en una sola llamada a predict_proba."""
+        mock_pipeline = Mock()
+        mock_pipeline.predict_proba.return_value = np.array([[0.9, 0.1]] * len(PUESTOS))
+        mock_load_model.return_value = (mock_pipeline, ["Comp1", "Comp2"], {"best_threshold": 0.3})
+
+        batch = analyze_job_requirements_batch(PUESTOS)
+
+        mock_pipeline.predict_proba.assert_called_once()
+        assert len(mock_pipeline.predict_proba.call_args[0][0]) == len(PUESTOS)
+        assert all(r["meta"]["mode"] == "ml+keywords" for r in batch["resultados"])
+
+    @patch('app.services.job_service._merge_job_results')
+    def test_batch_reports_item_errors(self, mock_merge):
+        """Verifica que un puesto con error no haga fallar al lote."""
+        def merge(texto, ml_results, top_k, policy=None):
+            if "contable" in texto:
+                raise ValueError("fallo puntual")
+            return {"competencias": ml_results, "meta": {"mode": "ml+keywords"}}
+        mock_merge.side_effect = merge
+
+        batch = analyze_job_requirements_batch(PUESTOS)
+
+        assert batch["resultados"][1] == {"error": "fallo puntual"}
+        assert batch["meta"]["errores"] == 1
+
+
+class TestKeywordMatching:
+    """Pruebas del fallback por keywords."""
+
+    def test_matches_space_delimited_keywords(self):
+        """Verifica que solo cuenten keywords delimitadas por espacios, incluidas las de varias palabras."""
+        result = _predict_keywords("manejo de flujo de caja y orden de compra con proveedores", 0)
+        names = {r["competencia"] for r in result}
+
+        assert {"Finanzas", "Compras", "Atención al Cliente"} <= names
+
+    def test_ignores_partial_words(self):
+        """Verifica que no haya coincidencias dentro de otras palabras."""
+        assert _predict_keywords("cajas comerciales", 0) == []
+
+    @pytest.mark.parametrize("kw", list(KEYWORDS_MAP))
+    def test_every_keyword_is_detected(self, kw):
+        """Verifica que cada keyword del diccionario se detecte en un texto."""
+        result = _predict_keywords(f"requisito: {kw} indispensable", 0)
+        assert KEYWORDS_MAP[kw] in {r["competencia"] for r in result}
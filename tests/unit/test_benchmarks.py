@@ -0,0 +1,40 @@
+"""
+Pruebas unitarias de la suite de benchmarks.
+Valida el resumen de tiempos y la detección de regresiones del modo comparación.
+"""
+from benchmarks.run_benchmarks import compare, measure
+
+
+def _report(**medians):
+    return {"results": {name: {"median": median} for name, median in medians.items()}}
+
+
+class TestBenchmarkSuite:
+    """Pruebas de las utilidades de la suite."""
+
+    def test_measure_summary(self):
+        """Verifica que el resumen incluya las repeticiones pedidas y estadísticos ordenados."""
+        calls = []
+
+        stats = measure(lambda: calls.append(1), repeat=5, warmup=2)
+
+        assert len(calls) == 7
+        assert stats["runs"] == 5
+        assert stats["min"] <= stats["median"] <= stats["p95"]
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        """Verifica que solo se marquen los benchmarks que empeoran más del porcentaje admitido."""
+        baseline = _report(a=1.0, b=1.0, c=1.0)
+        current = _report(a=1.05, b=1.2, c=0.5)
+
+        rows = {row["name"]: row for row in compare(current, baseline, max_regression_pct=10)}
+
+        assert not rows["a"]["regression"]
+        assert rows["b"]["regression"] and rows["b"]["change_pct"] == 20.0
+        assert not rows["c"]["regression"]
+
+    def test_compare_skips_missing_benchmarks(self):
+        """Verifica que los benchmarks ausentes en una de las corridas no cuenten."""
+        rows = compare(_report(a=1.0), _report(a=1.0, train=10.0), max_regression_pct=10)
+
+        assert [row["name"] for row in rows] == ["a"]
@@ -0,0 +1,234 @@
+"""
+Pruebas unitarias del formato compacto del modelo.
+Valida que reproduzca al pipeline de sklearn y que se cargue mapeado en memoria.
+"""
+import os
+import joblib
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+
+from app.ml.compact_model import CompactModel, compact_path_for, export_compact, load_compact
+from app.ml.model_loader import DEFAULT_MODEL_PATH, load_model
+
+TEXTOS = [
+    "Ingeniero electromecánico con experiencia en HSE, gestión de calidad y análisis de datos.",
+    "Desarrollador Python y SQL; despliegue con Docker y Kubernetes. topic:python topic:sql",
+    "Atención al cliente, manejo de reclamos y CRM. Excel avanzado, Power BI.",
+    "ÁRBOL Ñandú İstanbul ﬁnanzas straße — acentos y ligaduras",
+    "de la que el en y a los",
+    "",
+]
+
+
+@pytest.fixture(scope="module")
+def artifact():
+    return joblib.load(DEFAULT_MODEL_PATH)
+
+
+@pytest.fixture(scope="module")
+def compact_dir(artifact, tmp_path_factory):
+    out = str(tmp_path_factory.mktemp("modelo") / "pipeline.compact")
+    return export_compact(artifact["pipeline"], artifact["classes"], artifact["metadata"], out)
+
+
+class TestCompactModel:
+    """Pruebas de equivalencia y carga del artefacto compacto."""
+
+    def test_matches_sklearn_pipeline(self, artifact, compact_dir):
+        """Verifica que las probabilidades coincidan con el pipeline dentro de 1e-9."""
+        model = load_compact(compact_dir)
+
+        expected = artifact["pipeline"].predict_proba(TEXTOS)
+        np.testing.assert_allclose(model.predict_proba(TEXTOS), expected, rtol=0, atol=1e-9)
+
+    def test_tfidf_matches_vectorizer(self, artifact, compact_dir):
+        """Verifica que la matriz TF-IDF sea la del vectorizador (columnas en orden alfabético)."""
+        model = load_compact(compact_dir)
+        vectorizer = artifact["pipeline"].steps[0][1]
+
+        expected = vectorizer.transform(TEXTOS).toarray()
+        order = np.argsort(vectorizer.get_feature_names_out())
+        np.testing.assert_allclose(model.transform(TEXTOS).toarray(), expected[:, order], atol=1e-12)
+
+    def test_compact_model_keeps_no_private_vocabulary(self, artifact, compact_dir):
+        """Verifica que el modelo mapeado busque en el vocabulario compartido y cuente igual que el índice en memoria."""
+        model = load_compact(compact_dir)
+        in_memory = CompactModel.from_pipeline(artifact["pipeline"], artifact["classes"], artifact["metadata"])
+
+        assert model._index is None
+        for texto in TEXTOS:
+            terms = model.analyze(texto)
+            assert model.term_counts(terms) == in_memory.term_counts(terms)
+
+    def test_arrays_are_memory_mapped(self, compact_dir):
+        """Verifica que los pesos se abran con mmap y en solo lectura."""
+        model = load_compact(compact_dir)
+
+        assert isinstance(model.coef, np.memmap)
+        assert not model.coef.flags.writeable
+        assert model.coef.shape == (len(model.vocab), len(model.classes))
+
+    def test_keeps_classes_and_metadata(self, artifact, compact_dir):
+        """Verifica que el artefacto conserve clases y umbral del entrenamiento."""
+        model = load_compact(compact_dir)
+
+        assert model.classes == list(artifact["classes"])
+        assert model.metadata["best_threshold"] == artifact["metadata"]["best_threshold"]
+
+    def test_model_loader_accepts_compact_dir(self, compact_dir):
+        """Verifica que load_model cargue el directorio compacto con su propia versión."""
+        model, classes, metadata = load_model(compact_dir)
+
+        assert isinstance(model, CompactModel)
+        assert len(classes) == model.coef.shape[1]
+        assert metadata["artifact_version"]
+
+    def test_export_replaces_existing_artifact(self, artifact, compact_dir, tmp_path):
+        """Verifica que reexportar sobre un directorio existente lo reemplace completo."""
+        out = str(tmp_path / "modelo.compact")
+        export_compact(artifact["pipeline"], artifact["classes"], {"best_threshold": 0.4}, out)
+        export_compact(artifact["pipeline"], artifact["classes"], {"best_threshold": 0.5}, out)
+
+        assert load_compact(out).metadata["best_threshold"] == 0.5
+        assert sorted(os.listdir(tmp_path)) == ["modelo.compact"]
+
+    def test_rejects_unsupported_pipeline(self, tmp_path):
+        """Verifica que se rechacen pipelines que el formato no puede reproducir."""
+        with pytest.raises(ValueError):
+            export_compact(CountVectorizer(), [], {}, str(tmp_path / "x.compact"))
+
+    def test_constant_class_exported(self, tmp_path):
+        """Verifica que una clase constante en el entrenamiento (sin regresión propia) se exporte."""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.multiclass import OneVsRestClassifier
+        from sklearn.pipeline import Pipeline
+
+        docs = ["excel sql datos", "python docker", "ventas clientes", "excel ventas"]
+        # la tercera etiqueta está en todos los documentos y la cuarta en ninguno
+        y = np.array([[1, 0, 1, 0], [0, 1, 1, 0], [0, 0, 1, 0], [1, 0, 1, 0]])
+        pipeline = Pipeline([
+            ("tfidf", TfidfVectorizer()),
+            ("clf", OneVsRestClassifier(LogisticRegression(solver="liblinear"))),
+        ]).fit(docs, y)
+
+        model = load_compact(export_compact(pipeline, ["a", "b", "c", "d"], {}, str(tmp_path / "c.compact")))
+
+        proba = model.predict_proba(docs + ["sin vocabulario"])
+        np.testing.assert_allclose(proba, pipeline.predict_proba(docs + ["sin vocabulario"]), atol=1e-12)
+        assert proba[:, 2].tolist() == [1.0] * 5 and proba[:, 3].tolist() == [0.0] * 5
+
+    def test_compact_path_for(self):
+        """Verifica la ruta del artefacto compacto junto al joblib."""
+        assert compact_path_for("models/pipeline_competencias.joblib") == "models/pipeline_competencias.compact"
+
+
+class TestSharedCompactModel:
+    """Pruebas del modo compartido entre workers (MODEL_SHARED_DIR)."""
+
+    @pytest.fixture
+    def shared_dir(self, tmp_path, monkeypatch):
+        from app.core.config import settings
+        shared = str(tmp_path / "shm")
+        monkeypatch.setattr(settings, "MODEL_SHARED_DIR", shared)
+        return shared
+
+    def test_load_model_maps_shared_export(self, shared_dir, artifact):
+        """Verifica que en modo compartido se cargue el artefacto compacto exportado al directorio."""
+        model, classes, _ = load_model()
+
+        assert isinstance(model, CompactModel)
+        assert os.path.dirname(model.coef.filename) in [
+            os.path.join(shared_dir, name) for name in os.listdir(shared_dir)
+        ]
+        assert classes == list(artifact["classes"])
+        np.testing.assert_allclose(
+            model.predict_proba(TEXTOS), artifact["pipeline"].predict_proba(TEXTOS), rtol=0, atol=1e-9
+        )
+
+    def test_export_happens_once_per_version(self, shared_dir):
+        """Verifica que los siguientes workers reutilicen el mismo export sin volver a generarlo."""
+        from unittest.mock import patch
+        first, _, _ = load_model()
+        load_model.cache_clear()
+
+        with patch("app.ml.compact_model.export_compact") as mock_export:
+            second, _, _ = load_model()
+
+        mock_export.assert_not_called()
+        assert second.coef.filename == first.coef.filename
+
+    def test_new_version_replaces_previous_export(self, shared_dir, artifact, tmp_path):
+        """Verifica que al exportar una versión nueva se eliminen las anteriores del directorio."""
+        from app.ml.compact_model import ensure_shared_compact
+        path = str(tmp_path / "pipeline.joblib")
+        joblib.dump(artifact, path)
+
+        old = ensure_shared_compact(path, shared_dir, "v1")
+        new = ensure_shared_compact(path, shared_dir, "v2")
+
+        assert not os.path.exists(old)
+        assert os.path.isdir(new)
+
+    def test_mlb_artifact_is_exported(self, shared_dir, artifact, tmp_path):
+        """Verifica que un artefacto con MultiLabelBinarizer (sin "classes") también se comparta."""
+        from sklearn.preprocessing import MultiLabelBinarizer
+        mlb = MultiLabelBinarizer(classes=list(artifact["classes"])).fit([])
+        path = str(tmp_path / "mlb.joblib")
+        joblib.dump({"pipeline": artifact["pipeline"], "mlb": mlb, "metadata": artifact["metadata"]}, path)
+
+        model, classes, _ = load_model(path)
+
+        assert isinstance(model, CompactModel)
+        assert classes == list(artifact["classes"])
+
+    def test_bare_pipeline_loads_without_sharing(self, shared_dir, artifact, tmp_path):
+        """Verifica que un pipeline suelto (sin clases) se cargue sin compartir en lugar de fallar."""
+        path = str(tmp_path / "suelto.joblib")
+        joblib.dump(artifact["pipeline"], path)
+
+        model, classes, metadata = load_model(path)
+
+        assert classes == []
+        assert metadata["artifact_version"]
+        assert not os.listdir(shared_dir) or all(name.startswith(".") for name in os.listdir(shared_dir))
+
+
+class TestNumpyEngine:
+    """Pruebas del motor numpy construido desde el pipeline (INFERENCE_ENGINE)."""
+
+    def test_from_pipeline_matches_sklearn(self, artifact):
+        """Verifica que el motor numpy reproduzca predict_proba del pipeline."""
+        model = CompactModel.from_pipeline(artifact["pipeline"], artifact["classes"], artifact["metadata"])
+
+        expected = artifact["pipeline"].predict_proba(TEXTOS)
+        np.testing.assert_allclose(model.predict_proba(TEXTOS), expected, rtol=0, atol=1e-9)
+
+    @pytest.mark.parametrize("engine,expected_type", [("numpy", CompactModel), ("sklearn", None)])
+    def test_engine_selected_by_settings(self, engine, expected_type, monkeypatch):
+        """Verifica que load_model use el motor configurado."""
+        from sklearn.pipeline import Pipeline
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "INFERENCE_ENGINE", engine)
+
+        model, _, _ = load_model()
+
+        assert isinstance(model, expected_type or Pipeline)
+
+    def test_same_profile_results_with_both_engines(self, monkeypatch):
+        """Verifica que el servicio devuelva las mismas competencias con ambos motores."""
+        from app.core.config import settings
+        from app.core.cache import result_cache
+        from app.services.analysis_service import _predict_with_ml
+
+        results = {}
+        for engine in ("sklearn", "numpy"):
+            monkeypatch.setattr(settings, "INFERENCE_ENGINE", engine)
+            load_model.cache_clear()
+            result_cache.clear()
+            results[engine] = [_predict_with_ml(texto, [{"tema": "excel"}]) for texto in TEXTOS]
+
+        for sk, fast in zip(results["sklearn"], results["numpy"]):
+            assert [r["competencia"] for r in fast] == [r["competencia"] for r in sk]
+            assert [r["nivel"] for r in fast] == [r["nivel"] for r in sk]
@@ -0,0 +1,70 @@
+"""
+Pruebas unitarias de la extracción de texto de CVs en PDF y DOCX.
+Valida la detección del formato, el recorte por páginas y caracteres y los errores de lectura.
+"""
+import pytest
+
+from app.services.document_service import (
+    DOCX,
+    PDF,
+    DocumentError,
+    UnsupportedDocument,
+    detect_format,
+    extract_text,
+)
+
+
+class TestDetectFormat:
+    """Pruebas de la detección del formato por contenido."""
+
+    def test_pdf_and_docx_signatures(self, make_pdf, make_docx):
+        """Verifica que el formato salga de los bytes y no del nombre del archivo."""
+        assert detect_format(make_pdf(["hola"]), "cv.docx") == PDF
+        assert detect_format(make_docx(["hola"]), "cv.bin") == DOCX
+
+    def test_other_files_rejected(self):
+        """Verifica que texto plano o un ZIP cualquiera no se acepten."""
+        with pytest.raises(UnsupportedDocument):
+            detect_format(b"Analista de datos", "cv.txt")
+        with pytest.raises(UnsupportedDocument):
+            detect_format(b"PK\x03\x04" + b"\x00" * 64, "fotos.zip")
+
+
+class TestExtractText:
+    """Pruebas de la extracción página por página."""
+
+    def test_pdf_text_by_page(self, make_pdf):
+        """Verifica el texto de todas las páginas en orden."""
+        extracted = extract_text(make_pdf(["Analista de datos", "Experiencia en Excel"]), PDF)
+
+        assert extracted["text"] == "Analista de datos\nExperiencia en Excel"
+        assert extracted["pages"] == 2
+        assert extracted["truncated"] is False
+
+    def test_pdf_page_cap(self, make_pdf):
+        """Verifica que se lean a lo sumo max_pages páginas y se informe el recorte."""
+        extracted = extract_text(make_pdf(["uno", "dos", "tres"]), PDF, max_pages=2)
+
+        assert extracted["text"] == "uno\ndos"
+        assert extracted["truncated"] is True
+
+    def test_char_cap_stops_extraction(self, make_docx):
+        """Verifica que la extracción se detenga al llegar a max_chars."""
+        extracted = extract_text(make_docx(["a" * 40, "b" * 40, "c" * 40]), DOCX, max_chars=50)
+
+        assert len(extracted["text"]) == 50
+        assert "c" not in extracted["text"]
+        assert extracted["truncated"] is True
+
+    def test_timeout(self, make_pdf, monkeypatch):
+        """Verifica el error al superar el tiempo máximo entre páginas."""
+        clock = iter(range(0, 1000, 5))
+        monkeypatch.setattr("app.services.document_service.time.monotonic", lambda: next(clock))
+
+        with pytest.raises(DocumentError, match="superó"):
+            extract_text(make_pdf(["uno", "dos"]), PDF, timeout_seconds=1)
+
+    def test_corrupt_pdf(self):
+        """Verifica que un PDF dañado se informe como DocumentError."""
+        with pytest.raises(DocumentError, match="No se pudo leer"):
+            extract_text(b"%PDF-1.4 basura", PDF)
@@ -0,0 +1,101 @@
+"""
+Pruebas unitarias del re-perfilado incremental (CV vectorizado por participante).
+Valida que la actualización dispersa reproduzca al documento completo y el uso de la cache.
+"""
+from collections import Counter
+
+import joblib
+import numpy as np
+import pytest
+from unittest.mock import patch
+
+from app.core.cache import result_cache
+from app.ml.compact_model import CompactModel
+from app.ml.incremental import cv_features, predict_proba_incremental
+from app.ml.model_loader import DEFAULT_MODEL_PATH, model_version
+from app.routes.analyze_routes import AnalyzeInput, TallerLite
+from app.services.analysis_service import _cv_features, _taller_tokens, analyze_participant_profile, cv_feature_cache
+
+CVS = [
+    "ingeniero electromecánico con experiencia en hse, gestión de calidad y análisis de datos",
+    "desarrollador python y sql; despliegue con docker y kubernetes. topic:python",
+    "de la que el en y a los",
+    "",
+]
+TALLERES = [
+    [],
+    [{"tema": "excel"}],
+    [{"tema": "excel"}, {"tema": "power bi"}, {"tema": "python"}],
+    [{"tema": "python"}, {"tema": "python"}, {"tema": "Gestión de Proyectos"}],
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    artifact = joblib.load(DEFAULT_MODEL_PATH)
+    return CompactModel.from_pipeline(artifact["pipeline"], artifact["classes"], artifact["metadata"])
+
+
+class TestIncrementalScoring:
+    """Pruebas de equivalencia de la actualización dispersa."""
+
+    @pytest.mark.parametrize("cv", CVS)
+    @pytest.mark.parametrize("talleres", TALLERES)
+    def test_matches_full_document(self, model, cv, talleres):
+        """Verifica que CV vectorizado + temas dé las mismas probabilidades que el documento completo."""
+        topics = _taller_tokens(talleres)
+        features = cv_features(model, "hash", cv)
+
+        expected = model.predict_proba([(cv + topics).strip()])
+        np.testing.assert_allclose(predict_proba_incremental(model, features, topics), expected, atol=1e-9)
+
+    def test_ngrams_start_at_offset(self, model):
+        """Verifica que con start solo se generen los n-gramas que incluyen tokens desde esa posición."""
+        tokens = ["analista", "datos", "topic", "excel"]
+
+        assert Counter(model.ngrams(tokens)) == Counter(model.ngrams(tokens[:2])) + Counter(model.ngrams(tokens, start=2))
+        assert "datos topic" in model.ngrams(tokens, start=2)
+
+
+class TestIncrementalProfile:
+    """Pruebas del re-perfilado incremental en analyze_participant_profile."""
+
+    CV = "Analista de datos con SQL, Excel y Power BI. Experiencia en reportes de ventas."
+
+    def _payload(self, talleres, cv=CV):
+        return AnalyzeInput(participanteId="p-inc", cvTexto=cv,
+                            talleres=[TallerLite(tema=t, asistencia_pct=1.0) for t in talleres])
+
+    def test_new_taller_reuses_cv_features(self):
+        """Verifica que un taller nuevo no vuelva a limpiar el CV y dé el mismo perfil que el cálculo completo."""
+        analyze_participant_profile(self._payload(["excel"]))
+        with patch("app.services.analysis_service._clean_personal_info", side_effect=AssertionError) as scrub:
+            result = analyze_participant_profile(self._payload(["excel", "python"]))
+        assert not scrub.called
+
+        result_cache.clear()
+        with patch.object(cv_feature_cache, "maxsize", 0):
+            expected = analyze_participant_profile(self._payload(["excel", "python"]))
+        assert result["competencias"] == expected["competencias"]
+
+    def test_changed_cv_is_vectorized_again(self):
+        """Verifica que si cambia el CV no se usen los términos del anterior."""
+        analyze_participant_profile(self._payload(["excel"]))
+        result = analyze_participant_profile(self._payload(["excel"], cv="Técnico de mantenimiento preventivo y correctivo"))
+
+        result_cache.clear()
+        with patch.object(cv_feature_cache, "maxsize", 0):
+            expected = analyze_participant_profile(self._payload(["excel"], cv="Técnico de mantenimiento preventivo y correctivo"))
+        assert result["competencias"] == expected["competencias"]
+        assert cv_feature_cache.stats()["size"] == 1
+
+    def test_features_from_previous_model_are_not_reused(self, model):
+        """Verifica que los términos guardados con el modelo anterior tras una recarga no se usen con el nuevo."""
+        old = {"artifact_version": "modelo-anterior"}
+        new = {"artifact_version": "modelo-nuevo"}
+        fresh = _cv_features(model, new, "p-rel", self.CV)
+        # un request que empezó con el modelo anterior guarda sus términos después de la recarga
+        stale = cv_features(model, fresh.text_hash, "otro texto")
+        cv_feature_cache.set((model_version(model, old), "p-rel"), stale)
+
+        assert _cv_features(model, new, "p-rel", self.CV) is fresh
@@ -0,0 +1,202 @@
+"""
+Pruebas unitarias para el pool acotado de inferencia.
+Valida ejecución fuera del event loop, backpressure y liberación de cupos.
+"""
+import asyncio
+import os
+import threading
+import time
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.core import metrics
+from app.core.executor import (
+    ExecutorSaturated,
+    InferenceExecutor,
+    get_document_executor,
+    get_executor,
+    shutdown_document_executor,
+)
+from app.main import app
+
+
+def _square(x):
+    return x * x
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+def _model_loaded():
+    from app.ml import model_loader
+    return model_loader._current is not None
+
+
+def _stuck_worker_pid(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+
+class TestInferenceExecutor:
+    """Pruebas del executor de inferencia."""
+
+    async def test_runs_function_in_pool(self):
+        """Verifica que el resultado vuelva al coroutine que lo espera."""
+        executor = InferenceExecutor("thread", workers=2, queue_size=0, retry_after=1)
+        try:
+            assert await executor.run(_square, 7) == 49
+            assert executor.stats()["in_flight"] == 0
+        finally:
+            executor.shutdown()
+
+    async def test_rejects_when_saturated(self):
+        """Verifica que por encima de la capacidad se rechace sin encolar."""
+        executor = InferenceExecutor("thread", workers=1, queue_size=1, retry_after=3)
+        gate = threading.Event()
+        rejected_before = metrics.EXECUTOR_REJECTED.get(pool="inference")
+        try:
+            running = [asyncio.ensure_future(executor.run(gate.wait)) for _ in range(2)]
+            await asyncio.sleep(0)
+            with pytest.raises(ExecutorSaturated) as exc_info:
+                await executor.run(_square, 2)
+            assert exc_info.value.retry_after == 3
+            assert executor.stats()["rejected"] == 1
+            assert metrics.EXECUTOR_REJECTED.get(pool="inference") == rejected_before + 1
+
+            gate.set()
+            await asyncio.gather(*running)
+            assert await executor.run(_square, 3) == 9
+        finally:
+            gate.set()
+            executor.shutdown()
+
+    async def test_releases_slot_on_error(self):
+        """Verifica que un trabajo que falla libere su cupo."""
+        executor = InferenceExecutor("thread", workers=1, queue_size=0, retry_after=1)
+        try:
+            with pytest.raises(ZeroDivisionError):
+                await executor.run(lambda: 1 / 0)
+            assert executor.stats()["in_flight"] == 0
+        finally:
+            executor.shutdown()
+
+    async def test_timeout_keeps_slot_until_thread_finishes(self):
+        """Verifica que al vencer el timeout se lance TimeoutError y el hilo conserve su cupo hasta terminar."""
+        executor = InferenceExecutor("thread", workers=1, queue_size=0, retry_after=1)
+        gate = threading.Event()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await executor.run(gate.wait, timeout=0.05)
+            assert executor.stats()["in_flight"] == 1
+
+            gate.set()
+            await asyncio.sleep(0.05)
+            assert executor.stats()["in_flight"] == 0
+        finally:
+            gate.set()
+            executor.shutdown()
+
+    def test_rejects_unknown_kind(self):
+        """Verifica la validación del tipo de executor."""
+        with pytest.raises(ValueError):
+            InferenceExecutor("gpu", workers=1, queue_size=0, retry_after=1)
+
+    @pytest.mark.slow
+    async def test_process_pool(self):
+        """Verifica el modo por procesos (modelo precargado en cada worker)."""
+        executor = InferenceExecutor("process", workers=1, queue_size=0, retry_after=1)
+        try:
+            assert await executor.run(_square, 5) == 25
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.slow
+    async def test_recycle_replaces_process_workers(self):
+        """Verifica que recycle reemplace los workers y que los trabajos siguientes vayan a los nuevos."""
+        executor = InferenceExecutor("process", workers=1, queue_size=0, retry_after=1)
+        try:
+            before = await executor.run(_worker_pid)
+            executor.recycle()
+            # el pool nuevo ya tiene todos sus workers arrancados y con el modelo cargado
+            assert len(executor._pool._processes) == executor.workers
+            assert await executor.run(_model_loaded)
+            assert await executor.run(_worker_pid) != before
+            assert executor.stats()["in_flight"] == 0
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.slow
+    async def test_timeout_discards_stuck_process_worker(self):
+        """Verifica que un trabajo vencido no bloquee el pool: los siguientes van a un worker nuevo y el trabado se cierra."""
+        executor = InferenceExecutor("process", workers=2, queue_size=1, retry_after=1)
+        try:
+            abandoned = executor._pool
+            with pytest.raises(asyncio.TimeoutError):
+                await executor.run(_stuck_worker_pid, 30, timeout=0.5)
+            # mientras se calienta el reemplazo, el otro worker sigue atendiendo
+            assert await executor.run(_square, 3, timeout=60) == 9
+
+            for _ in range(600):
+                if executor._pool is not abandoned and executor.stats()["in_flight"] == 0:
+                    break
+                await asyncio.sleep(0.1)
+            assert executor._pool is not abandoned
+            assert len(executor._pool._processes) == executor.workers
+            assert executor.stats()["in_flight"] == 0
+        finally:
+            executor.shutdown()
+
+
+class TestDocumentExecutor:
+    """Pruebas del pool de extracción de documentos."""
+
+    def test_separate_from_inference_pool(self, monkeypatch):
+        """Verifica que la extracción use un pool propio, por procesos y sin precargar el modelo."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "DOCUMENT_EXECUTOR", "process")
+        shutdown_document_executor()
+        try:
+            executor = get_document_executor()
+
+            assert executor is not get_executor()
+            assert executor.kind == "process"
+            assert executor.workers == settings.DOCUMENT_WORKERS
+            assert not executor.preload_model
+        finally:
+            shutdown_document_executor()
+
+    @pytest.mark.slow
+    async def test_stuck_extraction_discards_only_document_worker(self):
+        """Verifica que los workers no carguen el modelo y que una extracción vencida se descarte con su proceso."""
+        executor = InferenceExecutor("process", workers=1, queue_size=0, retry_after=1, preload_model=False)
+        try:
+            assert not await executor.run(_model_loaded)
+            abandoned = executor._pool
+            with pytest.raises(asyncio.TimeoutError):
+                await executor.run(_stuck_worker_pid, 30, timeout=0.5)
+
+            for _ in range(600):
+                if executor._pool is not abandoned and executor.stats()["in_flight"] == 0:
+                    break
+                await asyncio.sleep(0.1)
+            assert executor._pool is not abandoned
+            assert await executor.run(_square, 4, timeout=60) == 16
+        finally:
+            executor.shutdown()
+
+
+class TestBackpressureEndpoint:
+    """Pruebas de la respuesta HTTP cuando el pool está saturado."""
+
+    def test_saturated_returns_503_with_retry_after(self):
+        """Verifica 503 + Retry-After cuando no hay cupo en el pool."""
+        class SaturatedExecutor:
+            async def run(self, fn, *args):
+                raise ExecutorSaturated(retry_after=2)
+
+        with patch("app.routes.analyze_routes.get_executor", return_value=SaturatedExecutor()):
+            response = TestClient(app).post("/analyze/profile", json={"participanteId": "p", "cvTexto": "Python"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
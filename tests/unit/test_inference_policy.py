@@ -0,0 +1,102 @@
+"""
+Pruebas unitarias de la política de inferencia (umbral, mínimo de resultados y piso).
+Valida la lectura desde Settings, la resolución del umbral y su uso en los servicios.
+"""
+import numpy as np
+import pytest
+from unittest.mock import Mock, patch
+from pydantic import ValidationError
+
+from app.core import config
+from app.core.config import InferencePolicy, Settings, get_inference_policy, reload_inference_policy, set_inference_policy
+from app.services.analysis_service import _predict_with_ml
+
+
+@pytest.fixture(autouse=True)
+def restore_policy():
+    previous = get_inference_policy()
+    yield
+    set_inference_policy(previous)
+
+
+def _mock_model(mock_load_model, proba, metadata=None):
+    pipeline = Mock()
+    pipeline.predict_proba.return_value = np.array([proba])
+    classes = [f"Comp{i}" for i in range(len(proba))]
+    mock_load_model.return_value = (pipeline, classes, metadata or {"best_threshold": 0.30})
+
+
+class TestInferencePolicy:
+    """Pruebas de la construcción y resolución de la política."""
+
+    def test_from_settings(self, monkeypatch):
+        """Verifica que la política se arme con las variables ML_* del entorno."""
+        monkeypatch.setenv("ML_THRESHOLD", "0.4")
+        monkeypatch.setenv("ML_MIN_RESULTS", "3")
+        monkeypatch.setenv("ML_MIN_PROB_FLOOR", "0.05")
+
+        policy = InferencePolicy.from_settings(Settings())
+
+        assert policy == InferencePolicy(threshold=0.4, min_results=3, min_prob_floor=0.05)
+
+    def test_invalid_settings_fail_at_startup(self, monkeypatch):
+        """Verifica que un umbral fuera de [0, 1] se rechace al leer la configuración."""
+        monkeypatch.setenv("ML_THRESHOLD", "1.5")
+
+        with pytest.raises(ValidationError):
+            Settings()
+
+    def test_threshold_falls_back_to_model(self):
+        """Verifica que sin umbral configurado se use el del modelo."""
+        policy = InferencePolicy()
+
+        assert policy.resolve_threshold({"best_threshold": 0.33}) == 0.33
+        assert policy.resolve_threshold({}) == 0.20
+        assert policy.describe({"best_threshold": 0.33})["threshold_source"] == "model"
+
+    def test_explicit_threshold_wins(self):
+        """Verifica que el umbral configurado tenga prioridad sobre el del modelo."""
+        policy = InferencePolicy(threshold=0.5)
+
+        assert policy.describe({"best_threshold": 0.33}) == {
+            "threshold": 0.5,
+            "threshold_source": "settings",
+            "min_results": 5,
+            "min_prob_floor": 0.15,
+        }
+
+    def test_reload_reads_environment(self, monkeypatch):
+        """Verifica que la recarga reemplace la política global con el entorno actual."""
+        monkeypatch.setenv("ML_MIN_RESULTS", "2")
+
+        policy = reload_inference_policy()
+
+        assert policy.min_results == 2
+        assert config.get_inference_policy() is policy
+
+
+class TestPolicyInServices:
+    """Pruebas del uso de la política en la inferencia."""
+
+    @patch("app.services.analysis_service.load_model")
+    def test_explicit_policy_overrides_global(self, mock_load_model):
+        """Verifica que la política recibida como argumento reemplace a la global."""
+        _mock_model(mock_load_model, [0.6, 0.45, 0.35, 0.2])
+        set_inference_policy(InferencePolicy(min_results=0))
+
+        result = _predict_with_ml("texto", None, InferencePolicy(threshold=0.5, min_results=0))
+
+        assert [c["competencia"] for c in result] == ["Comp0"]
+
+    @patch("app.services.analysis_service.load_model")
+    def test_policy_change_is_not_served_from_cache(self, mock_load_model):
+        """Verifica que cambiar la política no devuelva resultados cacheados con la anterior."""
+        _mock_model(mock_load_model, [0.6, 0.45, 0.35, 0.2])
+
+        set_inference_policy(InferencePolicy(min_results=0))
+        first = _predict_with_ml("texto", None)
+        set_inference_policy(InferencePolicy(threshold=0.5, min_results=0))
+        second = _predict_with_ml("texto", None)
+
+        assert len(first) == 3
+        assert len(second) == 1
@@ -0,0 +1,140 @@
+"""
+Pruebas unitarias de la cola de trabajos masivos.
+Valida el procesamiento por tramos, la reanudación tras un reinicio y el recorrido de resultados.
+"""
+import asyncio
+
+import pytest
+
+from app.core.job_queue import DONE, FAILED, QUEUED, JobQueue, register_handler
+
+calls = []
+
+
+def _echo(items, policy):
+    calls.append([item["n"] for item in items])
+    return [{"doble": item["n"] * 2} if item["n"] >= 0 else {"error": "negativo"} for item in items]
+
+
+def _broken(items, policy):
+    raise RuntimeError("falló el modelo")
+
+
+register_handler("echo", _echo)
+register_handler("broken", _broken)
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    calls.clear()
+
+
+async def _wait(queue, job_id, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while queue.get(job_id)["status"] not in (DONE, FAILED):
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+    return queue.get(job_id)
+
+
+class TestJobQueue:
+    """Pruebas del almacenamiento y la ejecución de trabajos."""
+
+    async def test_job_processed_in_chunks(self):
+        """Verifica tramos de chunk_size ítems, resultados en orden y conteo de errores."""
+        queue = JobQueue("", concurrency=1, chunk_size=2)
+        queue.start()
+        try:
+            job = queue.submit("echo", [{"n": n} for n in (1, 2, -3, 4, 5)])
+            assert job["status"] == QUEUED
+
+            done = await _wait(queue, job["id"])
+        finally:
+            await queue.stop()
+
+        assert calls == [[1, 2], [-3, 4], [5]]
+        assert (done["processed"], done["errors"]) == (5, 1)
+        assert queue.results(job["id"], offset=3) == [{"index": 3, "doble": 8}, {"index": 4, "doble": 10}]
+
+    async def test_resumes_after_restart(self, tmp_path):
+        """Verifica que un trabajo interrumpido continúe solo con los ítems pendientes."""
+        path = str(tmp_path / "jobs.sqlite3")
+        first = JobQueue(path, chunk_size=2)
+        job = first.submit("echo", [{"n": n} for n in range(5)])
+        claimed = first._claim_next()
+        first._store(claimed["id"], [0, 1], [{"doble": 0}, {"doble": 2}])
+        first.close()  # el servicio se detiene con el trabajo en curso, sin liberarlo
+
+        second = JobQueue(path, chunk_size=2, lease_seconds=0.2)
+        second.start()
+        try:
+            done = await _wait(second, job["id"])
+        finally:
+            await second.stop()
+
+        assert calls == [[2, 3], [4]]
+        assert done["status"] == DONE
+        assert [r["doble"] for r in second.iter_results(job["id"], page=2)] == [0, 2, 4, 6, 8]
+
+    def test_live_lease_is_not_taken_over(self, tmp_path):
+        """Verifica que otra instancia no retome un trabajo cuyo dueño sigue renovando el lease."""
+        path = str(tmp_path / "jobs.sqlite3")
+        owner = JobQueue(path, lease_seconds=60)
+        job = owner.submit("echo", [{"n": 1}])
+        owner._claim_next()
+
+        other = JobQueue(path, lease_seconds=60)
+        assert other.requeue_interrupted() == 0
+        assert other._claim_next() is None
+
+        other.lease_seconds = 0  # el dueño dejó de renovar
+        assert other._claim_next()["id"] == job["id"]
+        owner._finish(job["id"], DONE)  # quien perdió el trabajo ya no lo cierra
+        assert other.get(job["id"])["owner"] == other.owner
+        owner.close()
+        other.close()
+
+    def test_stored_results_are_not_counted_twice(self):
+        """Verifica que guardar de nuevo un ítem ya resuelto no lo pise ni sume a processed."""
+        queue = JobQueue("")
+        job = queue.submit("echo", [{"n": 1}, {"n": -1}])
+        queue._claim_next()
+
+        assert queue._store(job["id"], [0, 1], [{"doble": 2}, {"error": "negativo"}]) == 2
+        assert queue._store(job["id"], [0, 1], [{"doble": 99}, {"error": "otro"}]) == 0
+        stored = queue.get(job["id"])
+        assert (stored["processed"], stored["errors"]) == (2, 1)
+        assert queue.results(job["id"])[0]["doble"] == 2
+
+    async def test_stop_releases_own_jobs(self, tmp_path):
+        """Verifica que al detenerse la instancia sus trabajos en curso vuelvan a la cola."""
+        path = str(tmp_path / "jobs.sqlite3")
+        queue = JobQueue(path)
+        job = queue.submit("echo", [{"n": 1}])
+        queue._claim_next()
+        await queue.stop()
+
+        released = queue.get(job["id"])
+        assert (released["status"], released["owner"]) == (QUEUED, None)
+        queue.close()
+
+    async def test_handler_error_fails_job(self):
+        """Verifica que un error inesperado marque el trabajo como fallido sin detener la cola."""
+        queue = JobQueue("")
+        queue.start()
+        try:
+            broken = queue.submit("broken", [{"n": 1}])
+            ok = queue.submit("echo", [{"n": 1}])
+            failed = await _wait(queue, broken["id"])
+            done = await _wait(queue, ok["id"])
+        finally:
+            await queue.stop()
+
+        assert failed["status"] == FAILED
+        assert "falló el modelo" in failed["error"]
+        assert done["status"] == DONE
+
+    def test_unknown_kind_rejected(self):
+        """Verifica que no se encolen trabajos de un tipo sin función registrada."""
+        with pytest.raises(ValueError):
+            JobQueue("").submit("desconocido", [{}])
@@ -0,0 +1,71 @@
+"""
+Pruebas unitarias para el autómata de keywords (Aho–Corasick).
+Valida que los conteos coincidan con la búsqueda término por término que reemplaza.
+"""
+import pytest
+from math import log
+from app.services.keyword_automaton import KeywordAutomaton
+from app.services.analysis_service import COMPETENCIA_SYNONYMS, _normalize_text, _score_from_cv
+from app.services.job_service import KEYWORDS_MAP, _match_keywords
+
+
+TEXTS = [
+    "",
+    "aaaa",
+    "Experiencia en ETL, etl y SQL; mysql y postgresql. CI/CD y cicd con Docker",
+    "excel excelente power bi power query dashboards",
+    "flujo de caja, caja chica y  caja  con reclamos",
+    "atención al cliente\natención al cliente postventa",
+]
+
+
+def naive_score_from_cv(cv_text):
+    """Implementación previa: un text.count() por sinónimo."""
+    if not cv_text:
+        return {}
+    text = _normalize_text(cv_text)
+    counts = {}
+    for comp, synonyms in COMPETENCIA_SYNONYMS.items():
+        freq = sum(text.count(_normalize_text(term)) for term in synonyms)
+        if freq > 0:
+            counts[comp] = log(1 + freq, 2)
+    if not counts:
+        return {}
+    max_score = max(counts.values()) or 1.0
+    return {comp: round(v / max_score * 100.0, 1) for comp, v in counts.items()}
+
+
+class TestKeywordAutomaton:
+    """Pruebas del autómata multi-patrón."""
+
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_count_matches_str_count(self, text):
+        """Verifica conteos no solapados idénticos a str.count."""
+        terms = ["a", "aa", "etl", "sql", "ci/cd", "cicd", "excel", "power bi", "caja", "flujo de caja"]
+        automaton = KeywordAutomaton(terms)
+        assert automaton.count(text) == [text.count(t) for t in terms]
+
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_delimited_matches_space_padding(self, text):
+        """Verifica la semántica de keywords delimitadas por espacios."""
+        terms = ["caja", "flujo de caja", "cliente", "atención al cliente", "aa"]
+        automaton = KeywordAutomaton(terms)
+        expected = {i for i, t in enumerate(terms) if f" {t} " in f" {text} "}
+        assert automaton.delimited(text) == expected
+
+    def test_deduplicates_terms(self):
+        """Verifica que los términos repetidos compartan id."""
+        automaton = KeywordAutomaton(["excel", "sql", "excel"])
+        assert automaton.terms == ["excel", "sql"]
+        assert automaton.index["excel"] == 0
+
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_score_from_cv_unchanged(self, text):
+        """Verifica que el fallback de reglas produzca los mismos puntajes que antes."""
+        assert _score_from_cv(text) == naive_score_from_cv(text)
+
+    @pytest.mark.parametrize("text", TEXTS)
+    def test_job_keywords_unchanged(self, text):
+        """Verifica que las keywords de puesto detectadas sean las mismas que antes."""
+        padded = " " + text.lower() + " "
+        assert _match_keywords(text) == [kw for kw in KEYWORDS_MAP if f" {kw} " in padded]
@@ -0,0 +1,94 @@
+"""
+Pruebas unitarias del generador de carga.
+Valida el corpus, el cálculo de percentiles y una corrida corta contra la app en proceso.
+"""
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from benchmarks.load_test import Result, build_corpus, load_log, percentile, run_load, summarize, write_log
+
+
+class TestLoadReport:
+    """Pruebas del resumen de resultados."""
+
+    def test_percentile_nearest_rank(self):
+        """Verifica el percentil por rango más cercano."""
+        values = [float(v) for v in range(1, 101)]
+
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile(values, 100) == 100.0
+        assert percentile([], 95) == 0.0
+
+    def test_summary_per_endpoint(self):
+        """Verifica throughput, errores y percentiles por endpoint y en total."""
+        results = [
+            Result("/analyze/job", 200, 0.010),
+            Result("/analyze/job", 503, 0.002),
+            Result("/analyze/profile", 200, 0.020),
+            Result("/analyze/profile", 0, 5.0, "ReadTimeout"),
+        ]
+
+        report = summarize(results, elapsed=2.0)
+
+        assert report["/analyze/job"]["errors"] == 1
+        assert report["/analyze/job"]["status"] == {"200": 1, "503": 1}
+        assert report["/analyze/profile"]["latency_ms"]["max"] == 5000.0
+        assert report["total"]["requests"] == 4
+        assert report["total"]["throughput_rps"] == 2.0
+        assert report["total"]["error_rate"] == 0.5
+
+
+class TestLoadCorpus:
+    """Pruebas del corpus y del log de reproducción."""
+
+    def test_corpus_covers_both_endpoints(self):
+        """Verifica que el corpus incluya los ejemplos y requests de ambos endpoints."""
+        corpus = build_corpus(["job", "profile"])
+
+        paths = {entry["path"] for entry in corpus}
+        assert paths == {"/analyze/job", "/analyze/profile"}
+        assert corpus[0]["body"]["puestoTexto"].startswith("Necesitamos alguien")
+
+    def test_log_roundtrip(self, tmp_path):
+        """Verifica que el corpus se guarde y se reproduzca igual."""
+        corpus = build_corpus(["job"])[:5]
+        path = str(tmp_path / "corpus.jsonl")
+
+        write_log(corpus, path)
+
+        assert load_log(path) == corpus
+
+
+class TestRunLoad:
+    """Pruebas de los modos de generación de carga."""
+
+    @pytest.fixture
+    def client(self):
+        app = FastAPI()
+
+        @app.post("/echo")
+        async def echo(body: dict):
+            return body
+
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+    async def test_closed_loop_sends_requested_total(self, client):
+        """Verifica que el lazo cerrado envíe exactamente la cantidad pedida."""
+        corpus = [{"method": "POST", "path": "/echo", "body": {"i": i}} for i in range(3)]
+
+        async with client:
+            results = await run_load(client, corpus, concurrency=4, total=10)
+
+        assert len(results) == 10
+        assert all(r.status == 200 for r in results)
+
+    async def test_open_loop_rate(self, client):
+        """Verifica que el lazo abierto genere llegadas hasta el total pedido."""
+        corpus = [{"method": "POST", "path": "/echo", "body": {}}]
+
+        async with client:
+            results = await run_load(client, corpus, concurrency=2, total=20, rate=500.0)
+
+        assert len(results) == 20
@@ -0,0 +1,108 @@
+"""
+Pruebas unitarias del registro de métricas.
+Valida el formato de texto de Prometheus, los histogramas y el reenvío desde workers.
+"""
+import pytest
+
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+class TestMetricsRegistry:
+    """Pruebas de los tipos de métrica y su exposición."""
+
+    def test_counter_and_gauge_render(self):
+        """Verifica HELP, TYPE y una línea por combinación de etiquetas."""
+        registry = MetricsRegistry()
+        requests = registry.register(Counter("x_requests_total", "Requests.", ("route",)))
+        in_flight = registry.register(Gauge("x_in_flight", "En curso."))
+        requests.inc(route="/a")
+        requests.inc(2, route='/b"c')
+        in_flight.inc()
+        in_flight.inc()
+        in_flight.dec()
+
+        assert registry.render().splitlines() == [
+            "# HELP x_requests_total Requests.",
+            "# TYPE x_requests_total counter",
+            'x_requests_total{route="/a"} 1',
+            'x_requests_total{route="/b\\"c"} 2',
+            "# HELP x_in_flight En curso.",
+            "# TYPE x_in_flight gauge",
+            "x_in_flight 1",
+        ]
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Verifica buckets acumulados con límite inclusivo, +Inf, suma y conteo."""
+        histogram = Histogram("x_seconds", "Latencia.", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        assert histogram.render()[2:] == [
+            'x_seconds_bucket{le="0.1"} 2',
+            'x_seconds_bucket{le="1"} 3',
+            'x_seconds_bucket{le="+Inf"} 4',
+            "x_seconds_sum 3.65",
+            "x_seconds_count 4",
+        ]
+
+    def test_time_observes_block_duration(self):
+        """Verifica que el context manager registre una observación por bloque."""
+        histogram = Histogram("x_stage_seconds", "Etapas.", ("stage",))
+        with histogram.time(stage="tfidf"):
+            pass
+
+        assert histogram.count(stage="tfidf") == 1
+
+    def test_wrong_labels_rejected(self):
+        """Verifica que no se acepten etiquetas distintas a las declaradas."""
+        counter = Counter("x_total", "Total.", ("route",))
+
+        with pytest.raises(ValueError):
+            counter.inc(path="/a")
+
+    def test_duplicate_metric_rejected(self):
+        """Verifica que no se registren dos métricas con el mismo nombre."""
+        registry = MetricsRegistry()
+        registry.register(Counter("x_total", "Total."))
+
+        with pytest.raises(ValueError):
+            registry.register(Counter("x_total", "Total."))
+
+
+class TestWorkerForwarding:
+    """Pruebas del reenvío de mediciones de los workers de procesos."""
+
+    def test_forwarded_samples_applied_in_parent(self, monkeypatch):
+        """Verifica que las mediciones de un worker se apliquen recién en el registro principal."""
+        before = metrics.MODEL_LOADS.get(result="ok")
+        monkeypatch.setattr(metrics, "_pending", None)
+
+        metrics.forward_samples()
+        metrics.MODEL_LOADS.inc(result="ok")
+        with metrics.stage("tfidf"):
+            pass
+        samples = metrics.drain_samples()
+        monkeypatch.setattr(metrics, "_pending", None)
+
+        assert metrics.MODEL_LOADS.get(result="ok") == before
+        assert [name for name, *_ in samples] == ["fte_model_loads_total", "fte_stage_duration_seconds"]
+        metrics.REGISTRY.apply(samples)
+        assert metrics.MODEL_LOADS.get(result="ok") == before + 1
+
+
+class TestCacheMetrics:
+    """Pruebas del conteo de aciertos de las caches."""
+
+    def test_named_cache_counts_lookups(self):
+        """Verifica que una cache con nombre cuente aciertos y fallos y exponga su ratio."""
+        cache = TTLCache(maxsize=4, ttl_seconds=0, name="test")
+        cache.get("a")
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+
+        assert metrics.CACHE_LOOKUPS.get(cache="test", result="hit") == 2
+        assert metrics.CACHE_LOOKUPS.get(cache="test", result="miss") == 1
+        assert 'fte_cache_hit_ratio{cache="test"} 0.6666666666666666' in metrics.REGISTRY.render()
@@ -0,0 +1,128 @@
+"""
+Pruebas unitarias de los micro-lotes de requests individuales.
+"""
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from app.core import metrics
+from app.core.config import InferencePolicy
+from app.core.executor import ExecutorSaturated
+from app.core.micro_batch import MicroBatcher
+
+
+class FakeExecutor:
+    """Pool con `busy` trabajos ajenos en curso; registra los lotes que recibe."""
+
+    def __init__(self, busy: bool = True, saturated: bool = False):
+        self.workers = 1
+        self.busy = busy
+        self.saturated = saturated
+        self.batches = []
+
+    def stats(self):
+        return {"in_flight": 1 if self.busy else 0}
+
+    async def run(self, fn, *args):
+        if self.saturated:
+            raise ExecutorSaturated(retry_after=2)
+        self.batches.append(args[0])
+        return fn(*args)
+
+
+def _batch(items, policy):
+    return {"resultados": [{"error": "falló"} if item == "x" else {"item": item} for item in items], "meta": {}}
+
+
+def _immediate(item):
+    async def run():
+        return {"item": item, "immediate": True}
+    return run
+
+
+@pytest.fixture
+def executor():
+    fake = FakeExecutor()
+    with patch("app.core.micro_batch.get_executor", return_value=fake):
+        yield fake
+
+
+class TestMicroBatcher:
+    """Pruebas de MicroBatcher."""
+
+    async def test_runs_immediately_when_pool_is_idle(self, executor):
+        """Verifica que con workers libres el request no espere ni se agrupe."""
+        executor.busy = False
+        batcher = MicroBatcher("test", _batch, max_wait_ms=1000, max_items=8)
+
+        result = await batcher.submit("a", InferencePolicy(), _immediate("a"))
+
+        assert result == {"item": "a", "immediate": True}
+        assert executor.batches == []
+
+    async def test_groups_requests_while_pool_is_busy(self, executor):
+        """Verifica que los requests concurrentes se evalúen en un solo lote, cada uno con su resultado."""
+        batcher = MicroBatcher("test-group", _batch, max_wait_ms=20, max_items=8)
+        before = metrics.MICRO_BATCH_SIZE.count(operation="test-group")
+        policy = InferencePolicy()
+
+        results = await asyncio.gather(*(batcher.submit(i, policy, _immediate(i)) for i in range(5)))
+
+        assert results == [{"item": i} for i in range(5)]
+        assert executor.batches == [[0, 1, 2, 3, 4]]
+        assert metrics.MICRO_BATCH_SIZE.count(operation="test-group") == before + 1
+
+    async def test_flushes_when_full(self, executor):
+        """Verifica que un lote completo se despache sin esperar el tiempo máximo."""
+        batcher = MicroBatcher("test", _batch, max_wait_ms=60_000, max_items=3)
+        policy = InferencePolicy()
+
+        results = await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(i, policy, _immediate(i)) for i in range(3))), timeout=1
+        )
+        assert [r["item"] for r in results] == [0, 1, 2]
+
+    async def test_separates_policies(self, executor):
+        """Verifica que requests con políticas distintas no compartan lote."""
+        batcher = MicroBatcher("test", _batch, max_wait_ms=10, max_items=8)
+        strict = InferencePolicy(threshold=0.9)
+
+        await asyncio.gather(
+            batcher.submit("a", InferencePolicy(), _immediate("a")),
+            batcher.submit("b", strict, _immediate("b")),
+            batcher.submit("c", InferencePolicy(), _immediate("c")),
+        )
+        assert sorted(executor.batches) == [["a", "c"], ["b"]]
+
+    async def test_item_error_fails_only_its_request(self, executor):
+        """Verifica que un ítem con error no haga fallar al resto del lote."""
+        batcher = MicroBatcher("test", _batch, max_wait_ms=10, max_items=8)
+        policy = InferencePolicy()
+
+        ok, failed = await asyncio.gather(
+            batcher.submit("a", policy, _immediate("a")),
+            batcher.submit("x", policy, _immediate("x")),
+            return_exceptions=True,
+        )
+        assert ok == {"item": "a"}
+        assert isinstance(failed, RuntimeError)
+
+    async def test_saturated_pool_fails_whole_batch(self, executor):
+        """Verifica que ExecutorSaturated llegue a todos los requests del lote (503)."""
+        executor.saturated = True
+        batcher = MicroBatcher("test", _batch, max_wait_ms=10, max_items=8)
+        policy = InferencePolicy()
+
+        results = await asyncio.gather(
+            *(batcher.submit(i, policy, _immediate(i)) for i in range(2)), return_exceptions=True
+        )
+        assert all(isinstance(r, ExecutorSaturated) for r in results)
+
+    async def test_disabled_with_zero_wait(self, executor):
+        """Verifica que MICRO_BATCH_WAIT_MS=0 ejecute siempre de inmediato."""
+        batcher = MicroBatcher("test", _batch, max_wait_ms=0, max_items=8)
+
+        result = await batcher.submit("a", InferencePolicy(), _immediate("a"))
+
+        assert result["immediate"] is True
+        assert executor.batches == []
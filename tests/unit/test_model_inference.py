@@ -6,6 +6,7 @@ import pytest
 import os
 from unittest.mock import Mock, patch, MagicMock
 import numpy as np
+from app.core.config import InferencePolicy
 from app.services.analysis_service import _predict_with_ml
 
 
@@ -124,8 +125,7 @@ class TestModelInference:
     def test_minimum_results_fallback(self, mock_load_model):
         """Verifica el fallback cuando hay muy pocos resultados sobre el umbral."""
         # Configurar para que haya muy pocos resultados sobre el umbral
-        os.environ["ML_MIN_RESULTS"] = "5"
-        os.environ["ML_MIN_PROB_FLOOR"] = "0.10"
+        policy = InferencePolicy(min_results=5, min_prob_floor=0.10)
         
         mock_pipeline = Mock()
         # Solo 2 resultados sobre umbral 0.30, pero necesitamos 5
@@ -137,14 +137,10 @@ class TestModelInference:
         
         mock_load_model.return_value = (mock_pipeline, mock_classes, mock_metadata)
         
-        result = _predict_with_ml("texto", None)
+        result = _predict_with_ml("texto", None, policy)
         
         # Debe completar hasta el mínimo requerido
         assert len(result) >= 5
-        
-        # Limpiar variables de entorno
-        os.environ.pop("ML_MIN_RESULTS", None)
-        os.environ.pop("ML_MIN_PROB_FLOOR", None)
     
     @patch('app.services.analysis_service.load_model')
     def test_handles_empty_text(self, mock_load_model):
@@ -161,3 +157,58 @@ class TestModelInference:
         # Debe devolver una lista (puede estar vacía o con resultados según el modelo)
         assert isinstance(result, list)
 
+
+
+class TestWindowedInference:
+    """Pruebas de la evaluación de textos largos en ventanas."""
+
+    def test_split_windows_bounded_and_word_aligned(self):
+        """Verifica ventanas de a lo sumo window_chars, sin partir palabras y con tope de cantidad."""
+        from app.ml.inference import split_windows
+        text = " ".join(f"palabra{i}" for i in range(200))
+
+        windows = split_windows(text, 100, 3)
+
+        assert len(windows) == 3
+        assert all(len(w) <= 100 for w in windows)
+        assert all(w.split()[0].startswith("palabra") and w in text for w in windows)
+        assert split_windows("corto", 100, 3) == ["corto"]
+        assert split_windows(text, 0, 3) == [text]
+
+    def test_clip_text_keeps_whole_words(self):
+        """Verifica el recorte en el último espacio antes del límite."""
+        from app.ml.inference import clip_text
+
+        assert clip_text("uno dos tres cuatro", 10) == "uno dos"
+        assert clip_text("uno dos", 10) == "uno dos"
+
+    def test_windows_aggregated_per_document(self):
+        """Verifica una sola pasada del modelo y la agregación max/mean por documento."""
+        from app.ml.inference import predict_proba_windows
+        pipeline = Mock()
+        pipeline.predict_proba.return_value = np.array([[0.1, 0.9], [0.5, 0.3], [0.4, 0.2], [0.7, 0.7]])
+        documents = [["a"], ["b", "c", "d"]]
+
+        maximum = predict_proba_windows(pipeline, documents, "max")
+        mean = predict_proba_windows(pipeline, documents, "mean")
+
+        assert pipeline.predict_proba.call_args[0][0] == ["a", "b", "c", "d"]
+        np.testing.assert_allclose(maximum, [[0.1, 0.9], [0.7, 0.7]])
+        np.testing.assert_allclose(mean, [[0.1, 0.9], [1.6 / 3, 0.4]])
+
+    @patch('app.services.analysis_service.load_model')
+    def test_long_cv_scored_in_windows(self, mock_load_model, monkeypatch):
+        """Verifica que un CV largo se evalúe en ventanas con los temas de los talleres en cada una."""
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "TEXT_WINDOW_CHARS", 50)
+        monkeypatch.setattr(settings, "TEXT_MAX_WINDOWS", 4)
+        mock_pipeline = Mock()
+        mock_pipeline.predict_proba.side_effect = lambda texts: np.full((len(texts), 3), 0.5)
+        mock_load_model.return_value = (mock_pipeline, ["A", "B", "C"], {"best_threshold": 0.2})
+
+        result = _predict_with_ml("experiencia en ventas y atención " * 100, [{"tema": "excel", "asistencia_pct": 1.0}])
+
+        windows = mock_pipeline.predict_proba.call_args[0][0]
+        assert len(windows) == 4
+        assert all(w.endswith("topic:excel") for w in windows)
+        assert len(result) == 3
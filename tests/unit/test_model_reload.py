@@ -0,0 +1,132 @@
+"""
+Pruebas unitarias de la recarga en caliente del modelo.
+"""
+import os
+import time
+import joblib
+import numpy as np
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.multiclass import OneVsRestClassifier
+from sklearn.pipeline import Pipeline
+
+from app.ml import model_loader
+from app.ml.model_loader import (
+    ModelValidationError,
+    load_model,
+    model_version,
+    reload_model,
+    start_model_watcher,
+    stop_model_watcher,
+)
+
+
+def _write_artifact(path, classes=("Analisis de Datos", "Ofimática"), threshold=0.33):
+    """Entrena un modelo mínimo con el formato del artefacto real y lo guarda en path."""
+    texts = ["python sql datos", "excel word office", "power bi sql", "excel office 365"]
+    y = np.array([[1, 0], [0, 1], [1, 0], [0, 1]])
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer()),
+        ("clf", OneVsRestClassifier(LogisticRegression(solver="liblinear"))),
+    ])
+    pipeline.fit(texts, y)
+    joblib.dump(
+        {"pipeline": pipeline, "classes": list(classes), "metadata": {"best_threshold": threshold}},
+        str(path),
+    )
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def stop_watcher():
+    yield
+    stop_model_watcher()
+
+
+class TestReloadModel:
+    """Pruebas del reemplazo atómico del modelo en uso."""
+
+    def test_reload_swaps_model(self, tmp_path):
+        """Verifica que la recarga ponga en uso el artefacto nuevo y reporte ambas versiones."""
+        path = _write_artifact(tmp_path / "modelo.joblib")
+        pipeline, _, metadata = load_model(path)
+        old_version = model_version(pipeline, metadata)
+
+        _write_artifact(path, threshold=0.5)
+        info = reload_model()
+
+        new_pipeline, classes, new_metadata = load_model()
+        assert info["previous_version"] == old_version
+        assert info["artifact"]["version"] == model_version(new_pipeline, new_metadata) != old_version
+        assert info["artifact"]["path"] == path
+        assert new_metadata["best_threshold"] == 0.5
+        assert classes == ["Analisis de Datos", "Ofimática"]
+
+    def test_in_flight_reference_keeps_old_model(self, tmp_path):
+        """Verifica que quien ya tomó el modelo siga usándolo intacto tras la recarga."""
+        path = _write_artifact(tmp_path / "modelo.joblib")
+        old_pipeline, _, old_metadata = load_model(path)
+
+        _write_artifact(path, threshold=0.5)
+        reload_model()
+
+        assert old_metadata["best_threshold"] == 0.33
+        assert old_pipeline.predict_proba(["python sql"]).shape == (1, 2)
+        assert load_model()[0] is not old_pipeline
+
+    def test_invalid_artifact_keeps_current_model(self, tmp_path):
+        """Verifica que un artefacto que no pasa la validación no reemplace al modelo en uso."""
+        path = _write_artifact(tmp_path / "modelo.joblib")
+        current = load_model(path)
+        bad = _write_artifact(tmp_path / "malo.joblib", classes=("Solo una",))
+
+        with pytest.raises(ModelValidationError):
+            reload_model(bad)
+
+        assert load_model() is current
+
+    def test_corrupt_file_keeps_current_model(self, tmp_path):
+        """Verifica que un archivo ilegible no afecte al modelo en uso."""
+        path = _write_artifact(tmp_path / "modelo.joblib")
+        current = load_model(path)
+        with open(path, "wb") as fh:
+            fh.write(b"no es un joblib")
+
+        with pytest.raises(Exception):
+            reload_model()
+
+        assert load_model() is current
+
+    def test_load_model_without_path_returns_current(self, tmp_path):
+        """Verifica que los servicios (sin ruta) obtengan el último modelo recargado."""
+        path = _write_artifact(tmp_path / "otro.joblib")
+        reload_model(path)
+
+        assert model_loader.current_model_path() == path
+        assert load_model()[1] == ["Analisis de Datos", "Ofimática"]
+
+
+class TestModelWatcher:
+    """Pruebas de la recarga al cambiar el archivo en disco."""
+
+    def test_disabled_with_zero_interval(self):
+        """Verifica que con intervalo 0 no se arranque el watcher."""
+        assert start_model_watcher(0) is None
+
+    def test_reloads_when_file_changes(self, tmp_path):
+        """Verifica que el watcher detecte un artefacto nuevo y lo ponga en uso."""
+        path = _write_artifact(tmp_path / "modelo.joblib")
+        _, _, metadata = load_model(path)
+        start_model_watcher(0.02)
+        time.sleep(0.1)
+
+        tmp = f"{path}.tmp"
+        _write_artifact(tmp, threshold=0.5)
+        os.replace(tmp, path)
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and load_model()[2]["best_threshold"] != 0.5:
+            time.sleep(0.02)
+        assert load_model()[2]["best_threshold"] == 0.5
+        assert load_model()[2]["artifact_version"] != metadata["artifact_version"]
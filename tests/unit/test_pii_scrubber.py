@@ -0,0 +1,58 @@
+"""
+Pruebas unitarias para el limpiador de información personal compartido.
+Valida que la versión optimizada produzca exactamente la misma salida que la secuencia de re.sub.
+"""
+import re
+import pytest
+import pandas as pd
+from app.ml.pii_scrubber import PII_PATTERNS, scrub_personal_info
+from app.ml.train import clean_personal_info
+from app.services.analysis_service import _clean_personal_info
+
+
+def reference_clean(text):
+    """Implementación original: un re.sub por patrón, en orden."""
+    if not text:
+        return ""
+    cleaned = text
+    for pattern in PII_PATTERNS:
+        cleaned = re.sub(pattern, " ", cleaned, flags=re.IGNORECASE)
+    return cleaned.strip()
+
+
+EDGE_CASES = [
+    "Nombre: 1234567 Juan Perez",
+    "Celular: 1234567 Correo Electrónico: juan@mail.com Email: x",
+    "nombremail Juan Pérez",
+    "TELÉFONO 76543210 MÓVIL 555 dirección: Av. Siempre Viva 742, Oruro",
+    "Lugar de Nacimiento Oruro Nacionalidad Boliviana Domicilio Calle 1",
+    "1234567-7654321 (12345678) 12345678901234567890",
+    "Dırección: Calle 5 EMAİL: a@b.co",
+    "  \t\n espacios \xa0 raros \x1c ",
+    "sin datos personales, solo Python y SQL",
+]
+
+
+class TestScrubPersonalInfo:
+    """Pruebas del limpiador de PII precompilado."""
+
+    @pytest.mark.parametrize("text", EDGE_CASES)
+    def test_matches_sequential_reference(self, text):
+        """Verifica salida idéntica a la secuencia de re.sub en casos límite."""
+        assert scrub_personal_info(text) == reference_clean(text)
+
+    def test_matches_reference_on_dataset(self):
+        """Verifica salida idéntica sobre todos los CVs del dataset de entrenamiento."""
+        texts = pd.read_csv("data/dataset_competencias.csv")["cv_texto"].fillna("").astype(str)
+        for text in texts:
+            assert scrub_personal_info(text) == reference_clean(text)
+
+    def test_service_and_training_share_scrubber(self):
+        """Verifica que servicio y entrenamiento limpien igual."""
+        text = "Nombre y Apellidos: Ana Rojas Celular: 70000000 Experiencia en Excel"
+        assert _clean_personal_info(text) == clean_personal_info(text) == scrub_personal_info(text)
+
+    def test_handles_empty_values(self):
+        """Verifica el manejo de valores vacíos."""
+        assert scrub_personal_info("") == ""
+        assert scrub_personal_info(None) == ""
@@ -0,0 +1,47 @@
+"""
+Pruebas unitarias del almacén persistente de perfiles.
+Valida la coincidencia por entradas y modelo, las versiones retenidas y la persistencia en disco.
+"""
+from app.core.profile_store import ProfileStore
+
+RESULT = {"participanteId": "p1", "competencias": [{"competencia": "Ventas", "nivel": 80.0}], "meta": {"mode": "ml"}}
+
+
+class TestProfileStore:
+    """Pruebas de ProfileStore."""
+
+    def test_lookup_requires_same_inputs_and_model(self):
+        """Verifica que el perfil guardado solo se devuelva con las mismas entradas y el mismo modelo."""
+        store = ProfileStore(":memory:")
+        store.save("p1", "entradas-a", "modelo-1", RESULT)
+
+        assert store.lookup("p1", "entradas-a", "modelo-1") == RESULT
+        assert store.lookup("p1", "entradas-b", "modelo-1") is None
+        assert store.lookup("p1", "entradas-a", "modelo-2") is None
+        assert store.lookup("p2", "entradas-a", "modelo-1") is None
+
+    def test_each_save_is_a_new_version(self):
+        """Verifica el número de versión, el cambio de ETag y el historial acotado."""
+        store = ProfileStore(":memory:", history_size=2)
+        first = store.save("p1", "a", "m1", RESULT)
+        second = store.save("p1", "b", "m1", {**RESULT, "competencias": []})
+        third = store.save("p1", "b", "m2", {**RESULT, "competencias": []})
+
+        assert (first["version"], second["version"], third["version"]) == (1, 2, 3)
+        assert first["etag"] != second["etag"] != third["etag"]
+        assert [s["version"] for s in store.history("p1")] == [3, 2]
+        assert store.get("p1")["result"]["competencias"] == []
+        assert store.get("otro") is None
+
+    def test_persists_across_reopen(self, tmp_path):
+        """Verifica que el perfil siga disponible al reabrir la base."""
+        path = str(tmp_path / "profiles.sqlite3")
+        store = ProfileStore(path)
+        store.save("p1", "a", "m1", RESULT)
+        etag = store.get("p1")["etag"]
+        store.close()
+
+        reopened = ProfileStore(path)
+        assert reopened.get("p1")["etag"] == etag
+        assert reopened.lookup("p1", "a", "m1") == RESULT
+        reopened.close()
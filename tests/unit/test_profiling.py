@@ -0,0 +1,126 @@
+"""
+Pruebas unitarias del perfilado por request.
+Valida la captura en el executor, el resumen por función, el almacén y la activación por header o muestreo.
+"""
+import marshal
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.executor import InferenceExecutor
+from app.core.profiling import ProfileStore, ProfiledRequest, profile_store, profiling, run_profiled, summarize
+from app.main import app
+
+
+def _clean_personal_info(text):
+    return "".join(sorted(text))
+
+
+def _work(text):
+    return _clean_personal_info(text * 50)
+
+
+def _auth():
+    token = jwt.encode({"sub": "fte-api"}, settings.SERVICE_JWT_SECRET, algorithm="HS256")
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(autouse=True)
+def clear_store():
+    profile_store.clear()
+    yield
+    profile_store.clear()
+
+
+class TestProfiler:
+    """Pruebas de la captura y el resumen."""
+
+    def test_run_profiled_returns_result_and_stats(self):
+        """Verifica que el resultado no cambie y que las estadísticas incluyan la función perfilada."""
+        result, stats = run_profiled(_work, "cba")
+
+        assert result == _work("cba")
+        assert any(name == "_clean_personal_info" for _, _, name in stats)
+
+    def test_summary_targets_and_top_n(self):
+        """Verifica el total de las funciones objetivo y el límite del desglose."""
+        profile = ProfiledRequest("r1", "/x", "requested")
+        profile.add(run_profiled(_work, "cba")[1])
+        profile.add(run_profiled(_work, "zyx")[1])
+
+        summary = summarize(profile.merged(), top_n=3)
+
+        assert len(summary["functions"]) == 3
+        assert "_clean_personal_info" in summary["targets_ms"]
+        cumtimes = [row["cumtime_ms"] for row in summary["functions"]]
+        assert cumtimes == sorted(cumtimes, reverse=True)
+
+    def test_store_keeps_latest(self):
+        """Verifica que el almacén descarte los perfiles más antiguos."""
+        store = ProfileStore(keep=2)
+        for request_id in ("a", "b", "c"):
+            profile = ProfiledRequest(request_id, "/x", "sampled")
+            profile.add(run_profiled(_work, "ab")[1])
+            stats = profile.merged()
+            store.put(profile, stats, summarize(stats, 5))
+
+        assert store.get("a") is None
+        assert [p["request_id"] for p in store.list()] == ["c", "b"]
+
+    async def test_executor_profiles_only_marked_requests(self):
+        """Verifica que el executor perfile solo dentro de un request marcado."""
+        executor = InferenceExecutor("thread", workers=1, queue_size=0, retry_after=1)
+        try:
+            assert await executor.run(_work, "ba") == _work("ba")
+            with profiling("/x", "requested") as profile:
+                assert await executor.run(_work, "ba") == _work("ba")
+            assert "_clean_personal_info" in summarize(profile.merged(), 5)["targets_ms"]
+        finally:
+            executor.shutdown()
+
+
+class TestProfilingEndpoints:
+    """Pruebas de la activación por request y de la consulta de perfiles."""
+
+    PAYLOAD = {"participanteId": "perf-1", "cvTexto": "Analista de datos con SQL y Excel"}
+
+    def test_header_with_service_token_profiles_request(self):
+        """Verifica X-Profile-Id, Server-Timing y el perfil consultable por id."""
+        client = TestClient(app)
+        response = client.post("/analyze/profile", json=self.PAYLOAD,
+                               headers={**_auth(), "X-Profile": "1", "X-Request-ID": "req-123"})
+
+        assert response.status_code == 200
+        assert response.headers["X-Profile-Id"] == "req-123"
+        assert "_clean_personal_info;dur=" in response.headers["Server-Timing"]
+
+        summary = client.get("/admin/profiles/req-123", headers=_auth()).json()
+        assert summary["reason"] == "requested"
+        # perfil con participanteId: CV vectorizado y actualización incremental de los talleres
+        assert "predict_proba_incremental" in summary["summary"]["targets_ms"]
+
+        raw = client.get("/admin/profiles/req-123/pstats", headers=_auth()).content
+        assert isinstance(marshal.loads(raw), dict)
+
+    def test_header_without_token_is_ignored(self):
+        """Verifica que sin token de servicio el header no active el perfilado."""
+        response = TestClient(app).post("/analyze/profile?profile=1", json=self.PAYLOAD, headers={"X-Profile": "1"})
+
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert profile_store.list() == []
+
+    def test_sample_rate_profiles_requests(self, monkeypatch):
+        """Verifica el perfilado por muestreo configurado en Settings."""
+        monkeypatch.setattr(settings, "PROFILE_SAMPLE_RATE", 1.0)
+
+        response = TestClient(app).post("/analyze/job", json={"puestoTexto": "vendedor con excel", "topK": 3})
+
+        assert response.status_code == 200
+        assert profile_store.get(response.headers["X-Profile-Id"])["reason"] == "sampled"
+
+    def test_unknown_profile_returns_404(self):
+        """Verifica 404 para un id inexistente."""
+        assert TestClient(app).get("/admin/profiles/nada", headers=_auth()).status_code == 404
@@ -0,0 +1,95 @@
+"""
+Pruebas unitarias del ranking vectorizado de competencias.
+Valida umbral, orden, completado por piso y confianza sobre matrices de probabilidades.
+"""
+import numpy as np
+import pytest
+
+from app.services.ranking import _stable_top_k, rank_matrix, round_nivel, to_competencias
+
+CLASSES = ["A", "B", "C", "D", "E"]
+
+
+def _names(ranked):
+    return [CLASSES[j] for j, _, _ in ranked]
+
+
+class TestRankMatrix:
+    """Pruebas de la selección y el orden por fila."""
+
+    def test_above_threshold_sorted_desc(self):
+        """Verifica que las clases sobre el umbral salgan de mayor a menor."""
+        ranked = rank_matrix(np.array([[0.4, 0.9, 0.1, 0.6, 0.35]]), 0.33, 0.15, 0, order_by_nivel=False)
+
+        assert _names(ranked[0]) == ["B", "D", "A", "E"]
+        assert all(is_above for _, _, is_above in ranked[0])
+
+    def test_ties_by_rounded_nivel_keep_class_order(self):
+        """Verifica que el perfil desempate por nivel redondeado respetando el orden de las clases."""
+        proba = np.array([[0.5001, 0.5004, 0.1, 0.1, 0.1]])
+
+        by_nivel = rank_matrix(proba, 0.33, 0.15, 0, order_by_nivel=True)
+        by_score = rank_matrix(proba, 0.33, 0.15, 0, order_by_nivel=False)
+
+        assert _names(by_nivel[0]) == ["A", "B"]
+        assert _names(by_score[0]) == ["B", "A"]
+
+    def test_fills_up_to_limit_above_floor(self):
+        """Verifica que se complete hasta el límite solo con clases sobre el piso."""
+        ranked = rank_matrix(np.array([[0.5, 0.2, 0.1, 0.3, 0.16]]), 0.33, 0.15, 5, order_by_nivel=True)
+
+        assert _names(ranked[0]) == ["A", "D", "B", "E"]
+        assert [is_above for _, _, is_above in ranked[0]] == [True, False, False, False]
+
+    def test_no_fill_when_enough_above(self):
+        """Verifica que no se agreguen clases si ya se alcanzó el límite."""
+        ranked = rank_matrix(np.array([[0.5, 0.6, 0.3, 0.3, 0.3]]), 0.33, 0.15, 2, order_by_nivel=True)
+
+        assert _names(ranked[0]) == ["B", "A"]
+
+    def test_per_row_limits(self):
+        """Verifica que cada fila use su propio límite (topK por puesto)."""
+        proba = np.array([[0.5, 0.3, 0.2, 0.1, 0.0]] * 3)
+
+        ranked = rank_matrix(proba, 0.33, 0.15, [1, 3, 0], order_by_nivel=False)
+
+        assert [_names(r) for r in ranked] == [["A"], ["A", "B", "C"], ["A"]]
+
+    def test_batch_equals_row_by_row(self):
+        """Verifica que rankear la matriz completa equivalga a rankear fila por fila."""
+        rng = np.random.default_rng(7)
+        proba = np.round(rng.random((50, 5)) ** 2, 2)
+
+        batch = rank_matrix(proba, 0.33, 0.15, 4, order_by_nivel=True)
+        single = [rank_matrix(proba[i], 0.33, 0.15, 4, order_by_nivel=True)[0] for i in range(50)]
+
+        assert batch == single
+
+    def test_empty_matrix(self):
+        """Verifica que una matriz sin filas devuelva una lista vacía."""
+        assert rank_matrix(np.zeros((0, 5)), 0.33, 0.15, 5, order_by_nivel=True) == []
+
+
+class TestRankingHelpers:
+    """Pruebas de redondeo, top-k estable y armado de la respuesta."""
+
+    @pytest.mark.parametrize("p", [0.00005, 0.00015, 0.12345, 0.28675, 0.335, 0.9995, 1.0, 0.0])
+    def test_round_nivel_matches_python_round(self, p):
+        """Verifica que el redondeo vectorizado sea idéntico a round(p * 100, 1)."""
+        assert round_nivel(np.array([p]))[0] == round(p * 100.0, 1)
+
+    def test_stable_top_k_prefers_lower_index_on_ties(self):
+        """Verifica que ante empates en el corte gane la clase de menor índice."""
+        key = np.array([[0.2, 0.5, 0.2, 0.2, 0.1]])
+
+        assert _stable_top_k(key, 2).tolist() == [[1, 0]]
+        assert _stable_top_k(key, 3).tolist() == [[1, 0, 2]]
+
+    def test_to_competencias_confidence(self):
+        """Verifica la confianza 0.85 sobre el umbral y 0.70 para las completadas."""
+        result = to_competencias(CLASSES, [(0, 50.0, True), (3, 20.0, False)])
+
+        assert result == [
+            {"competencia": "A", "nivel": 50.0, "confianza": 0.85, "fuente": ["ml"]},
+            {"competencia": "D", "nivel": 20.0, "confianza": 0.70, "fuente": ["ml"]},
+        ]
@@ -0,0 +1,123 @@
+"""
+Pruebas unitarias para la cache de resultados de inferencia.
+Valida LRU, expiración, invalidación por versión de modelo y contadores.
+"""
+import pytest
+from unittest.mock import Mock, patch
+import numpy as np
+from app.core.cache import TTLCache, content_key, result_cache
+from app.services.analysis_service import _predict_with_ml
+from app.services.job_service import _predict_ml
+
+
+class TestTTLCache:
+    """Pruebas de la estructura de cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Verifica que al superar el tamaño se descarte la entrada menos usada."""
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+    def test_expires_entries(self):
+        """Verifica que las entradas venzan según el TTL."""
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        with patch("app.core.cache.time.monotonic", return_value=1000.0):
+            cache.set("a", 1)
+        with patch("app.core.cache.time.monotonic", return_value=1061.0):
+            assert cache.get("a") is None
+
+    def test_counts_hits_and_misses(self):
+        """Verifica los contadores de aciertos y fallos."""
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.get("a")
+        cache.set("a", [1])
+        cache.get("a")
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_returns_copies(self):
+        """Verifica que modificar un resultado devuelto no altere la cache."""
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.set("a", [{"nivel": 1}])
+        cache.get("a")[0]["nivel"] = 99
+
+        assert cache.get("a") == [{"nivel": 1}]
+
+    def test_disabled_with_zero_size(self):
+        """Verifica que maxsize=0 deshabilite la cache."""
+        cache = TTLCache(maxsize=0, ttl_seconds=60)
+        cache.set("a", 1)
+        assert cache.get("a") is None
+
+    def test_version_change_clears(self):
+        """Verifica que un cambio de versión vacíe la cache."""
+        cache = TTLCache(maxsize=10, ttl_seconds=60)
+        cache.bind_version("v1")
+        cache.set("a", 1)
+        cache.bind_version("v1")
+        assert cache.get("a") == 1
+        cache.bind_version("v2")
+        assert cache.get("a") is None
+
+    def test_content_key_depends_on_every_part(self):
+        """Verifica que la clave cambie con el texto, la versión o los parámetros."""
+        base = content_key("profile", "v1", "texto", (0.3, 5, 0.15))
+        assert base == content_key("profile", "v1", "texto", (0.3, 5, 0.15))
+        assert base != content_key("profile", "v2", "texto", (0.3, 5, 0.15))
+        assert base != content_key("profile", "v1", "texto2", (0.3, 5, 0.15))
+        assert base != content_key("profile", "v1", "texto", (0.4, 5, 0.15))
+
+
+class TestServiceCaching:
+    """Pruebas de la cache delante de la inferencia de los servicios."""
+
+    def _model(self, version):
+        pipeline = Mock()
+        pipeline.predict_proba.return_value = np.array([[0.9, 0.4, 0.1]])
+        return pipeline, ["Comp1", "Comp2", "Comp3"], {"best_threshold": 0.3, "artifact_version": version}
+
+    @patch('app.services.analysis_service.load_model')
+    def test_profile_repeated_text_hits_cache(self, mock_load_model):
+        """Verifica que un CV repetido no vuelva a pasar por el modelo."""
+        model = self._model("v1")
+        mock_load_model.return_value = model
+
+        first = _predict_with_ml("Experiencia en Python", None)
+        second = _predict_with_ml("  experiencia en python ", None)
+
+        assert first == second
+        model[0].predict_proba.assert_called_once()
+        assert result_cache.stats()["hits"] == 1
+
+    @patch('app.services.analysis_service.load_model')
+    def test_model_swap_invalidates(self, mock_load_model):
+        """Verifica que un nuevo artefacto no reutilice resultados del anterior."""
+        old_model, new_model = self._model("v1"), self._model("v2")
+        mock_load_model.return_value = old_model
+        _predict_with_ml("Experiencia en Python", None)
+        mock_load_model.return_value = new_model
+        _predict_with_ml("Experiencia en Python", None)
+
+        new_model[0].predict_proba.assert_called_once()
+
+    @patch('app.services.job_service.load_model')
+    def test_job_cache_keyed_by_top_k(self, mock_load_model):
+        """Verifica que el topK forme parte de la clave de los puestos."""
+        model = self._model("v1")
+        mock_load_model.return_value = model
+
+        _predict_ml("Vendedor con manejo de caja", 2)
+        _predict_ml("Vendedor con manejo de caja", 2)
+        _predict_ml("Vendedor con manejo de caja", 3)
+
+        assert model[0].predict_proba.call_count == 2
@@ -0,0 +1,143 @@
+"""
+Pruebas unitarias de la coalescencia de requests idénticos en curso (single-flight).
+"""
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from httpx import ASGITransport, AsyncClient
+
+from app.core import metrics
+from app.core.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Pruebas de SingleFlight."""
+
+    async def test_concurrent_calls_share_one_computation(self):
+        """Verifica que las llamadas concurrentes con la misma clave ejecuten el cálculo una sola vez."""
+        flights = SingleFlight("test-share")
+        gate = asyncio.Event()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await gate.wait()
+            return {"meta": {"n": calls}}
+
+        before = metrics.COALESCED_REQUESTS.get(operation="test-share")
+        waiting = [asyncio.ensure_future(flights.run("k", compute)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 1
+        gate.set()
+        results = await asyncio.gather(*waiting)
+
+        assert calls == 1
+        assert results == [{"meta": {"n": 1}}] * 3
+        assert metrics.COALESCED_REQUESTS.get(operation="test-share") == before + 2
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 0
+
+    async def test_each_caller_gets_its_own_copy(self):
+        """Verifica que modificar el resultado recibido no altere el de los demás."""
+        flights = SingleFlight("test-copy")
+
+        async def compute():
+            await asyncio.sleep(0)
+            return {"meta": {}}
+
+        first, second = await asyncio.gather(flights.run("k", compute), flights.run("k", compute))
+        first["meta"]["documento"] = "x"
+        assert second == {"meta": {}}
+
+    async def test_different_keys_run_separately(self):
+        """Verifica que claves distintas no se coalescan."""
+        flights = SingleFlight("test-keys")
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0)
+            return key
+
+        results = await asyncio.gather(flights.run("a", lambda: compute("a")), flights.run("b", lambda: compute("b")))
+        assert results == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    async def test_errors_reach_every_caller(self):
+        """Verifica que una falla del cálculo llegue a todos los que lo esperaban y no quede registrada."""
+        flights = SingleFlight("test-error")
+
+        async def compute():
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flights.run("k", compute), flights.run("k", compute), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        await asyncio.sleep(0)
+        assert flights.in_flight() == 0
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Verifica que si un cliente se desconecta el resto siga recibiendo el resultado."""
+        flights = SingleFlight("test-cancel")
+        gate = asyncio.Event()
+
+        async def compute():
+            await gate.wait()
+            return 42
+
+        leader = asyncio.ensure_future(flights.run("k", compute))
+        follower = asyncio.ensure_future(flights.run("k", compute))
+        await asyncio.sleep(0)
+        leader.cancel()
+        gate.set()
+        assert await follower == 42
+
+    async def test_disabled(self):
+        """Verifica que con SINGLE_FLIGHT_ENABLED=False cada llamada calcule por su cuenta."""
+        flights = SingleFlight("test-disabled")
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return calls
+
+        with patch("app.core.single_flight.settings.SINGLE_FLIGHT_ENABLED", False):
+            await asyncio.gather(flights.run("k", compute), flights.run("k", compute))
+        assert calls == 2
+
+
+class TestCoalescedEndpoints:
+    """Pruebas de la coalescencia en /analyze/profile y /analyze/job."""
+
+    @pytest.mark.parametrize("path,body,target", [
+        ("/analyze/profile", {"participanteId": "p1", "cvTexto": "Analista SQL"},
+         "app.routes.analyze_routes.analyze_participant_profile"),
+        ("/analyze/job", {"puestoTexto": "Analista de ventas"},
+         "app.routes.job_routes.analyze_job_requirements"),
+    ])
+    async def test_identical_requests_run_once(self, path, body, target):
+        """Verifica que requests idénticos concurrentes lleguen una sola vez al servicio."""
+        from app.main import app
+        gate = threading.Event()
+        calls = []
+
+        def slow(*args):
+            calls.append(args)
+            gate.wait(5)
+            return {"participanteId": "p1", "competencias": [], "meta": {"mode": "rules"}}
+
+        with patch(target, side_effect=slow):
+            async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+                requests = [asyncio.ensure_future(client.post(path, json=body)) for _ in range(4)]
+                while not calls:
+                    await asyncio.sleep(0.01)
+                await asyncio.sleep(0.05)
+                gate.set()
+                responses = await asyncio.gather(*requests)
+
+        assert [r.status_code for r in responses] == [200] * 4
+        assert len(calls) == 1